@@ -0,0 +1,53 @@
+from __future__ import annotations
+
+import sys
+
+
+# Single entry point for the report tooling:
+#
+#   python docs <command> [args]        (python docs --help lists the commands)
+#
+# Only this table is loaded at startup. A command's module is imported when the
+# command runs, so --help and the light commands never pay for python-docx,
+# NumPy or multiprocessing. `python docs bench startup` tracks the import cost
+# of each command with -X importtime.
+
+# name -> (module with main(), argv prepended for it, summary)
+COMMANDS = {
+    "build": ("generate_project_report", [], "generate the report .docx (or a preview, or manifest variants)"),
+    "watch": ("generate_project_report", ["--watch"], "rebuild and re-estimate the report whenever its inputs change"),
+    "estimate": ("_estimate_docx_length", [], "estimate paragraphs, words and pages of .docx/.md files"),
+    "diff": ("_diff_docx", [], "paragraph-level diff of two .docx builds"),
+    "search": ("_search_index", [], "offline BM25 search over the report and project documents"),
+    "chunks": ("_chunks", [], "export the report as section-aware JSONL context chunks"),
+    "dupes": ("_near_dupes", [], "find exact and near-duplicate paragraphs across the documents"),
+    "serve": ("_estimate_service", [], "long-running estimation service (JSON lines on stdin/stdout, or HTTP)"),
+    "sources": ("_source_index", [], "scan the app sources behind the inventory appendices"),
+    "bench": ("_bench_report", [], "benchmarks: report generation and estimation, CLI startup"),
+}
+
+
+def _usage() -> str:
+    width = max(map(len, COMMANDS))
+    lines = ["usage: docs <command> [args]", "", "commands:"]
+    lines += [f"  {name:<{width}}  {summary}" for name, (_, _, summary) in COMMANDS.items()]
+    lines += ["", "Run 'docs <command> --help' for the options of a command."]
+    return "\n".join(lines)
+
+
+def main(argv: list[str] | None = None) -> int | None:
+    argv = sys.argv[1:] if argv is None else argv
+    if not argv or argv[0] in ("-h", "--help"):
+        print(_usage(), file=sys.stdout if argv else sys.stderr)
+        return 0 if argv else 2
+    name, rest = argv[0], argv[1:]
+    if name not in COMMANDS:
+        print(f"docs: unknown command {name!r}\n\n{_usage()}", file=sys.stderr)
+        return 2
+    module, extra, _ = COMMANDS[name]
+    sys.argv = [f"docs {name}", *extra, *rest]  # argparse takes prog from argv[0]
+    return __import__(module).main()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
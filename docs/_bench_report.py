@@ -0,0 +1,267 @@
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+
+# Benchmarks for generate_project_report.py and _estimate_docx_length.py.
+#
+#   python docs/_bench_report.py run --out baseline.json
+#   python docs/_bench_report.py run --compare baseline.json --threshold 10
+#   python docs/_bench_report.py run --scales 10 30 --writers docx --save-threads 0
+#   python docs/_bench_report.py compare baseline.json current.json
+#   python docs/_bench_report.py startup --budget-ms 150
+#
+# Every case (writer x padding scale) runs in a fresh spawned process so peak
+# RSS is per case, and times are the best of --repeat runs. Imports and the
+# python-docx base template are warmed before timing. Everything runs offline;
+# the section cache is disabled so builds are measured cold.
+#
+# `startup` runs `python -X importtime docs <command>` for the light commands of
+# the docs CLI and reports what each one imports on top of the bare interpreter.
+
+DEFAULT_SCALES = [0.1, 0.35, 1.0, 3.0, 10.0]
+TIME_METRICS = ["build_seconds", "save_seconds", "estimate_seconds", "layout_seconds"]
+OTHER_METRICS = ["output_bytes", "peak_rss_kib", "pages"]
+
+DOCS = Path(__file__).resolve().parent
+STARTUP_CASES = [
+    ["--help"],
+    ["build", "--help"],
+    ["estimate", "--help"],
+    ["estimate", str(DOCS / "QUICK_START_GUIDE.md")],
+    ["diff", "--help"],
+    ["search", "--help"],
+    ["chunks", "--help"],
+    ["dupes", "--help"],
+    ["serve", "--help"],
+    ["sources", "--help"],
+]
+
+
+def _run_case(writer: str, scale: float, repeat: int, save_threads: int | None = None) -> dict:
+    sys.path.insert(0, str(Path(__file__).resolve().parent))
+    import _layout_sim  # noqa: F401  (NumPy import is not part of any timing)
+    from _estimate_docx_length import estimate, simulate_docx
+    from generate_project_report import base_template, build_report
+
+    if writer == "docx":
+        base_template()  # prepared once per process, like a batch build
+    best: dict[str, float] = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        out = Path(tmp) / "report.docx"
+        for _ in range(repeat):
+            t0 = time.perf_counter()
+            stats = build_report(out, writer=writer, padding_scale=scale, save_threads=save_threads)
+            t1 = time.perf_counter()
+            estimate(out)
+            t2 = time.perf_counter()
+            pages = simulate_docx(out).pages
+            t3 = time.perf_counter()
+            run = {
+                "build_seconds": t1 - t0,
+                "save_seconds": stats["save_seconds"],
+                "estimate_seconds": t2 - t1,
+                "layout_seconds": t3 - t2,
+            }
+            if "save" in stats:
+                run["serialize_seconds"] = stats["save"]["serialize_seconds"]
+                run["compress_seconds"] = stats["save"]["compress_seconds"]
+            for k, v in run.items():
+                best[k] = min(best.get(k, v), v)
+        size = out.stat().st_size
+    return {
+        "writer": writer,
+        "scale": scale,
+        **best,
+        "output_bytes": size,
+        "peak_rss_kib": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        "pages": pages,
+    }
+
+
+def run(writers: list[str], scales: list[float], repeat: int, save_threads: int | None = None) -> dict:
+    from concurrent.futures import ProcessPoolExecutor
+
+    results = []
+    # One task per child: a fresh interpreter per case keeps peak RSS honest.
+    with ProcessPoolExecutor(max_workers=1, max_tasks_per_child=1) as pool:
+        for writer in writers:
+            for scale in scales:
+                results.append(pool.submit(_run_case, writer, scale, repeat, save_threads).result())
+                _print_row(results[-1])
+    return {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "machine": platform.machine(),
+            "cpus": os.cpu_count(),
+            "repeat": repeat,
+            "save_threads": save_threads,
+        },
+        "results": results,
+    }
+
+
+def _print_row(r: dict) -> None:
+    stages = ""
+    if "serialize_seconds" in r:
+        stages = f" (serialize={r['serialize_seconds']:.3f}s compress={r['compress_seconds']:.3f}s)"
+    print(
+        f"{r['writer']:<7} scale={r['scale']:<6g} build={r['build_seconds']:.3f}s "
+        f"save={r['save_seconds']:.3f}s{stages} est={r['estimate_seconds']:.3f}s "
+        f"layout={r['layout_seconds']:.3f}s size={r['output_bytes'] / 1024:.0f}KiB "
+        f"rss={r['peak_rss_kib'] / 1024:.0f}MiB pages={r['pages']}",
+        flush=True,
+    )
+
+
+def compare(baseline: dict, current: dict, threshold_pct: float, min_seconds: float) -> list[str]:
+    # Returns one message per time metric that got more than threshold_pct slower.
+    # Timings below min_seconds on both sides are treated as noise.
+    base = {(r["writer"], r["scale"]): r for r in baseline["results"]}
+    regressions = []
+    for r in current["results"]:
+        key = (r["writer"], r["scale"])
+        b = base.get(key)
+        if b is None:
+            print(f"{r['writer']:<7} scale={r['scale']:<6g} (no baseline)")
+            continue
+        parts = []
+        for m in TIME_METRICS + OTHER_METRICS:
+            old, new = b[m], r[m]
+            delta = (new - old) / old * 100 if old else 0.0
+            flag = ""
+            if (
+                m in TIME_METRICS
+                and delta > threshold_pct
+                and max(old, new) >= min_seconds
+            ):
+                flag = " !"
+                regressions.append(f"{r['writer']} scale={r['scale']:g} {m}: {old:.3f}s -> {new:.3f}s (+{delta:.0f}%)")
+            parts.append(f"{m.split('_')[0]}={delta:+.0f}%{flag}")
+        print(f"{r['writer']:<7} scale={r['scale']:<6g} " + " ".join(parts))
+    return regressions
+
+
+def _top_level_imports(stderr: str) -> dict[str, int]:
+    # -X importtime lines: "import time: self [us] | cumulative | <indent>name".
+    # Top-level modules (no indent) carry the cost of everything under them.
+    imports = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        _, cumulative, name = line[len("import time:") :].split("|")
+        if cumulative.strip().isdigit() and name[1:2] != " ":
+            imports[name.strip()] = int(cumulative)
+    return imports
+
+
+def startup(cases: list[list[str]], repeat: int) -> list[dict]:
+    # Best-of-repeat wall time and import time per command. Imports the bare
+    # interpreter makes anyway (site, encodings, ...) are not counted.
+    bare = _top_level_imports(
+        subprocess.run([sys.executable, "-X", "importtime", "-c", "pass"], capture_output=True, text=True).stderr
+    )
+    results = []
+    for args in cases:
+        best: dict | None = None
+        for _ in range(repeat):
+            t0 = time.perf_counter()
+            proc = subprocess.run(
+                [sys.executable, "-X", "importtime", str(DOCS), *args], capture_output=True, text=True
+            )
+            wall = time.perf_counter() - t0
+            own = {k: v for k, v in _top_level_imports(proc.stderr).items() if k not in bare}
+            import_us = sum(own.values())
+            if best is None or import_us < best["import_ms"] * 1000:
+                top = sorted(own.items(), key=lambda kv: -kv[1])[:3]
+                best = {
+                    "command": " ".join(Path(a).name if os.sep in a else a for a in args),
+                    "import_ms": import_us / 1000,
+                    "top": [f"{k} {v / 1000:.0f}ms" for k, v in top],
+                }
+            best["wall_ms"] = min(best.get("wall_ms", wall * 1000), wall * 1000)
+        results.append(best)
+        print(
+            f"docs {best['command']:<34} imports={best['import_ms']:6.1f}ms wall={best['wall_ms']:6.1f}ms  "
+            + ", ".join(best["top"]),
+            flush=True,
+        )
+    return results
+
+
+def _load(path: Path) -> dict:
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark report generation and estimation.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_run = sub.add_parser("run", help="run the PADDING_SCALE sweep")
+    p_run.add_argument("--scales", type=float, nargs="+", default=DEFAULT_SCALES)
+    p_run.add_argument("--writers", nargs="+", choices=["docx", "stream"], default=["docx", "stream"])
+    p_run.add_argument("--repeat", type=int, default=3, help="runs per case; the best time is kept")
+    p_run.add_argument(
+        "--save-threads",
+        type=int,
+        metavar="N",
+        help="docx writer: pipelined packaging with N threads (0: one per CPU), timing serialize and compress",
+    )
+    p_run.add_argument("--out", type=Path, help="write results as a JSON baseline")
+    p_run.add_argument("--compare", type=Path, metavar="BASELINE", help="compare against a baseline")
+
+    p_cmp = sub.add_parser("compare", help="compare two result files")
+    p_cmp.add_argument("baseline", type=Path)
+    p_cmp.add_argument("current", type=Path)
+
+    p_start = sub.add_parser("startup", help="import time of the docs CLI commands (-X importtime)")
+    p_start.add_argument("--repeat", type=int, default=5, help="runs per command; the best is kept")
+    p_start.add_argument("--budget-ms", type=float, help="fail when a command imports for longer than this")
+    p_start.add_argument("--out", type=Path, help="write results as JSON")
+
+    for p in (p_run, p_cmp):
+        p.add_argument("--threshold", type=float, default=10.0, help="allowed slowdown in percent")
+        p.add_argument("--min-seconds", type=float, default=0.01, help="ignore timings below this")
+    args = parser.parse_args()
+
+    if args.command == "startup":
+        results = startup(STARTUP_CASES, args.repeat)
+        if args.out:
+            args.out.write_text(json.dumps({"results": results}, indent=2) + "\n", encoding="utf-8")
+        over = [r for r in results if args.budget_ms is not None and r["import_ms"] > args.budget_ms]
+        for r in over:
+            print(f"  over budget: docs {r['command']} imports for {r['import_ms']:.1f}ms > {args.budget_ms:g}ms")
+        sys.exit(1 if over else 0)
+
+    if args.command == "run":
+        current = run(args.writers, args.scales, args.repeat, args.save_threads)
+        if args.out:
+            args.out.write_text(json.dumps(current, indent=2) + "\n", encoding="utf-8")
+        if not args.compare:
+            return
+        baseline = _load(args.compare)
+    else:
+        baseline, current = _load(args.baseline), _load(args.current)
+
+    regressions = compare(baseline, current, args.threshold, args.min_seconds)
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) over {args.threshold:g}%:")
+        for msg in regressions:
+            print("  " + msg)
+        sys.exit(1)
+    print(f"\nNo regressions over {args.threshold:g}%.")
+
+
+if __name__ == "__main__":
+    main()
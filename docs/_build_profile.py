@@ -0,0 +1,134 @@
+from __future__ import annotations
+
+import json
+import time
+import tracemalloc
+from contextlib import contextmanager
+from pathlib import Path
+
+from _ooxml_stream import DocumentSink
+
+
+# Opt-in build instrumentation for generate_project_report.py (--profile).
+#
+# Every measured span records wall time, paragraphs added, body XML bytes
+# produced and the tracemalloc peak above the memory in use when it started.
+# Top-level sections are kept in build order; phases (helpers such as
+# _pad_pages, and doc.save) are aggregated by name across all their calls.
+
+
+def _probe(doc) -> tuple[int, int | None]:
+    # (paragraphs, xml bytes) produced so far by a document backend.
+    if isinstance(doc, DocumentSink):
+        doc.flush()
+        return doc.paragraph_count, getattr(doc, "xml_bytes", 0)
+    # python-docx: count body children (minus the trailing sectPr); bytes are
+    # measured on exit by serializing just the new elements.
+    return len(doc.element.body) - 1, None
+
+
+def _docx_bytes(doc, start: int, end: int) -> int:
+    from lxml import etree
+
+    body = doc.element.body
+    return sum(len(etree.tostring(el, encoding="utf-8")) for el in body[start:end])
+
+
+class _Span:
+    __slots__ = ("start_mem", "peak")
+
+    def __init__(self, start_mem: int) -> None:
+        self.start_mem = start_mem
+        self.peak = start_mem
+
+
+class Profiler:
+    def __init__(self) -> None:
+        self.sections: list[dict] = []
+        self.phases: dict[str, dict] = {}
+        self._stack: list[_Span] = []
+        self._t0 = 0.0
+        self.total_seconds = 0.0
+
+    def start(self) -> None:
+        tracemalloc.start()
+        self._t0 = time.perf_counter()
+
+    def stop(self) -> None:
+        self.total_seconds = time.perf_counter() - self._t0
+        tracemalloc.stop()
+
+    @contextmanager
+    def span(self, name: str, doc, kind: str = "phase"):
+        # tracemalloc has a single peak counter, so it is reset per span and the
+        # child's peak is folded into its parent on exit.
+        current, peak = tracemalloc.get_traced_memory()
+        if self._stack:
+            self._stack[-1].peak = max(self._stack[-1].peak, peak)
+        tracemalloc.reset_peak()
+        span = _Span(current)
+        self._stack.append(span)
+        paras0, bytes0 = _probe(doc)
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - t0
+            paras1, bytes1 = _probe(doc)
+            span.peak = max(span.peak, tracemalloc.get_traced_memory()[1])
+            self._stack.pop()
+            if self._stack:
+                self._stack[-1].peak = max(self._stack[-1].peak, span.peak)
+            tracemalloc.reset_peak()
+            if bytes0 is None:
+                xml_bytes = _docx_bytes(doc, paras0, paras1)
+            else:
+                xml_bytes = bytes1 - bytes0
+            self._record(name, kind, seconds, paras1 - paras0, xml_bytes, span.peak - span.start_mem)
+
+    def _record(self, name: str, kind: str, seconds: float, paragraphs: int, xml_bytes: int, peak: int) -> None:
+        if kind == "section":
+            self.sections.append(
+                {
+                    "name": name,
+                    "seconds": seconds,
+                    "paragraphs": paragraphs,
+                    "xml_bytes": xml_bytes,
+                    "peak_kib": peak / 1024,
+                }
+            )
+            return
+        p = self.phases.setdefault(
+            name,
+            {"name": name, "calls": 0, "seconds": 0.0, "paragraphs": 0, "xml_bytes": 0, "peak_kib": 0.0},
+        )
+        p["calls"] += 1
+        p["seconds"] += seconds
+        p["paragraphs"] += paragraphs
+        p["xml_bytes"] += xml_bytes
+        p["peak_kib"] = max(p["peak_kib"], peak / 1024)
+
+    def report(self) -> dict:
+        return {
+            "total_seconds": self.total_seconds,
+            "sections": self.sections,
+            "phases": list(self.phases.values()),
+        }
+
+    def write_json(self, path: Path) -> None:
+        Path(path).write_text(json.dumps(self.report(), indent=2) + "\n", encoding="utf-8")
+
+    def print_table(self) -> None:
+        rows = [("section", r) for r in self.sections] + [("phase", r) for r in self.phases.values()]
+        rows.sort(key=lambda kr: kr[1]["seconds"], reverse=True)
+        width = max([len("Name")] + [len(r["name"]) for _, r in rows])
+        print(
+            f"{'Name':<{width}}  {'Kind':<7}  {'Calls':>5}  {'Seconds':>8}  "
+            f"{'Paras':>7}  {'XML KiB':>9}  {'Peak KiB':>9}"
+        )
+        for kind, r in rows:
+            print(
+                f"{r['name']:<{width}}  {kind:<7}  {r.get('calls', 1):>5}  {r['seconds']:>8.3f}  "
+                f"{r['paragraphs']:>7}  {r['xml_bytes'] / 1024:>9.1f}  {r['peak_kib']:>9.1f}"
+            )
+        print(f"Total: {self.total_seconds:.3f}s")
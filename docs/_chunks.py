@@ -0,0 +1,177 @@
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import re
+import sys
+import time
+from pathlib import Path
+from typing import TextIO
+
+from _ooxml_stream import DocumentSink
+
+
+# Context chunks of the report for the chatbot's retrieval step (report 5.3 and
+# Appendix D), as JSON lines:
+#
+#   python docs/_chunks.py [--out PATH|-] [--max-tokens 300] [--overlap 50]
+#
+# ChunkDocument takes the same paragraph stream as the .docx backends and
+# tracks the heading path of _h1/_h2/_h3. The body text of each section (up to
+# the next heading) is cut into chunks of at most max_tokens, preferring
+# paragraph ends, with the last `overlap` tokens repeated at the start of the
+# next chunk. Sections are chunked independently, so an edit only changes the
+# chunks of its own section. A chunk's id is a hash of its source, heading path
+# and text: unchanged chunks keep their ids across rebuilds and downstream
+# embeddings only need redoing for new ids. Token counts are estimates (about
+# four characters per token), not a tokenizer's.
+
+DOCS = Path(__file__).resolve().parent
+DEFAULT_OUT = DOCS / "DocentDesk_Project_Report.chunks.jsonl"
+SOURCE = "DocentDesk_Project_Report"
+
+CHARS_PER_TOKEN = 4
+_HEADING_LEVELS = {"Heading 1": 1, "Heading 2": 2, "Heading 3": 3}
+# A word with the whitespace that follows it, so joining pieces restores the text.
+_PIECE_RE = re.compile(r"\S+\s*")
+
+
+def approx_tokens(text: str) -> int:
+    return max(1, -(-len(text.strip()) // CHARS_PER_TOKEN))
+
+
+def chunk_id(source: str, path: list[str], text: str) -> str:
+    payload = "\0".join([source, " › ".join(path), text])
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+
+def _split(pieces: list[tuple[str, int, bool]], max_tokens: int, overlap: int) -> list[tuple[int, int]]:
+    # pieces: (text, tokens, ends a paragraph). Returns [start, end) windows.
+    windows = []
+    start = 0
+    while start < len(pieces):
+        end, total, last_break = start, 0, None
+        while end < len(pieces) and (end == start or total + pieces[end][1] <= max_tokens):
+            total += pieces[end][1]
+            if pieces[end][2]:
+                last_break = end + 1
+            end += 1
+        # Prefer to stop at a paragraph end in the second half of the window.
+        if end < len(pieces) and last_break is not None and last_break > start + (end - start) // 2:
+            end = last_break
+        windows.append((start, end))
+        if end >= len(pieces):
+            break
+        back, carried = end, 0
+        while back > start + 1 and carried + pieces[back - 1][1] <= overlap:
+            back -= 1
+            carried += pieces[back][1]
+        start = back
+    return windows
+
+
+class ChunkDocument(DocumentSink):
+    def __init__(self, out: TextIO, max_tokens: int = 300, overlap: int = 50, source: str = SOURCE) -> None:
+        if max_tokens < 1 or not 0 <= overlap < max_tokens:
+            raise ValueError(f"need max_tokens >= 1 and 0 <= overlap < max_tokens (got {max_tokens}, {overlap})")
+        super().__init__()
+        self.max_tokens = max_tokens
+        self.overlap = overlap
+        self.source = source
+        self.ids: list[str] = []
+        self._out = out
+        self._path: list[str] = []
+        self._paragraphs: list[tuple[str, bool]] = []  # (text, is a bullet)
+        self._seen: dict[str, int] = {}
+
+    def _emit(self, p) -> None:
+        style, text, font, *_ = p.record()
+        level = _HEADING_LEVELS.get(style)
+        if level:
+            self._flush_section()
+            del self._path[level - 1 :]
+            self._path.append(text.strip())
+        elif text.strip():
+            self._paragraphs.append((f"- {text}", True) if style == "List Bullet" else (text, False))
+
+    def _flush_section(self) -> None:
+        pieces = []
+        for i, (para, bullet) in enumerate(self._paragraphs):
+            words = _PIECE_RE.findall(para.strip())
+            # Items of one list stay on consecutive lines.
+            next_bullet = i + 1 < len(self._paragraphs) and self._paragraphs[i + 1][1]
+            end = "\n" if bullet and next_bullet else "\n\n"
+            pieces += [(w, approx_tokens(w), False) for w in words[:-1]]
+            pieces.append((words[-1].rstrip() + end, approx_tokens(words[-1]), True))
+        for index, (start, end) in enumerate(_split(pieces, self.max_tokens, self.overlap)):
+            text = "".join(w for w, _, _ in pieces[start:end]).strip()
+            cid = chunk_id(self.source, self._path, text)
+            # Identical chunks under one heading path get an occurrence suffix.
+            n = self._seen.get(cid, 0)
+            self._seen[cid] = n + 1
+            if n:
+                cid = f"{cid}-{n + 1}"
+            record = {
+                "id": cid,
+                "source": self.source,
+                "path": self._path,
+                "index": index,
+                "tokens": sum(t for _, t, _ in pieces[start:end]),
+                "text": text,
+            }
+            self._out.write(json.dumps(record, ensure_ascii=False) + "\n")
+            self.ids.append(cid)
+        self._paragraphs = []
+
+    def close(self) -> list[str]:
+        self._flush_pending()
+        self._flush_section()
+        self._out.flush()
+        return self.ids
+
+
+def _previous_ids(path: Path) -> set[str]:
+    try:
+        with open(path, encoding="utf-8") as f:
+            return {json.loads(line)["id"] for line in f if line.strip()}
+    except (OSError, ValueError, KeyError):
+        return set()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Export the report as section-aware JSONL context chunks.")
+    parser.add_argument("--out", default=str(DEFAULT_OUT), help="JSONL destination, '-' for stdout")
+    parser.add_argument("--max-tokens", type=int, default=300, help="estimated tokens per chunk (default: 300)")
+    parser.add_argument("--overlap", type=int, default=50, help="tokens repeated from the previous chunk (default: 50)")
+    parser.add_argument(
+        "--padding-scale",
+        type=float,
+        default=0.0,
+        help="elaboration padding to include (default: 0, the filler adds no information)",
+    )
+    args = parser.parse_args()
+    if not 0 <= args.overlap < args.max_tokens:
+        parser.error("--overlap must be at least 0 and smaller than --max-tokens")
+
+    from generate_project_report import write_chunks
+
+    t0 = time.perf_counter()
+    if args.out == "-":
+        write_chunks(sys.stdout, args.max_tokens, args.overlap, args.padding_scale)
+        return
+    out = Path(args.out)
+    before = _previous_ids(out)
+    tmp = out.with_name(out.name + ".tmp")
+    with open(tmp, "w", encoding="utf-8", buffering=1 << 16) as f:
+        ids = write_chunks(f, args.max_tokens, args.overlap, args.padding_scale)
+    tmp.replace(out)
+    new = set(ids) - before
+    print(
+        f"Wrote {len(ids)} chunks to {out} ({(time.perf_counter() - t0) * 1000:.0f} ms): "
+        f"{len(new)} new, {len(ids) - len(new)} unchanged, {len(before - set(ids))} gone"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,230 @@
+from __future__ import annotations
+
+import argparse
+import json
+import re
+import sys
+from difflib import SequenceMatcher
+from pathlib import Path
+from typing import NamedTuple
+
+from _estimate_docx_length import iter_paragraphs
+
+
+# Structural diff of two .docx builds of the report.
+#
+#   python docs/_diff_docx.py old.docx new.docx [--json PATH] [--width N]
+#
+# Both files are streamed with the expat reader of _estimate_docx_length.py
+# (no python-docx). Every body paragraph is keyed by a hash of (style, heading
+# path, text) and the two key sequences are aligned with Heckel's linear-time
+# algorithm: paragraphs that occur exactly once in each file anchor the
+# alignment, and matches are grown forwards and backwards from the anchors.
+# Unmatched paragraphs between two anchors are paired as changed when they have
+# the same style and either the same heading path or similar text
+# (CHANGED_SIMILARITY); the rest are removed/added. Each gap is reported grouped
+# by heading path, removals before additions. Matched paragraphs that cross
+# other matches are reported as moved. Exit status is 0 when the builds are
+# identical and 1 otherwise, like diff(1).
+
+_HEADING_RE = re.compile(r"Heading (\d)")
+# difflib ratio above which two paragraphs from different sections count as
+# one changed paragraph (a heading rename moves its whole subtree).
+CHANGED_SIMILARITY = 0.6
+# Added paragraphs tried per removed one when pairing a gap.
+_PAIR_WINDOW = 50
+
+
+class Para(NamedTuple):
+    key: int
+    style: str
+    section: tuple[str, ...]  # heading path; a heading's own path ends with itself
+    text: str
+
+
+def read_paragraphs(path: Path) -> list[Para]:
+    paras = []
+    stack: list[str] = []
+    for style, text, *_ in iter_paragraphs(path):
+        m = _HEADING_RE.fullmatch(style)
+        if m:
+            del stack[int(m.group(1)) - 1 :]
+            parents = tuple(stack)
+            stack.append(text)
+        else:
+            parents = tuple(stack)
+        # hash() is stable within one process, which is all the alignment needs.
+        paras.append(Para(hash((style, parents, text)), style, tuple(stack), text))
+    return paras
+
+
+def _align(old: list[int], new: list[int]) -> tuple[list[int], list[int]]:
+    # Heckel (1978): returns old_match[i] = j and new_match[j] = i, -1 if unmatched.
+    old_match, new_match = [-1] * len(old), [-1] * len(new)
+
+    # A shared prefix and suffix match as-is, even where they repeat (empty paragraphs).
+    head = 0
+    while head < min(len(old), len(new)) and old[head] == new[head]:
+        old_match[head] = new_match[head] = head
+        head += 1
+    tail = 0
+    while tail < min(len(old), len(new)) - head and old[-1 - tail] == new[-1 - tail]:
+        old_match[len(old) - 1 - tail] = len(new) - 1 - tail
+        new_match[len(new) - 1 - tail] = len(old) - 1 - tail
+        tail += 1
+
+    # Anchors: keys that occur exactly once in each file.
+    seen: dict[int, list[int]] = {}  # key -> [count in old, count in new, index in old]
+    for i in range(head, len(old) - tail):
+        entry = seen.setdefault(old[i], [0, 0, i])
+        entry[0] += 1
+    for j in range(head, len(new) - tail):
+        entry = seen.get(new[j])
+        if entry is not None:
+            entry[1] += 1
+    for j in range(head, len(new) - tail):
+        entry = seen.get(new[j])
+        if entry is not None and entry[0] == 1 and entry[1] == 1:
+            new_match[j], old_match[entry[2]] = entry[2], j
+
+    # Grow matches into equal, still unmatched neighbours.
+    for j in range(len(new) - 1):
+        i = new_match[j]
+        if 0 <= i < len(old) - 1 and new_match[j + 1] < 0 and old_match[i + 1] < 0 and old[i + 1] == new[j + 1]:
+            new_match[j + 1], old_match[i + 1] = i + 1, j + 1
+    for j in range(len(new) - 1, 0, -1):
+        i = new_match[j]
+        if i > 0 and new_match[j - 1] < 0 and old_match[i - 1] < 0 and old[i - 1] == new[j - 1]:
+            new_match[j - 1], old_match[i - 1] = i - 1, j - 1
+    return old_match, new_match
+
+
+def _similar(a: str, b: str) -> bool:
+    m = SequenceMatcher(None, a, b, autojunk=False)
+    return (
+        m.real_quick_ratio() >= CHANGED_SIMILARITY
+        and m.quick_ratio() >= CHANGED_SIMILARITY
+        and m.ratio() >= CHANGED_SIMILARITY
+    )
+
+
+def _gap_ops(old: list[Para], new: list[Para], removed: list[int], added: list[int]) -> list[tuple]:
+    # Pairs in order (no crossings), then groups the gap by heading path in
+    # order of first appearance: removed and changed first, then added.
+    pairs: dict[int, int] = {}  # index in removed -> index in added
+    start = 0
+    for r, i in enumerate(removed):
+        o = old[i]
+        for a in range(start, min(len(added), start + _PAIR_WINDOW)):
+            n = new[added[a]]
+            if o.style == n.style and (o.section == n.section or _similar(o.text, n.text)):
+                pairs[r] = a
+                start = a + 1
+                break
+    paired = set(pairs.values())
+    items = [
+        ("changed", old[i], new[added[pairs[r]]]) if r in pairs else ("removed", old[i], None)
+        for r, i in enumerate(removed)
+        # Repeated paragraphs (blank lines) the alignment left unmatched are no change.
+        if r not in pairs or old[i].key != new[added[pairs[r]]].key
+    ]
+    items += [("added", None, new[j]) for a, j in enumerate(added) if a not in paired]
+    order: dict[tuple[str, ...], int] = {}
+    for _, o, n in items:
+        order.setdefault((n or o).section, len(order))
+    return sorted(items, key=lambda op: (order[(op[2] or op[1]).section], op[0] == "added"))
+
+
+def diff_paragraphs(old: list[Para], new: list[Para]) -> list[tuple[str, Para | None, Para | None]]:
+    # (kind, old paragraph, new paragraph) in new-document order; kind is one of
+    # added, removed, changed, moved.
+    old_match, new_match = _align([p.key for p in old], [p.key for p in new])
+    ops: list[tuple] = []
+    added: list[int] = []
+    cursor = 0
+    for j, i in enumerate(new_match):
+        if i < 0:
+            added.append(j)
+            continue
+        if i < cursor:
+            ops.append(("moved", old[i], new[j]))
+            continue
+        removed = [k for k in range(cursor, i) if old_match[k] < 0]
+        ops += _gap_ops(old, new, removed, added)
+        added = []
+        cursor = i + 1
+    removed = [k for k in range(cursor, len(old)) if old_match[k] < 0]
+    ops += _gap_ops(old, new, removed, added)
+    return ops
+
+
+def diff(old_path: Path, new_path: Path) -> dict:
+    old, new = read_paragraphs(old_path), read_paragraphs(new_path)
+    ops = diff_paragraphs(old, new)
+    counts = {kind: 0 for kind in ("added", "removed", "changed", "moved")}
+    for kind, _, _ in ops:
+        counts[kind] += 1
+    return {"old": str(old_path), "new": str(new_path), "paragraphs": [len(old), len(new)], **counts, "ops": ops}
+
+
+def _clip(text: str, width: int) -> str:
+    text = text.replace("\n", " ⏎ ").replace("\t", " ")
+    return text if width <= 0 or len(text) <= width else text[: width - 1] + "…"
+
+
+def print_diff(result: dict, width: int = 100) -> None:
+    section = None
+    for kind, o, n in result["ops"]:
+        where = (n or o).section
+        if where != section:
+            section = where
+            print("\n== " + (" › ".join(section) or "(before the first heading)"))
+        p = n or o
+        if kind == "added":
+            print(f"  + [{p.style}] {_clip(p.text, width)}")
+        elif kind == "removed":
+            print(f"  - [{p.style}] {_clip(p.text, width)}")
+        elif kind == "moved":
+            print(f"  > [{p.style}] {_clip(p.text, width)}  (moved from {' › '.join(o.section) or 'top'})")
+        elif o.text == n.text:
+            print(f"  ~ [{p.style}] {_clip(p.text, width)}  (heading path changed)")
+        else:
+            print(f"  ~ [{p.style}] {_clip(o.text, width)}")
+            print(f"    {' ' * len(p.style)}→ {_clip(n.text, width)}")
+    old_n, new_n = result["paragraphs"]
+    print(
+        f"\n{old_n} → {new_n} paragraphs: {result['added']} added, {result['removed']} removed, "
+        f"{result['changed']} changed, {result['moved']} moved"
+    )
+
+
+def _json_op(kind: str, o: Para | None, n: Para | None) -> dict:
+    op: dict = {"kind": kind}
+    for side, p in (("old", o), ("new", n)):
+        if p is not None:
+            op[side] = {"style": p.style, "section": list(p.section), "text": p.text}
+    return op
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Paragraph-level diff of two .docx report builds.")
+    parser.add_argument("old", type=Path)
+    parser.add_argument("new", type=Path)
+    parser.add_argument("--json", metavar="PATH", help="write the diff as JSON ('-' for stdout)")
+    parser.add_argument("--width", type=int, default=100, help="clip paragraph text to N characters (0: no limit)")
+    args = parser.parse_args()
+
+    result = diff(args.old, args.new)
+    if args.json:
+        data = json.dumps({**result, "ops": [_json_op(*op) for op in result["ops"]]}, indent=2, ensure_ascii=False)
+        if args.json == "-":
+            print(data)
+        else:
+            Path(args.json).write_text(data + "\n", encoding="utf-8")
+    if args.json != "-":
+        print_diff(result, args.width)
+    sys.exit(1 if result["ops"] else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,193 @@
+from __future__ import annotations
+
+import os
+import struct
+import time
+import zipfile
+import zlib
+from pathlib import Path
+from typing import TYPE_CHECKING, BinaryIO
+
+from _ooxml_stream import COMPRESSION
+
+if TYPE_CHECKING:
+    from concurrent.futures import Future
+
+    from docx.document import Document
+
+
+# Pipelined packaging of a python-docx Document (--save-threads).
+#
+# Document.save() serializes each part and deflates it on the calling thread,
+# one part after the other. Here the calling thread only serializes: the parts
+# go out in python-docx's order, and every part is cut into CHUNK_SIZE blocks
+# that are deflated on a thread pool while serialization carries on (zlib
+# releases the GIL). Each block is a raw deflate stream primed with the last
+# 32 KiB of the previous block as preset dictionary and ended with a sync flush
+# (the pigz scheme), so the blocks of a part concatenate into one valid stream
+# that compresses almost as well as a single one. Finished entries are appended
+# in order by one buffered zip writer; serialization, compression and writing
+# are timed separately.
+#
+# The part list and [Content_Types].xml come from python-docx internals
+# (Part.before_marshal(), docx.opc.pkgwriter._ContentTypesItem), so this is tied
+# to python-docx 1.x (written against 1.2.0); supported() is False elsewhere and
+# build_report() then falls back to Document.save().
+
+# python-docx major version whose internals _package_items() relies on.
+SUPPORTED_MAJOR = "1"
+
+CHUNK_SIZE = 256 * 1024
+_WINDOW = 32 * 1024
+
+_LOCAL_HEADER = struct.Struct("<4s5H3L2H")
+_CENTRAL_HEADER = struct.Struct("<4s6H3L5H2L")
+_END_RECORD = struct.Struct("<4s4H2LH")
+_ZIP32_LIMIT = 0xFFFFFFFF
+
+
+def _deflate(data: memoryview, zdict: bytes, level: int, last: bool) -> tuple[bytes, float]:
+    # Runs on the pool; returns the block and the seconds it took.
+    t0 = time.perf_counter()
+    if zdict:
+        c = zlib.compressobj(level, zlib.DEFLATED, -15, zdict=zdict)
+    else:
+        c = zlib.compressobj(level, zlib.DEFLATED, -15)
+    out = c.compress(data) + c.flush(zlib.Z_FINISH if last else zlib.Z_SYNC_FLUSH)
+    return out, time.perf_counter() - t0
+
+
+def _dos_time(date_time: tuple[int, ...]) -> tuple[int, int]:
+    year, month, day, hour, minute, second = date_time[:6]
+    return hour << 11 | minute << 5 | second // 2, (year - 1980) << 9 | month << 5 | day
+
+
+class _ZipWriter:
+    # Minimal single-pass zip writer for entries whose compressed data is
+    # already known (no data descriptors, no zip64: reports stay far below 4 GiB).
+
+    def __init__(self, path: Path | BinaryIO, method: int, date_time: tuple[int, ...] | None = None) -> None:
+        # date_time pins the entry timestamps (reproducible builds); default: now.
+        # path may be a writable binary file instead, which is left open.
+        self._owned = not hasattr(path, "write")
+        self._f = open(path, "wb", buffering=1 << 20) if self._owned else path
+        self._method = method
+        self._dos_time, self._dos_date = _dos_time(date_time or time.localtime())
+        self._central: list[bytes] = []
+        self._offset = 0
+
+    def write(self, name: str, data: bytes, blocks: list[bytes]) -> None:
+        crc = zlib.crc32(data)
+        size = sum(map(len, blocks))
+        if max(len(data), size, self._offset) > _ZIP32_LIMIT:
+            raise ValueError(f"{name}: package too large for a zip32 archive")
+        fname = name.encode("utf-8")
+        fields = (20, 0, self._method, self._dos_time, self._dos_date, crc, size, len(data), len(fname))
+        self._f.write(_LOCAL_HEADER.pack(b"PK\x03\x04", *fields, 0))
+        self._f.write(fname)
+        self._f.writelines(blocks)
+        self._central.append(_CENTRAL_HEADER.pack(b"PK\x01\x02", 20, *fields, 0, 0, 0, 0, 0, self._offset) + fname)
+        self._offset += _LOCAL_HEADER.size + len(fname) + size
+
+    def close(self) -> None:
+        directory = b"".join(self._central)
+        self._f.write(directory)
+        n = len(self._central)
+        self._f.write(_END_RECORD.pack(b"PK\x05\x06", 0, 0, n, n, len(directory), self._offset, 0))
+        if self._owned:
+            self._f.close()
+
+    def abort(self) -> None:
+        if self._owned:
+            self._f.close()
+
+
+def supported() -> bool:
+    try:
+        import docx
+        from docx.opc.part import Part
+        from docx.opc.pkgwriter import _ContentTypesItem
+    except ImportError:
+        return False
+    major = getattr(docx, "__version__", "0").split(".")[0]
+    return major == SUPPORTED_MAJOR and hasattr(Part, "before_marshal") and hasattr(_ContentTypesItem, "from_parts")
+
+
+def _package_items(document: Document):
+    # (member name, serialized bytes) in the order python-docx's PackageWriter uses.
+    from docx.opc.packuri import CONTENT_TYPES_URI, PACKAGE_URI
+    from docx.opc.pkgwriter import _ContentTypesItem
+
+    package = document.part.package
+    parts = list(package.parts)
+    for part in parts:
+        part.before_marshal()
+    yield CONTENT_TYPES_URI.membername, _ContentTypesItem.from_parts(parts).blob
+    yield PACKAGE_URI.rels_uri.membername, package.rels.xml
+    for part in parts:
+        yield part.partname.membername, part.blob
+        if len(part.rels):
+            yield part.partname.rels_uri.membername, part.rels.xml
+
+
+def save_pipelined(
+    document: Document,
+    path: Path | BinaryIO,
+    compression: str = "deflate",
+    threads: int | None = None,
+    date_time: tuple[int, ...] | None = None,
+) -> dict:
+    # Writes `document` to `path` like document.save(path), with the zip method
+    # and level of --compression and, given date_time, pinned entry timestamps.
+    # Returns serialize/compress/write seconds
+    # (compress is summed over the pool threads) and the wall time.
+    from concurrent.futures import ThreadPoolExecutor
+
+    method, level = COMPRESSION[compression]
+    level = zlib.Z_DEFAULT_COMPRESSION if level is None else level
+    threads = threads or os.cpu_count() or 1
+    stats = {"serialize_seconds": 0.0, "compress_seconds": 0.0, "write_seconds": 0.0, "threads": threads}
+    t_start = time.perf_counter()
+    pending: list[tuple[str, bytes, list[Future]]] = []
+
+    def drain(wait: bool) -> None:
+        # Writes the finished entries at the head of the queue, in order.
+        while pending and (wait or all(f.done() for f in pending[0][2])):
+            name, data, futures = pending.pop(0)
+            blocks = []
+            for f in futures:
+                block, seconds = f.result()
+                blocks.append(block)
+                stats["compress_seconds"] += seconds
+            t0 = time.perf_counter()
+            zf.write(name, data, blocks if futures else [data])
+            stats["write_seconds"] += time.perf_counter() - t0
+
+    zf = _ZipWriter(path, method, date_time)
+    try:
+        with ThreadPoolExecutor(threads) as pool:
+            items = _package_items(document)
+            while True:
+                t0 = time.perf_counter()
+                item = next(items, None)
+                stats["serialize_seconds"] += time.perf_counter() - t0
+                if item is None:
+                    break
+                name, data = item
+                futures = []
+                if method != zipfile.ZIP_STORED:
+                    view = memoryview(data)
+                    starts = range(0, max(len(data), 1), CHUNK_SIZE)
+                    for start in starts:
+                        zdict = bytes(view[max(0, start - _WINDOW) : start])
+                        last = start + CHUNK_SIZE >= len(data)
+                        futures.append(pool.submit(_deflate, view[start : start + CHUNK_SIZE], zdict, level, last))
+                pending.append((name, data, futures))
+                drain(wait=False)
+            drain(wait=True)
+    except BaseException:
+        zf.abort()
+        raise
+    zf.close()
+    stats["wall_seconds"] = time.perf_counter() - t_start
+    return stats
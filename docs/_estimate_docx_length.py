@@ -1,12 +1,360 @@
+from __future__ import annotations
+
+import argparse
+import glob
+import io
+import json
+import os
+import re
+import sys
+import zipfile
 from pathlib import Path
+from typing import Iterable
+from xml.parsers import expat
+
+
+W_NS = "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
+WP_NS = "http://schemas.openxmlformats.org/drawingml/2006/wordprocessingDrawing"
+WORDS_PER_PAGE = 350
+
+# Parts whose text counts towards the estimate: the body (including tables),
+# then every header and footer part.
+_PART_RE = re.compile(r"word/(document|header\d*|footer\d*)\.xml")
+_READ_CHUNK = 1 << 16
+SUFFIXES = (".docx", ".md")
+
+
+class _TextCounter:
+    # expat handlers that count paragraphs, words and characters without
+    # building a tree or holding more than the current chunk of text.
+
+    def __init__(self) -> None:
+        self.paragraphs = 0
+        self.words = 0
+        self.chars = 0
+        self._in_text = False
+        self._in_word = False
+
+    def start(self, name: str, attrs: dict) -> None:
+        ns, _, tag = name.rpartition(" ")
+        if ns != W_NS:
+            return
+        if tag == "t":
+            self._in_text = True
+        elif tag in ("tab", "br", "cr"):
+            self._in_word = False
+            self.chars += 1
+
+    def end(self, name: str) -> None:
+        ns, _, tag = name.rpartition(" ")
+        if ns != W_NS:
+            return
+        if tag == "t":
+            self._in_text = False
+        elif tag == "p":
+            self.paragraphs += 1
+            self._in_word = False
+
+    def text(self, data: str) -> None:
+        if not self._in_text or not data:
+            return
+        self.chars += len(data)
+        n = len(data.split())
+        if n and self._in_word and not data[0].isspace():
+            n -= 1  # continues a word split across runs or expat chunks
+        self.words += n
+        self._in_word = not data[-1].isspace()
+
+
+class _ParagraphCollector:
+    # expat handlers that turn body paragraphs into _layout_sim.ParaSpec tuples
+    # (style, text, direct run font/size, page break, picture height).
+
+    def __init__(self, style_names: dict[str, str]) -> None:
+        self.records: list[tuple] = []
+        self._style_names = style_names
+        self._break_next = False
+        self._in_text = False
+        self._in_run_props = False
+        self._reset()
+
+    def _reset(self) -> None:
+        self._style = "Normal"
+        self._text: list[str] = []
+        self._font = None
+        self._size = None
+        self._page_break = self._break_next
+        self._break_next = False
+        self._image_emu = 0
+
+    def start(self, name: str, attrs: dict) -> None:
+        ns, _, tag = name.rpartition(" ")
+        if ns == WP_NS and tag == "extent":
+            self._image_emu += int(attrs.get("cy", 0))
+        if ns != W_NS:
+            return
+        if tag == "t":
+            self._in_text = True
+        elif tag == "pStyle":
+            self._style = self._style_names.get(attrs.get(f"{W_NS} val"), "Normal")
+        elif tag == "rPr":
+            self._in_run_props = True
+        elif self._in_run_props and tag == "rFonts" and self._font is None:
+            self._font = attrs.get(f"{W_NS} ascii")
+        elif self._in_run_props and tag == "sz" and self._size is None:
+            self._size = int(attrs.get(f"{W_NS} val", 24)) / 2
+        elif tag == "br" and attrs.get(f"{W_NS} type") == "page":
+            if self._text:
+                self._break_next = True
+            else:
+                self._page_break = True
+        elif tag in ("br", "cr"):
+            self._text.append("\n")
+        elif tag == "tab":
+            self._text.append("\t")
+
+    def end(self, name: str) -> None:
+        ns, _, tag = name.rpartition(" ")
+        if ns != W_NS:
+            return
+        if tag == "t":
+            self._in_text = False
+        elif tag == "rPr":
+            self._in_run_props = False
+        elif tag == "p":
+            self.records.append(
+                (
+                    self._style,
+                    "".join(self._text),
+                    self._font,
+                    self._size,
+                    self._page_break,
+                    self._image_emu / 12700,
+                )
+            )
+            self._reset()
+
+    def text(self, data: str) -> None:
+        if self._in_text:
+            self._text.append(data)
+
+
+def _parser(handlers):
+    parser = expat.ParserCreate(namespace_separator=" ")
+    parser.buffer_text = True
+    parser.StartElementHandler = handlers.start
+    parser.EndElementHandler = handlers.end
+    parser.CharacterDataHandler = handlers.text
+    return parser
+
+
+def _count_part(stream, counter: _TextCounter) -> None:
+    parser = _parser(counter)
+    while chunk := stream.read(_READ_CHUNK):
+        parser.Parse(chunk, False)
+    parser.Parse(b"", True)
+
+
+def iter_paragraphs(path: Path):
+    # Yields (style, text, font, size_pt, page_break, image_pt) for each body paragraph
+    # while the part is still being parsed.
+    from _ooxml_stream import STYLE_IDS
+
+    collector = _ParagraphCollector({sid: name for name, sid in STYLE_IDS.items()})
+    parser = _parser(collector)
+    with zipfile.ZipFile(path) as zf, zf.open("word/document.xml") as stream:
+        while chunk := stream.read(_READ_CHUNK):
+            parser.Parse(chunk, False)
+            yield from collector.records
+            collector.records.clear()
+        parser.Parse(b"", True)
+        yield from collector.records
+
+
+def _estimate_docx(path: Path) -> dict:
+    counter = _TextCounter()
+    with zipfile.ZipFile(path) as zf:
+        parts = sorted(
+            (n for n in zf.namelist() if _PART_RE.fullmatch(n)),
+            key=lambda n: (n != "word/document.xml", n),
+        )
+        for name in parts:
+            with zf.open(name) as stream:
+                _count_part(stream, counter)
+    return {
+        "parts": parts,
+        "paragraphs": counter.paragraphs,
+        "words": counter.words,
+        "chars": counter.chars,
+    }
+
+
+def simulate_docx(path: Path):
+    # Font-metric page estimate of the document body (see _layout_sim.py).
+    from _layout_sim import ParaSpec, simulate
+
+    return simulate(ParaSpec(*r) for r in iter_paragraphs(path))
+
+
+def print_layout(layout) -> None:
+    print("Simulated pages:", layout.pages)
+    for h in layout.headings:
+        indent = "  " * (h.level - 1)
+        print(f"  {indent}{h.title:<{60 - 2 * h.level}}  p.{h.page:<5} {h.pages:>6.1f} pp")
+
+
+def _count_markdown(lines: Iterable[str]) -> dict:
+    # A paragraph is a run of non-blank lines, as Markdown renders it.
+    paragraphs = words = chars = 0
+    in_para = False
+    for line in lines:
+        text = line.strip()
+        if not text:
+            in_para = False
+            continue
+        if not in_para:
+            paragraphs += 1
+            in_para = True
+        words += len(text.split())
+        chars += len(text)
+    return {"parts": [], "paragraphs": paragraphs, "words": words, "chars": chars}
+
+
+def _estimate_markdown(path: Path) -> dict:
+    with open(path, encoding="utf-8", errors="replace") as f:
+        return _count_markdown(f)
+
+
+def estimate(path: Path) -> dict:
+    path = Path(path)
+    r = _estimate_markdown(path) if path.suffix.lower() == ".md" else _estimate_docx(path)
+    r["pages"] = round(r["words"] / WORDS_PER_PAGE, 1)
+    return {"file": str(path), **r}
+
+
+def estimate_bytes(data: bytes, name: str) -> dict:
+    # estimate() of a file's content held in memory (see _estimate_service.py);
+    # the suffix of name picks the format.
+    if name.lower().endswith(".md"):
+        r = _count_markdown(data.decode("utf-8", errors="replace").splitlines())
+    else:
+        r = _estimate_docx(io.BytesIO(data))
+    r["pages"] = round(r["words"] / WORDS_PER_PAGE, 1)
+    return {"file": name, **r}
+
+
+def _estimate_safe(path: Path) -> dict:
+    # Used in the worker pool: one unreadable file should not abort the batch.
+    # Broken packages fail in many ways (BadZipFile, zlib.error from a corrupt
+    # deflate stream, EOFError, RuntimeError for encrypted entries, KeyError,
+    # ExpatError, ...), so any exception becomes an error row.
+    try:
+        return estimate(path)
+    except Exception as e:
+        return {"file": str(path), "error": f"{type(e).__name__}: {e}"}
+
+
+def collect_files(targets: list[str]) -> list[Path]:
+    # Directories are searched recursively for .docx/.md; anything else is
+    # treated as a glob pattern (so plain file paths work too).
+    found: dict[Path, None] = {}
+    for target in targets:
+        if os.path.isdir(target):
+            matches = (
+                str(p) for p in sorted(Path(target).rglob("*")) if p.suffix.lower() in SUFFIXES
+            )
+        else:
+            matches = sorted(glob.glob(target, recursive=True))
+        for m in matches:
+            p = Path(m)
+            # Skip Word lock files (~$name.docx) left next to open documents.
+            if p.is_file() and p.suffix.lower() in SUFFIXES and not p.name.startswith("~$"):
+                found.setdefault(p, None)
+    return list(found)
+
+
+def estimate_many(paths: list[Path], jobs: int | None = None) -> list[dict]:
+    if len(paths) <= 1 or jobs == 1:
+        return [_estimate_safe(p) for p in paths]
+    workers = min(jobs or os.cpu_count() or 1, len(paths))
+    from concurrent.futures import ProcessPoolExecutor
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(_estimate_safe, paths, chunksize=max(1, len(paths) // (workers * 4))))
+
+
+def summarize(results: list[dict]) -> dict:
+    ok = [r for r in results if "error" not in r]
+    return {
+        "files": len(results),
+        "errors": len(results) - len(ok),
+        "paragraphs": sum(r["paragraphs"] for r in ok),
+        "words": sum(r["words"] for r in ok),
+        "chars": sum(r["chars"] for r in ok),
+        "pages": round(sum(r["words"] for r in ok) / WORDS_PER_PAGE, 1),
+        "results": results,
+    }
+
+
+def _print_table(results: list[dict]) -> None:
+    width = max([len("File")] + [len(r["file"]) for r in results])
+    print(f"{'File':<{width}}  {'Paragraphs':>10}  {'Words':>9}  {'Pages':>7}")
+    for r in results:
+        if "error" in r:
+            print(f"{r['file']:<{width}}  error: {r['error']}")
+        else:
+            print(f"{r['file']:<{width}}  {r['paragraphs']:>10}  {r['words']:>9}  {r['pages']:>7}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Estimate paragraphs, words and pages of .docx/.md files."
+    )
+    parser.add_argument(
+        "targets",
+        nargs="*",
+        help="files, directories or glob patterns (default: the generated project report)",
+    )
+    parser.add_argument("-j", "--jobs", type=int, help="worker processes (default: CPU count)")
+    parser.add_argument("--json", metavar="PATH", help="write the JSON summary here instead of stdout")
+    parser.add_argument(
+        "--layout",
+        action="store_true",
+        help="also run the font-metric layout simulator (single .docx) and show pages per heading",
+    )
+    args = parser.parse_args()
+
+    if not args.targets:
+        p = Path(__file__).resolve().parent / "DocentDesk_Project_Report.docx"
+        r = estimate(p)
+        print("File:", r["file"])
+        print("Parts:", ", ".join(r["parts"]))
+        print("Paragraphs:", r["paragraphs"])
+        print("Approx words:", r["words"])
+        print("Characters:", r["chars"])
+        print(f"Approx pages ({WORDS_PER_PAGE} wpp):", r["pages"])
+        if args.layout:
+            print_layout(simulate_docx(p))
+        return
+
+    paths = collect_files(args.targets)
+    if not paths:
+        sys.exit(f"No .docx or .md files matched: {' '.join(args.targets)}")
+    results = estimate_many(paths, args.jobs)
+    _print_table(results)
+    if args.layout:
+        for p in paths:
+            if p.suffix.lower() == ".docx":
+                print(f"\n{p}")
+                print_layout(simulate_docx(p))
+
+    summary = json.dumps(summarize(results), indent=2)
+    if args.json:
+        Path(args.json).write_text(summary + "\n", encoding="utf-8")
+    else:
+        print()
+        print(summary)
 
-from docx import Document
 
-p = Path(__file__).resolve().parent / "DocentDesk_Project_Report.docx"
-d = Document(p)
-text = "\n".join([para.text for para in d.paragraphs if para.text])
-words = len(text.split())
-print("File:", p)
-print("Paragraphs:", len(d.paragraphs))
-print("Approx words:", words)
-print("Approx pages (350 wpp):", round(words / 350, 1))
+if __name__ == "__main__":
+    main()
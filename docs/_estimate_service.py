@@ -0,0 +1,360 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+import base64
+import hashlib
+import json
+import os
+import signal
+import sys
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from urllib.parse import parse_qs, urlsplit
+
+from _estimate_docx_length import SUFFIXES, estimate_bytes
+
+
+# Long-running estimation service for the upload pipeline: one interpreter
+# answers many estimate() requests instead of one process per file.
+#
+#   python docs/_estimate_service.py [-j N] [--cache 1024]             JSON lines on stdin/stdout
+#   python docs/_estimate_service.py --http 127.0.0.1:8765 [-j N]      HTTP
+#
+# A request names a file ({"path": ...}) or carries it ({"data": base64,
+# "name": "x.docx"}); an optional "id" is echoed back. JSON-lines responses are
+# written as they complete, so they may come back out of order:
+#
+#   {"id": 7, "ok": true, "cached": false, "ms": 12.3, "result": {...estimate()...}}
+#   {"id": 8, "ok": false, "error": "BadZipFile: File is not a zip file"}
+#
+# {"op": "stats"} returns the counters. Over HTTP: POST /estimate with that JSON
+# body, or with the raw file as the body and ?name=x.docx; GET /stats.
+#
+# Parsing runs in a pool of `jobs` worker processes; at most `jobs * 4`
+# requests are parsed or queued at once, and a full queue stops reading input
+# (backpressure). Results are cached by the SHA-256 of the file content, least
+# recently used first out, so re-uploads and identical files are answered
+# without parsing; concurrent requests for the same content share one parse.
+
+MAX_BODY = 64 * 1024 * 1024
+_LATENCY_WINDOW = 4096
+# Uploads up to this size are hashed on the event loop; a thread hop costs more.
+_HASH_INLINE = 1 << 20
+_HTTP_STATUS = {200: "OK", 400: "Bad Request", 404: "Not Found", 413: "Payload Too Large", 422: "Unprocessable Entity"}
+
+
+class RequestError(Exception):
+    pass
+
+
+class _LRU:
+    def __init__(self, maxsize: int) -> None:
+        self.maxsize = maxsize
+        self._items: OrderedDict[str, dict] = OrderedDict()
+
+    def get(self, key: str) -> dict | None:
+        value = self._items.get(key)
+        if value is not None:
+            self._items.move_to_end(key)
+        return value
+
+    def put(self, key: str, value: dict) -> None:
+        if self.maxsize <= 0:
+            return
+        self._items[key] = value
+        self._items.move_to_end(key)
+        while len(self._items) > self.maxsize:
+            self._items.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+
+class EstimateService:
+    def __init__(self, jobs: int | None = None, cache_size: int = 1024) -> None:
+        self.jobs = jobs or os.cpu_count() or 1
+        self._pool = ProcessPoolExecutor(self.jobs)
+        self._slots = asyncio.Semaphore(self.jobs * 4)
+        self._cache = _LRU(cache_size)
+        self._inflight: dict[str, asyncio.Future] = {}
+        self._started = time.perf_counter()
+        self._latencies: deque[float] = deque(maxlen=_LATENCY_WINDOW)
+        self.counters = {"requests": 0, "ok": 0, "errors": 0, "cache_hits": 0, "parsed": 0, "pool_seconds": 0.0}
+
+    async def estimate(self, request: dict) -> dict:
+        # One request dict in, one response dict out; never raises.
+        t0 = time.perf_counter()
+        self.counters["requests"] += 1
+        response: dict = {"id": request["id"]} if "id" in request else {}
+        try:
+            name, data = await self._load(request)
+            # hashlib releases the GIL, so large uploads hash off the event loop.
+            key = await asyncio.to_thread(_digest, data) if len(data) > _HASH_INLINE else _digest(data)
+            result = self._cache.get(key)
+            cached = result is not None
+            if not cached:
+                # A request that joins a parse already running counts as cached too.
+                result, cached = await self._parse(key, data, name)
+        except RequestError as e:
+            self.counters["errors"] += 1
+            return {**response, "ok": False, "error": str(e)}
+        except Exception as e:  # e.g. a broken pool: still one answer per request
+            self.counters["errors"] += 1
+            return {**response, "ok": False, "error": f"{type(e).__name__}: {e}"}
+        if cached:
+            self.counters["cache_hits"] += 1
+        elapsed = time.perf_counter() - t0
+        self._latencies.append(elapsed)
+        self.counters["ok"] += 1
+        # The cached result carries the name it was first parsed under.
+        result = {**result, "file": name}
+        return {**response, "ok": True, "cached": cached, "ms": round(elapsed * 1000, 2), "result": result}
+
+    async def _load(self, request: dict) -> tuple[str, bytes]:
+        if "data" in request:
+            name = str(request.get("name", "upload.docx"))
+            if not isinstance(request["data"], str):
+                raise RequestError('"data" must be a base64 string')
+            try:
+                data = base64.b64decode(request["data"], validate=True)
+            except ValueError as e:
+                raise RequestError(f"data is not base64: {e}") from None
+        elif "path" in request:
+            name = str(request["path"])
+            data = None
+        else:
+            raise RequestError('request needs "path" or "data"')
+        if not name.lower().endswith(SUFFIXES):
+            raise RequestError(f"{name}: not a .docx or .md file")
+        if data is None:
+            try:
+                data = await asyncio.to_thread(Path(name).read_bytes)
+            except OSError as e:
+                raise RequestError(f"{type(e).__name__}: {e}") from None
+        return name, data
+
+    async def _parse(self, key: str, data: bytes, name: str) -> tuple[dict, bool]:
+        # (result, joined a parse that was already running)
+        shared = self._inflight.get(key)
+        if shared is not None:
+            return await asyncio.shield(shared), True
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            async with self._slots:
+                t0 = time.perf_counter()
+                run = asyncio.get_running_loop().run_in_executor(self._pool, _estimate_safe, data, name)
+                result = await run
+                self.counters["pool_seconds"] += time.perf_counter() - t0
+            self.counters["parsed"] += 1
+            if "error" in result:
+                raise RequestError(result["error"])
+            self._cache.put(key, result)
+            future.set_result(result)
+            return result, False
+        except Exception as e:
+            future.set_exception(e)
+            future.exception()  # retrieved: only waiters that share it re-raise
+            raise
+        except BaseException:
+            future.cancel()
+            raise
+        finally:
+            del self._inflight[key]
+
+    def reject(self, error: str) -> dict:
+        # Response to a request that could not even be read.
+        self.counters["requests"] += 1
+        self.counters["errors"] += 1
+        return {"ok": False, "error": error}
+
+    def stats(self) -> dict:
+        uptime = time.perf_counter() - self._started
+        latencies = sorted(self._latencies)
+
+        def quantile(q: float) -> float | None:
+            return round(latencies[min(len(latencies) - 1, int(q * len(latencies)))] * 1000, 2) if latencies else None
+
+        return {
+            **self.counters,
+            "pool_seconds": round(self.counters["pool_seconds"], 3),
+            "inflight": len(self._inflight),
+            "cached": len(self._cache),
+            "jobs": self.jobs,
+            "uptime_seconds": round(uptime, 3),
+            "per_second": round(self.counters["ok"] / uptime, 1) if uptime else 0.0,
+            "latency_ms": {"p50": quantile(0.5), "p95": quantile(0.95), "p99": quantile(0.99), "max": quantile(1.0)},
+        }
+
+    def close(self) -> None:
+        self._pool.shutdown(cancel_futures=True)
+
+
+def _digest(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def _estimate_safe(data: bytes, name: str) -> dict:
+    # Runs in the pool; errors come back as values so one bad upload only fails
+    # its own request. A broken upload fails in many ways (BadZipFile, zlib.error
+    # from a corrupt deflate stream, KeyError, ExpatError, ...), so any exception does.
+    try:
+        return estimate_bytes(data, name)
+    except Exception as e:
+        return {"file": name, "error": f"{type(e).__name__}: {e}"}
+
+
+async def _handle(service: EstimateService, request) -> dict:
+    if not isinstance(request, dict):
+        return service.reject("request must be a JSON object")
+    if request.get("op") == "stats":
+        return {**({"id": request["id"]} if "id" in request else {}), "ok": True, "stats": service.stats()}
+    return await service.estimate(request)
+
+
+async def serve_lines(service: EstimateService, reader: asyncio.StreamReader, write) -> None:
+    # JSON lines until EOF; write(str) is called with each response line.
+    tasks: set[asyncio.Task] = set()
+
+    async def answer(line: bytes) -> None:
+        try:
+            request = json.loads(line)
+        except ValueError as e:
+            response = service.reject(f"invalid JSON: {e}")
+        else:
+            response = await _handle(service, request)
+        write(json.dumps(response, ensure_ascii=False) + "\n")
+
+    while line := await reader.readline():
+        if not line.strip():
+            continue
+        # Backpressure: stop reading while the pool and its queue are full.
+        while len(tasks) >= service.jobs * 4:
+            await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+        task = asyncio.create_task(answer(line))
+        tasks.add(task)
+        task.add_done_callback(tasks.discard)
+    if tasks:
+        await asyncio.wait(tasks)
+
+
+async def _stdio(service: EstimateService) -> None:
+    # stdin is read on a thread: connect_read_pipe() rejects regular files
+    # (`docs serve < requests.jsonl`).
+    loop = asyncio.get_running_loop()
+    reader = asyncio.StreamReader(limit=MAX_BODY * 2)
+
+    def pump() -> None:
+        for line in sys.stdin.buffer:
+            loop.call_soon_threadsafe(reader.feed_data, line)
+        loop.call_soon_threadsafe(reader.feed_eof)
+
+    threading.Thread(target=pump, daemon=True).start()
+
+    def write(line: str) -> None:
+        sys.stdout.write(line)
+        sys.stdout.flush()
+
+    await serve_lines(service, reader, write)
+
+
+async def _http_request(service: EstimateService, method: str, target: str, headers: dict, body: bytes):
+    url = urlsplit(target)
+    if url.path == "/stats" and method == "GET":
+        return 200, service.stats()
+    if url.path != "/estimate" or method != "POST":
+        return 404, {"ok": False, "error": f"no route for {method} {url.path}"}
+    if headers.get("content-type", "").startswith("application/json"):
+        try:
+            request = json.loads(body)
+        except ValueError as e:
+            return 400, service.reject(f"invalid JSON: {e}")
+    else:
+        name = parse_qs(url.query).get("name", ["upload.docx"])[0]
+        request = {"name": name, "data": base64.b64encode(body).decode("ascii")}
+    response = await _handle(service, request)
+    return (200 if response["ok"] else 422), response
+
+
+async def _http_connection(service: EstimateService, reader, writer) -> None:
+    # Minimal HTTP/1.1 with keep-alive: Content-Length bodies only.
+    try:
+        while request_line := await reader.readline():
+            try:
+                method, target, version = request_line.decode("latin-1").split()
+            except ValueError:
+                break
+            headers = {}
+            while (line := await reader.readline()) not in (b"\r\n", b"\n", b""):
+                key, _, value = line.decode("latin-1").partition(":")
+                headers[key.strip().lower()] = value.strip()
+            length = int(headers.get("content-length", 0) or 0)
+            if length > MAX_BODY:
+                status, payload = 413, {"ok": False, "error": f"body over {MAX_BODY} bytes"}
+                keep_alive = False
+            else:
+                body = await reader.readexactly(length)
+                status, payload = await _http_request(service, method, target, headers, body)
+                keep_alive = version == "HTTP/1.1" and headers.get("connection", "").lower() != "close"
+            data = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+            writer.write(
+                f"HTTP/1.1 {status} {_HTTP_STATUS[status]}\r\nContent-Type: application/json\r\n"
+                f"Content-Length: {len(data)}\r\nConnection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode()
+                + data
+            )
+            await writer.drain()
+            if not keep_alive:
+                break
+    except (ConnectionError, asyncio.IncompleteReadError):
+        pass
+    finally:
+        writer.close()
+
+
+async def _http(service: EstimateService, host: str, port: int) -> None:
+    server = await asyncio.start_server(lambda r, w: _http_connection(service, r, w), host, port, limit=1 << 16)
+    print(f"Serving on http://{host}:{port} ({service.jobs} workers; Ctrl-C to stop)", file=sys.stderr, flush=True)
+    async with server:
+        await server.serve_forever()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Long-running .docx/.md estimation service with a result cache.")
+    parser.add_argument("--http", metavar="HOST:PORT", help="serve HTTP instead of JSON lines on stdin/stdout")
+    parser.add_argument("-j", "--jobs", type=int, help="parser worker processes (default: CPU count)")
+    parser.add_argument("--cache", type=int, default=1024, help="results kept, by content hash (default: 1024)")
+    args = parser.parse_args()
+    if args.jobs is not None and args.jobs < 1:
+        parser.error("--jobs must be at least 1")
+    address = None
+    if args.http:
+        host, _, port = args.http.rpartition(":")
+        if not port.isdigit():
+            parser.error("--http takes HOST:PORT, e.g. 127.0.0.1:8765")
+        address = (host or "127.0.0.1", int(port))
+
+    async def run() -> None:
+        service = EstimateService(args.jobs, args.cache)
+        # SIGTERM (service managers, containers) stops like Ctrl-C: counters are
+        # printed and the pool shut down.
+        asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, asyncio.current_task().cancel)
+        try:
+            await (_http(service, *address) if address else _stdio(service))
+        except asyncio.CancelledError:
+            pass
+        finally:
+            print(json.dumps(service.stats()), file=sys.stderr)
+            service.close()
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+from pathlib import Path
+
+
+# Image stage for report figures ({"figure": {...}} blocks in report_sections.json).
+#
+# Every source image is resized to the pixel width of the page's text column at
+# IMAGE_DPI (never enlarged) and recompressed: photos as JPEG, everything with
+# transparency, a palette or few colours (screenshots, diagrams) as optimized
+# PNG. Results live in CACHE_DIR named by a hash of the source bytes and the
+# processing parameters, so an unchanged image is only hashed, never decoded
+# again, and identical images share one output file (and one media part in the
+# .docx). Missing outputs are produced in a process pool.
+#
+# Pillow is only imported to process cache misses.
+
+CACHE_DIR = Path(__file__).resolve().parent / ".report_cache" / "images"
+
+IMAGE_DPI = 150
+JPEG_QUALITY = 85
+# Below this many cache misses, a process pool costs more than it saves.
+PARALLEL_MIN_IMAGES = 4
+# Bump when the processing below changes, so cached outputs are redone.
+PIPELINE_VERSION = 2
+
+
+# (path, mtime_ns, size) -> sha256, for the several spec loads of one build.
+_DIGESTS: dict[tuple[Path, int, int], str] = {}
+
+
+def _digest(path: Path) -> str:
+    st = path.stat()
+    key = (path, st.st_mtime_ns, st.st_size)
+    if key not in _DIGESTS:
+        h = hashlib.sha256()
+        with open(path, "rb") as f:
+            while chunk := f.read(1 << 20):
+                h.update(chunk)
+        _DIGESTS[key] = h.hexdigest()
+    return _DIGESTS[key]
+
+
+def _cache_key(source_digest: str, width_px: int) -> str:
+    params = f"{source_digest}:{width_px}:{IMAGE_DPI}:{JPEG_QUALITY}:{PIPELINE_VERSION}"
+    return hashlib.sha256(params.encode()).hexdigest()[:24]
+
+
+def _is_photo(img) -> bool:
+    # Screenshots and diagrams use few distinct colours and compress better, and
+    # without artefacts, as PNG.
+    if img.mode in ("RGBA", "LA"):
+        return False
+    colors = img.convert("RGB").getcolors(maxcolors=4096)
+    return colors is None
+
+
+def _process(source: str, cache_dir: str, key: str, width_px: int) -> dict:
+    # Runs in the worker pool. Returns the entry stored next to the output.
+    from PIL import Image, ImageOps
+
+    with Image.open(source) as img:
+        # JPEGs can be decoded at a power-of-two reduction that is still wide enough.
+        img.draft("RGB", (width_px, max(1, img.height * width_px // img.width)))
+        img = ImageOps.exif_transpose(img)
+        if img.mode not in ("RGB", "RGBA", "L", "LA"):
+            # Palette and 1-bit images would be resized nearest-neighbour.
+            img = img.convert("RGBA" if img.has_transparency_data else "RGB")
+        # Decided on the source: resampling adds anti-aliased colours that would
+        # push screenshots and diagrams over the photo threshold.
+        photo = _is_photo(img)
+        if img.width > width_px:
+            height = max(1, round(img.height * width_px / img.width))
+            img = img.resize((width_px, height), Image.Resampling.LANCZOS, reducing_gap=3.0)
+        if photo:
+            ext = ".jpeg"
+            img = img.convert("RGB")
+            save = {"format": "JPEG", "quality": JPEG_QUALITY, "optimize": True}
+        else:
+            ext = ".png"
+            save = {"format": "PNG", "optimize": True}
+        out = Path(cache_dir) / f"{key}{ext}"
+        tmp = out.with_name(f"{out.name}.{os.getpid()}.tmp")
+        img.save(tmp, **save)
+        os.replace(tmp, out)
+        entry = {"file": out.name, "width_px": img.width, "height_px": img.height}
+    meta = out.with_suffix(".json")
+    meta_tmp = meta.with_name(f"{meta.name}.{os.getpid()}.tmp")
+    meta_tmp.write_text(json.dumps(entry), encoding="utf-8")
+    os.replace(meta_tmp, meta)
+    return entry
+
+
+def _cached(cache_dir: Path, key: str) -> dict | None:
+    try:
+        entry = json.loads((cache_dir / f"{key}.json").read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+    return entry if (cache_dir / entry["file"]).exists() else None
+
+
+def prepare(
+    sources: list[Path], width_px: int, cache_dir: Path = CACHE_DIR, jobs: int | None = None
+) -> tuple[dict[Path, dict], dict]:
+    # Returns ({source: {"file": output path, "width_px", "height_px"}}, stats).
+    # Sources with the same content map to the same output.
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    keys: dict[Path, str] = {}
+    for src in dict.fromkeys(sources):
+        if not src.is_file():
+            raise ValueError(f"figure image not found: {src}")
+        keys[src] = _cache_key(_digest(src), width_px)
+
+    entries: dict[str, dict] = {}
+    todo: dict[str, Path] = {}
+    for src, key in keys.items():
+        if key in entries or key in todo:
+            continue
+        cached = _cached(cache_dir, key)
+        if cached is not None:
+            entries[key] = cached
+        else:
+            todo[key] = src
+
+    args = [(str(src), str(cache_dir), key, width_px) for key, src in todo.items()]
+    if len(args) < PARALLEL_MIN_IMAGES or jobs == 1:
+        results = [_process(*a) for a in args]
+    else:
+        from concurrent.futures import ProcessPoolExecutor
+
+        workers = min(jobs or os.cpu_count() or 1, len(args))
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(_process, *zip(*args)))
+    entries.update(zip(todo, results))
+
+    prepared = {
+        src: {**entries[key], "file": str(cache_dir / entries[key]["file"])} for src, key in keys.items()
+    }
+    stats = {"images": len(keys), "unique": len(set(keys.values())), "processed": len(todo)}
+    return prepared, stats
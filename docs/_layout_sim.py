@@ -0,0 +1,312 @@
+from __future__ import annotations
+
+from functools import lru_cache
+from typing import Iterable, NamedTuple
+
+import numpy as np
+
+
+# Line-breaking layout simulator used for page estimates.
+#
+# Paragraphs are described by ParaSpec records (style name, text, optional run
+# font/size override, page break, height of inline pictures). simulate() measures every glyph with cached
+# per-font width tables, breaks every line of every paragraph at once with
+# NumPy, and paginates with the margins and paragraph spacing of the
+# build_report() template. It is an estimate: no kerning, hyphenation,
+# widow/orphan control or keep-with-next.
+
+# build_report(): US Letter, portrait, 1" margins.
+PAGE_WIDTH_PT = 612.0
+PAGE_HEIGHT_PT = 792.0
+MARGIN_PT = 72.0
+CONTENT_WIDTH_PT = PAGE_WIDTH_PT - 2 * MARGIN_PT
+CONTENT_HEIGHT_PT = PAGE_HEIGHT_PT - 2 * MARGIN_PT
+
+# Advance widths (1/1000 em) of ASCII 32..126 from the Adobe Times-Roman and
+# Times-Bold AFMs, which Times New Roman is metric-compatible with.
+_TIMES_ROMAN = (
+    250, 333, 408, 500, 500, 833, 778, 333, 333, 333, 500, 564, 250, 333, 250, 278,
+    500, 500, 500, 500, 500, 500, 500, 500, 500, 500, 278, 278, 564, 564, 564, 444,
+    921, 722, 667, 667, 722, 611, 556, 722, 722, 333, 389, 722, 611, 889, 722, 722,
+    556, 722, 667, 556, 611, 722, 722, 944, 722, 722, 611, 333, 278, 333, 469, 500,
+    333, 444, 500, 444, 500, 444, 333, 500, 500, 278, 278, 500, 278, 778, 500, 500,
+    500, 500, 333, 389, 278, 500, 500, 722, 500, 500, 444, 480, 200, 480, 541,
+)  # fmt: skip
+_TIMES_BOLD = (
+    250, 333, 555, 500, 500, 1000, 833, 333, 333, 333, 500, 570, 250, 333, 250, 278,
+    500, 500, 500, 500, 500, 500, 500, 500, 500, 500, 333, 333, 570, 570, 570, 500,
+    930, 722, 667, 722, 722, 667, 611, 778, 778, 389, 500, 778, 667, 944, 722, 778,
+    611, 778, 722, 556, 667, 722, 722, 1000, 722, 722, 667, 333, 278, 333, 581, 500,
+    333, 500, 556, 444, 556, 444, 333, 500, 556, 278, 333, 556, 278, 833, 556, 500,
+    556, 556, 444, 389, 333, 556, 500, 722, 500, 500, 444, 394, 220, 394, 520,
+)  # fmt: skip
+# Punctuation outside ASCII that the report text uses.
+_TIMES_EXTRA = {
+    "–": 500, "—": 1000, "‘": 333, "’": 333, "“": 444, "”": 444,
+    "•": 350, "…": 1000, "→": 1000,
+}  # fmt: skip
+
+# name -> (ASCII widths, bold ASCII widths, fixed advance for monospace, line height in em)
+# Line heights are ascent + descent + line gap as Word uses them for single spacing.
+FONTS = {
+    "Times New Roman": (_TIMES_ROMAN, _TIMES_BOLD, None, 1.15),
+    "Consolas": (None, None, 550, 1.171),
+}
+DEFAULT_FONT = "Times New Roman"
+
+
+class StyleMetrics(NamedTuple):
+    font: str
+    size_pt: float
+    bold: bool
+    indent_pt: float
+    space_before_pt: float
+    space_after_pt: float
+    line_spacing: float  # multiple of single spacing
+    contextual: bool  # suppress spacing between paragraphs of the same style
+    heading_level: int  # 0 for body text
+
+
+# The styles build_report() uses, as configured by _set_default_font() and the
+# python-docx default template (docDefaults: after=10pt, line=276 → 1.15).
+STYLES = {
+    "Normal": StyleMetrics("Times New Roman", 12, False, 0, 0, 10, 1.15, False, 0),
+    "Title": StyleMetrics("Times New Roman", 26, False, 0, 0, 15, 1.0, True, 0),
+    "Heading 1": StyleMetrics("Times New Roman", 14, True, 0, 24, 0, 1.15, False, 1),
+    "Heading 2": StyleMetrics("Times New Roman", 13, True, 0, 10, 0, 1.15, False, 2),
+    "Heading 3": StyleMetrics("Times New Roman", 12, True, 0, 10, 0, 1.15, False, 3),
+    "List Bullet": StyleMetrics("Times New Roman", 12, False, 18, 0, 10, 1.15, True, 0),
+    "Code": StyleMetrics("Consolas", 10, False, 0, 0, 10, 1.15, False, 0),  # --compact
+    "toc 1": StyleMetrics("Times New Roman", 12, False, 0, 0, 5, 1.15, False, 0),
+    "toc 2": StyleMetrics("Times New Roman", 12, False, 11, 0, 5, 1.15, False, 0),
+    "toc 3": StyleMetrics("Times New Roman", 12, False, 22, 0, 5, 1.15, False, 0),
+}
+
+
+class ParaSpec(NamedTuple):
+    style: str
+    text: str
+    font: str | None = None  # direct run formatting, e.g. _codeblock()'s Consolas
+    size_pt: float | None = None
+    page_break: bool = False  # paragraph starts on a new page
+    image_pt: float = 0.0  # height of inline pictures; the paragraph is at least this tall
+
+
+class HeadingSpan(NamedTuple):
+    level: int
+    title: str
+    page: int  # 1-based page the heading lands on
+    pages: float  # pages until the next heading of the same or a higher level
+
+
+class Layout(NamedTuple):
+    pages: int
+    para_lines: np.ndarray
+    para_page: np.ndarray  # 1-based start page of each paragraph
+    headings: list[HeadingSpan]
+
+
+@lru_cache(maxsize=None)
+def glyph_widths(font: str, bold: bool = False) -> np.ndarray:
+    # Advance width per BMP code point in 1/1000 em; unknown glyphs get 500.
+    ascii_w, bold_w, fixed, _ = FONTS.get(font, FONTS[DEFAULT_FONT])
+    if fixed is not None:
+        return np.full(0x10000, fixed, dtype=np.float32)
+    table = np.full(0x10000, 500, dtype=np.float32)
+    table[32:127] = bold_w if bold else ascii_w
+    for ch, w in _TIMES_EXTRA.items():
+        table[ord(ch)] = w
+    table[9] = table[32]  # tabs are measured as a space
+    return table
+
+
+def _codepoints(text: str) -> np.ndarray:
+    cp = np.frombuffer(text.encode("utf-32-le"), dtype=np.uint32)
+    return np.minimum(cp, 0xFFFF)
+
+
+def _break_lines(
+    ink: np.ndarray, total: np.ndarray, seg_first: np.ndarray, seg_end: np.ndarray, width: np.ndarray
+) -> np.ndarray:
+    # Greedy line breaking for all segments at once. Each iteration places one
+    # line in every unfinished segment: the next break is the last word whose
+    # ink end (excluding its trailing space) still fits in the line width.
+    cum = np.concatenate(([0.0], np.cumsum(total)))
+    ink_end = cum[:-1] + ink  # non-decreasing
+    lines = np.zeros(len(seg_first), dtype=np.int64)
+    cur = seg_first.copy()
+    active = np.flatnonzero(cur < seg_end)
+    while active.size:
+        start = cur[active]
+        nxt = np.searchsorted(ink_end, cum[start] + width[active], side="right")
+        nxt = np.minimum(np.maximum(nxt, start + 1), seg_end[active])  # at least one word per line
+        cur[active] = nxt
+        lines[active] += 1
+        active = active[nxt < seg_end[active]]
+    return lines
+
+
+def _line_counts(paras: list[ParaSpec], metrics: list[StyleMetrics], fonts: list[str]) -> np.ndarray:
+    n = len(paras)
+    size = np.array([p.size_pt or m.size_pt for p, m in zip(paras, metrics)], dtype=np.float64)
+
+    # One width table per distinct (font, bold) pair, stacked for fancy indexing.
+    keys = sorted({(f, m.bold) for f, m in zip(fonts, metrics)})
+    key_id = {k: i for i, k in enumerate(keys)}
+    tables = np.stack([glyph_widths(f, b) for f, b in keys])
+    para_font = np.array([key_id[(f, m.bold)] for f, m in zip(fonts, metrics)], dtype=np.int64)
+
+    # Hard line breaks split a paragraph into independently wrapped segments.
+    segments = [p.text.split("\n") for p in paras]
+    seg_para = np.repeat(np.arange(n), [len(s) for s in segments])
+    flat = [s for segs in segments for s in segs]
+    seg_len = np.fromiter((len(s) for s in flat), dtype=np.int64, count=len(flat))
+    seg_start = np.concatenate(([0], np.cumsum(seg_len)[:-1]))
+
+    codes = _codepoints("".join(flat))
+    char_seg = np.repeat(np.arange(len(flat)), seg_len)
+    char_para = seg_para[char_seg]
+    widths = tables[para_font[char_para], codes] * size[char_para] / 1000.0
+
+    # Words: a word starts at the beginning of a segment or at a non-space that
+    # follows a space. Leading spaces stay with the first word of a segment.
+    space = (codes == 32) | (codes == 9)
+    starts = ~space & np.concatenate(([True], space[:-1]))
+    starts[seg_start[seg_len > 0]] = True
+    word_of_char = np.cumsum(starts) - 1
+    n_words = int(starts.sum())
+    word_start = np.flatnonzero(starts)
+    seen_ink = np.cumsum(~space)
+    ink_before_word = seen_ink[word_start] - (~space[word_start])
+    trailing = space & (seen_ink - ink_before_word[word_of_char] > 0)
+    total = np.bincount(word_of_char, weights=widths, minlength=n_words)
+    ink = total - np.bincount(word_of_char, weights=widths * trailing, minlength=n_words)
+
+    words_per_seg = np.bincount(char_seg[word_start], minlength=len(flat))
+    seg_first = np.concatenate(([0], np.cumsum(words_per_seg)[:-1]))
+    indent = np.array([m.indent_pt for m in metrics])
+    seg_width = CONTENT_WIDTH_PT - indent[seg_para]
+    seg_lines = _break_lines(ink, total, seg_first, seg_first + words_per_seg, seg_width)
+    seg_lines = np.maximum(seg_lines, 1)  # empty lines still take a line
+    return np.bincount(seg_para, weights=seg_lines, minlength=n).astype(np.int64)
+
+
+# Paragraphs are measured in batches of roughly this many characters so that
+# memory stays bounded on very long documents; only per-paragraph scalars are
+# kept across batches. Each batch holds several 8-byte arrays per character, so
+# larger batches mostly cost memory: 1 << 20 peaks ~65 MiB higher for ~15% less time.
+BATCH_CHARS = 1 << 16
+
+
+class Simulation:
+    # Incremental simulate(): add() paragraphs as a writer emits them, then
+    # layout(). Only per-paragraph scalars are kept, so memory stays flat
+    # however long the document is.
+
+    def __init__(self) -> None:
+        self._style_codes: dict[str, int] = {}
+        self._columns: list[tuple[np.ndarray, ...]] = []
+        self._heads: list[tuple[int, int, str]] = []  # (paragraph index, level, title)
+        self._batch: list[ParaSpec] = []
+        self._n = self._chars = 0
+
+    def add(self, p: ParaSpec) -> None:
+        level = STYLES.get(p.style, STYLES["Normal"]).heading_level
+        if level:
+            self._heads.append((self._n, level, p.text))
+        self._batch.append(p)
+        self._n += 1
+        self._chars += len(p.text)
+        if self._chars >= BATCH_CHARS:
+            self._flush()
+
+    def flush(self) -> None:
+        # Measures the pending paragraphs, leaving only per-paragraph scalars
+        # (e.g. before a worker process sends its simulation back).
+        if self._batch:
+            self._flush()
+
+    def extend(self, other: Simulation) -> None:
+        # Appends other's paragraphs after this one's, as if they had been
+        # add()ed here: a document can be measured in independent parts.
+        self.flush()
+        other.flush()
+        if not other._n:
+            return
+        # Style codes are per simulation; other's are in insertion order.
+        codes = np.array([self._style_codes.setdefault(s, len(self._style_codes)) for s in other._style_codes])
+        for *head, style, breaks, image in other._columns:
+            self._columns.append((*head, codes[style], breaks, image))
+        self._heads += [(i + self._n, level, title) for i, level, title in other._heads]
+        self._n += other._n
+
+    def _flush(self) -> None:
+        batch = self._batch
+        metrics = [STYLES.get(p.style, STYLES["Normal"]) for p in batch]
+        fonts = [p.font or m.font for p, m in zip(batch, metrics)]
+        size = np.array([p.size_pt or m.size_pt for p, m in zip(batch, metrics)])
+        line_em = np.array([FONTS.get(f, FONTS[DEFAULT_FONT])[3] for f in fonts])
+        self._columns.append(
+            (
+                _line_counts(batch, metrics, fonts),
+                size * line_em * np.array([m.line_spacing for m in metrics]),
+                np.array([m.space_before_pt for m in metrics]),
+                np.array([m.space_after_pt for m in metrics]),
+                np.array([m.contextual for m in metrics], dtype=bool),
+                np.array([self._style_codes.setdefault(p.style, len(self._style_codes)) for p in batch]),
+                np.array([p.page_break for p in batch], dtype=bool),
+                np.array([p.image_pt for p in batch]),
+            )
+        )
+        batch.clear()
+        self._chars = 0
+
+    def layout(self) -> Layout:
+        self.flush()
+        if not self._n:
+            return Layout(0, np.zeros(0, np.int64), np.zeros(0, np.int64), [])
+
+        para_lines, line_height, before, after, contextual, style, breaks, image = (
+            np.concatenate(col) for col in zip(*self._columns)
+        )
+
+        # Paragraph heights, with contextual spacing between same-style neighbours.
+        same = style[1:] == style[:-1]
+        after[np.concatenate((same, [False])) & contextual] = 0
+        before[np.concatenate(([False], same)) & contextual] = 0
+        height = np.maximum(para_lines * line_height, image) + before + after
+
+        # Pagination: explicit page breaks start a new run of pages; within a run,
+        # a paragraph's page is where its top edge falls.
+        breaks[0] = False
+        run = np.cumsum(breaks)
+        cum = np.cumsum(height)
+        run_base = np.concatenate(([0.0], cum))[np.flatnonzero(np.concatenate(([True], breaks[1:])))]
+        top = cum - height - run_base[run]
+        run_height = np.bincount(run, weights=height)
+        run_pages = np.maximum(np.ceil(run_height / CONTENT_HEIGHT_PT - 1e-9), 1).astype(np.int64)
+        run_offset = np.concatenate(([0], np.cumsum(run_pages)[:-1]))
+        para_page = run_offset[run] + (top // CONTENT_HEIGHT_PT).astype(np.int64) + 1
+        total_pages = int(run_pages.sum())
+
+        return Layout(total_pages, para_lines, para_page, _heading_spans(self._heads, para_page, top, total_pages))
+
+
+def simulate(paragraphs: Iterable[ParaSpec]) -> Layout:
+    sim = Simulation()
+    for p in paragraphs:
+        sim.add(p)
+    return sim.layout()
+
+
+def _heading_spans(
+    heads: list[tuple[int, int, str]], para_page: np.ndarray, top: np.ndarray, total_pages: int
+) -> list[HeadingSpan]:
+    # Fractional page positions make the per-section breakdown add up to the total.
+    pos = para_page - 1 + (top % CONTENT_HEIGHT_PT) / CONTENT_HEIGHT_PT
+    spans = []
+    for k, (i, level, title) in enumerate(heads):
+        end = next((j for j, lv, _ in heads[k + 1 :] if lv <= level), None)
+        end_pos = pos[end] if end is not None else total_pages
+        spans.append(HeadingSpan(level, title, int(para_page[i]), round(float(end_pos - pos[i]), 1)))
+    return spans
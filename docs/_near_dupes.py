@@ -0,0 +1,302 @@
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import re
+import sys
+import time
+import zipfile
+import zlib
+from pathlib import Path
+from typing import TYPE_CHECKING, NamedTuple
+from xml.parsers import expat
+
+from _estimate_docx_length import collect_files
+from _search_index import DOCS, discover, read_blocks
+
+# NumPy is imported where it is used, so `docs dupes --help` starts instantly.
+if TYPE_CHECKING:
+    import numpy as np
+
+
+# Exact and near-duplicate paragraphs across the report and the project
+# documents (the padding cycle of _pad_pages, prompts copied between the
+# Lovable-AI-Prompts files, ...).
+#
+#   python docs/_near_dupes.py [targets ...] [--threshold 0.7] [--json PATH|-]
+#
+# Paragraphs are streamed file by file (.docx with the expat reader behind
+# _search_index.docx_blocks, Markdown line blocks with md_blocks) and kept
+# only as a location plus a signature. Paragraphs with the same normalised
+# text collapse into one exact cluster first. Each distinct text gets a MinHash
+# signature over its word shingles; LSH banding (BANDS bands of ROWS rows)
+# buckets the signatures, so only paragraphs sharing a band are ever compared,
+# against their bucket's first member, and there is no pairwise pass over the
+# corpus. Candidates whose estimated Jaccard similarity reaches the threshold
+# are merged with union-find into near-duplicate clusters.
+
+# 16 bands of 8 rows put the LSH threshold near (1/16) ** (1/8) ≈ 0.71.
+BANDS = 16
+ROWS = 8
+SHINGLE_WORDS = 4
+MIN_WORDS = 8
+THRESHOLD = 0.7
+# Universal hashing (a * x + b) mod P of 32-bit shingle hashes; a, x < 2**32
+# keeps a * x inside uint64.
+_PRIME = (1 << 32) + 15
+_SEED = 1
+# Paragraphs hashed per batch: 128 permutations x ~40 shingles x 8 bytes each.
+_BATCH = 1024
+
+_WORD_RE = re.compile(r"[a-z0-9]+(?:'[a-z]+)?")
+
+
+class Location(NamedTuple):
+    source: str
+    heading: tuple[str, ...]
+    paragraph: int  # 1-based, per file, counting non-empty blocks
+
+
+def _label(path: Path) -> str:
+    try:
+        return str(path.resolve().relative_to(DOCS))
+    except ValueError:
+        return str(path)
+
+
+def _shingles(words: list[str], k: int) -> list[int]:
+    if len(words) <= k:
+        return [zlib.crc32(" ".join(words).encode())]
+    return list({zlib.crc32(" ".join(words[i : i + k]).encode()) for i in range(len(words) - k + 1)})
+
+
+class _MinHash:
+    def __init__(self, perms: int, seed: int = _SEED) -> None:
+        import numpy as np
+
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(1, 1 << 32, size=(perms, 1), dtype=np.uint64)
+        self._b = rng.integers(0, 1 << 32, size=(perms, 1), dtype=np.uint64)
+        # Multipliers that fold the rows of a band into one 64-bit bucket key.
+        self.fold = rng.integers(1, 1 << 63, size=perms, dtype=np.uint64) | np.uint64(1)
+
+    def signatures(self, batch: list[list[int]]) -> np.ndarray:
+        # One (len(batch), perms) array; the whole batch is hashed in one go.
+        import numpy as np
+
+        x = np.fromiter((h for shingles in batch for h in shingles), dtype=np.uint64)[None, :]
+        starts = np.cumsum([0] + [len(shingles) for shingles in batch[:-1]])
+        hashed = (self._a * x % _PRIME + self._b) % _PRIME
+        return np.minimum.reduceat(hashed, starts, axis=1).T.astype(np.uint32)
+
+
+class _UnionFind:
+    def __init__(self) -> None:
+        self.parent: list[int] = []
+
+    def add(self) -> int:
+        self.parent.append(len(self.parent))
+        return len(self.parent) - 1
+
+    def find(self, i: int) -> int:
+        while self.parent[i] != i:
+            self.parent[i] = self.parent[self.parent[i]]
+            i = self.parent[i]
+        return i
+
+    def union(self, i: int, j: int) -> None:
+        i, j = self.find(i), self.find(j)
+        if i != j:
+            self.parent[max(i, j)] = min(i, j)
+
+
+def find_duplicates(
+    paths: list[Path],
+    threshold: float = THRESHOLD,
+    min_words: int = MIN_WORDS,
+    shingle: int = SHINGLE_WORDS,
+    bands: int = BANDS,
+    rows: int = ROWS,
+) -> dict:
+    import numpy as np
+
+    minhash = _MinHash(bands * rows)
+    texts: dict[bytes, int] = {}  # normalised text digest -> distinct text id
+    locations: list[list[Location]] = []  # per distinct text
+    words: list[int] = []
+    snippets: list[str] = []
+    signatures: list[np.ndarray] = []  # one (_BATCH, perms) block per batch
+    pending: list[list[int]] = []  # shingles of the texts not hashed yet
+    buckets: list[dict[int, int]] = [{} for _ in range(bands)]  # band key -> first distinct text id
+    candidates: list[tuple[int, int]] = []
+    errors: list[dict] = []
+    paragraphs = files = 0
+
+    def flush() -> None:
+        if not pending:
+            return
+        block = minhash.signatures(pending)
+        first = len(signatures) * _BATCH
+        signatures.append(np.vstack([block, np.zeros((_BATCH - len(block), block.shape[1]), np.uint32)]))
+        # Band keys wrap around mod 2**64; a collision only costs one verification.
+        with np.errstate(over="ignore"):
+            folded = (block.astype(np.uint64) * minhash.fold).reshape(len(block), bands, rows)
+            keys = folded.sum(axis=2, dtype=np.uint64)
+        for band, bucket in enumerate(buckets):
+            for tid, key in enumerate(keys[:, band].tolist(), first):
+                anchor = bucket.setdefault(key, tid)
+                if anchor != tid:
+                    candidates.append((anchor, tid))
+        pending.clear()
+
+    for path in paths:
+        source = _label(path)
+        index = 0
+        try:
+            for heading, text in read_blocks(path):
+                index += 1
+                tokens = _WORD_RE.findall(text.lower())
+                if len(tokens) < min_words:
+                    continue
+                paragraphs += 1
+                digest = hashlib.blake2b(" ".join(tokens).encode(), digest_size=16).digest()
+                tid = texts.get(digest)
+                if tid is None:
+                    tid = texts[digest] = len(locations)
+                    locations.append([])
+                    words.append(len(tokens))
+                    snippets.append(" ".join(text.split())[:160])
+                    pending.append(_shingles(tokens, shingle))
+                    if len(pending) == _BATCH:
+                        flush()
+                locations[tid].append(Location(source, heading, index))
+        except (OSError, zipfile.BadZipFile, KeyError, expat.ExpatError) as e:
+            errors.append({"file": source, "error": f"{type(e).__name__}: {e}"})
+            continue
+        files += 1
+    flush()
+
+    uf = _UnionFind()
+    for _ in locations:
+        uf.add()
+    similarity: dict[int, float] = {}
+    for i, j in candidates:
+        a, b = signatures[i // _BATCH][i % _BATCH], signatures[j // _BATCH][j % _BATCH]
+        sim = float(np.count_nonzero(a == b)) / len(a)
+        if sim >= threshold:
+            uf.union(i, j)
+            similarity[j] = min(similarity.get(j, 1.0), sim)
+
+    groups: dict[int, list[int]] = {}
+    for tid in range(len(locations)):
+        groups.setdefault(uf.find(tid), []).append(tid)
+    clusters = []
+    for members in groups.values():
+        if len(members) == 1 and len(locations[members[0]]) == 1:
+            continue
+        copies = sum(len(locations[t]) for t in members)
+        clusters.append(
+            {
+                "kind": "exact" if len(members) == 1 else "near",
+                "similarity": round(min([1.0] + [similarity[t] for t in members if t in similarity]), 3),
+                "copies": copies,
+                # Words that would go if every cluster kept one copy.
+                "repeated_words": sum(words[t] * len(locations[t]) for t in members) - words[members[0]],
+                "variants": [{"text": snippets[t], "words": words[t], "locations": locations[t]} for t in members],
+            }
+        )
+    clusters.sort(key=lambda c: (-c["repeated_words"], c["variants"][0]["locations"][0]))
+    total_words = sum(w * len(locs) for w, locs in zip(words, locations))
+    return {
+        "files": files,
+        "errors": errors,
+        "paragraphs": paragraphs,
+        "distinct": len(locations),
+        "words": total_words,
+        "repeated_words": sum(c["repeated_words"] for c in clusters),
+        "candidates": len(candidates),
+        "clusters": clusters,
+    }
+
+
+def _where(loc: Location) -> str:
+    return f"{loc.source} — {' › '.join(loc.heading) or '(no heading)'} ¶{loc.paragraph}"
+
+
+def print_report(result: dict, top: int = 20, max_locations: int = 5) -> None:
+    for n, cluster in enumerate(result["clusters"][:top], 1):
+        sim = "" if cluster["kind"] == "exact" else f", similarity ≥ {cluster['similarity']:.2f}"
+        print(f"{n}. {cluster['kind']}: {cluster['copies']} copies, {cluster['repeated_words']} repeated words{sim}")
+        variants = cluster["variants"]
+        more = f"  (+{len(variants) - 1} similar variants)" if len(variants) > 1 else ""
+        print(f"   “{variants[0]['text']}”{more}")
+        locs = sorted(loc for v in variants for loc in v["locations"])
+        for loc in locs[:max_locations]:
+            print(f"     {_where(loc)}")
+        if len(locs) > max_locations:
+            print(f"     … and {len(locs) - max_locations} more")
+    for e in result["errors"]:
+        print(f"{e['file']}: error: {e['error']}", file=sys.stderr)
+    share = result["repeated_words"] / max(result["words"], 1)
+    exact = sum(c["kind"] == "exact" for c in result["clusters"])
+    print(
+        f"\n{result['paragraphs']} paragraphs ({result['distinct']} distinct) in {result['files']} files: "
+        f"{exact} exact and {len(result['clusters']) - exact} near-duplicate clusters, "
+        f"{result['repeated_words']} of {result['words']} words repeated ({share:.1%})"
+    )
+
+
+def _json_result(result: dict) -> dict:
+    def variant(v: dict) -> dict:
+        locs = [{"source": l.source, "heading": list(l.heading), "paragraph": l.paragraph} for l in v["locations"]]
+        return {**v, "locations": locs}
+
+    return {**result, "clusters": [{**c, "variants": [variant(v) for v in c["variants"]]} for c in result["clusters"]]}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Find exact and near-duplicate paragraphs with MinHash/LSH.")
+    parser.add_argument(
+        "targets",
+        nargs="*",
+        help="files, directories or glob patterns (default: the sources of `docs search`)",
+    )
+    parser.add_argument(
+        "--threshold", type=float, default=THRESHOLD, help=f"estimated Jaccard similarity (default: {THRESHOLD})"
+    )
+    parser.add_argument(
+        "--min-words", type=int, default=MIN_WORDS, help=f"skip shorter paragraphs (default: {MIN_WORDS})"
+    )
+    parser.add_argument(
+        "--shingle", type=int, default=SHINGLE_WORDS, help=f"words per shingle (default: {SHINGLE_WORDS})"
+    )
+    parser.add_argument("--bands", type=int, default=BANDS, help=f"LSH bands (default: {BANDS})")
+    parser.add_argument("--rows", type=int, default=ROWS, help=f"signature rows per band (default: {ROWS})")
+    parser.add_argument("--top", type=int, default=20, help="clusters to print (default: 20)")
+    parser.add_argument("--max-locations", type=int, default=5, help="locations to print per cluster (default: 5)")
+    parser.add_argument("--json", metavar="PATH", help="write all clusters as JSON ('-' for stdout)")
+    args = parser.parse_args()
+    if not 0 < args.threshold <= 1:
+        parser.error("--threshold must be in (0, 1]")
+    if min(args.min_words, args.shingle, args.bands, args.rows) < 1:
+        parser.error("--min-words, --shingle, --bands and --rows must be at least 1")
+
+    paths = collect_files(args.targets) if args.targets else discover()
+    if not paths:
+        sys.exit(f"No .docx or .md files matched: {' '.join(args.targets)}")
+    t0 = time.perf_counter()
+    result = find_duplicates(paths, args.threshold, args.min_words, args.shingle, args.bands, args.rows)
+    elapsed = time.perf_counter() - t0
+    if args.json:
+        data = json.dumps(_json_result(result), indent=2, ensure_ascii=False)
+        if args.json == "-":
+            print(data)
+            return
+        Path(args.json).write_text(data + "\n", encoding="utf-8")
+    print_report(result, args.top, args.max_locations)
+    print(f"({result['candidates']} LSH candidate pairs, {elapsed:.2f}s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,627 @@
+from __future__ import annotations
+
+import os
+import time
+import zipfile
+from pathlib import Path
+from typing import BinaryIO, Callable
+
+
+# Streaming alternative to python-docx for generate_project_report.py.
+#
+# It mimics the small subset of the python-docx API used by the report helpers
+# (add_paragraph / add_run / add_page_break / sections[0] margins / save) but
+# serializes each paragraph as soon as the next one starts, writing straight
+# into the word/document.xml entry of the output zip. Nothing but the current
+# paragraph is kept in memory, so build time and memory stay linear in the
+# report length regardless of PADDING_SCALE.
+#
+# FragmentDocument renders paragraphs into a standalone body XML fragment on
+# disk; StreamingDocument.append_fragment() splices such a file back in.
+#
+# Compact mode (generate_project_report.py --compact) adds a "Code" paragraph
+# style for code blocks and leaves heading fonts to be inherited from Normal.
+#
+# RecordingDocument exposes the same surface but only produces a
+# (style, text, font, size_pt, page_break, image_pt) tuple per paragraph, which
+# is what the layout simulator in _layout_sim.py consumes; records can be
+# passed on as they are written instead of kept.
+#
+# StreamingDocument(date_time=...) pins the zip metadata (see zip_member()) for
+# reproducible builds; entries are always written in the same order.
+#
+# Pictures (add_picture) reference their media part by a relationship id derived
+# from the image file name. Report figures are named by content hash in the
+# image cache (_images.py), so a fragment rendered in an earlier build still
+# points at the right part, and identical images share one part.
+
+W_NS = "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
+R_NS = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+WP_NS = "http://schemas.openxmlformats.org/drawingml/2006/wordprocessingDrawing"
+A_NS = "http://schemas.openxmlformats.org/drawingml/2006/main"
+PIC_NS = "http://schemas.openxmlformats.org/drawingml/2006/picture"
+REL_NS = "http://schemas.openxmlformats.org/package/2006/relationships"
+CT_NS = "http://schemas.openxmlformats.org/package/2006/content-types"
+OFFICE_REL = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+
+# Style names used by the report, resolved once to the styleIds written by styles_xml().
+STYLE_IDS = {
+    "Normal": "Normal",
+    "Title": "Title",
+    "Heading 1": "Heading1",
+    "Heading 2": "Heading2",
+    "Heading 3": "Heading3",
+    "List Bullet": "ListBullet",
+    "Footer": "Footer",
+    "Code": "Code",  # compact mode only
+    "toc 1": "TOC1",
+    "toc 2": "TOC2",
+    "toc 3": "TOC3",
+}
+
+# --compression choices: zipfile method and compresslevel (None: zlib default).
+COMPRESSION = {
+    "stored": (zipfile.ZIP_STORED, None),
+    "deflate": (zipfile.ZIP_DEFLATED, None),
+    "max": (zipfile.ZIP_DEFLATED, 9),
+}
+
+# Zip timestamps cannot predate 1980-01-01 00:00:00 (UTC here).
+_ZIP_EPOCH_MIN = 315532800
+
+
+def zip_date_time(epoch: int) -> tuple[int, int, int, int, int, int]:
+    # Zip entry timestamp of a pinned build time (seconds since the epoch, UTC).
+    return time.gmtime(max(epoch, _ZIP_EPOCH_MIN))[:6]
+
+
+def zip_member(name: str, compression: str, date_time: tuple[int, ...]) -> zipfile.ZipInfo:
+    # An entry with the method and level of --compression and pinned metadata:
+    # timestamp, permissions and creating system, so the archive bytes only
+    # depend on the content.
+    method, level = COMPRESSION[compression]
+    info = zipfile.ZipInfo(name, date_time)
+    info.compress_type = method
+    info._compresslevel = level  # what ZipFile.open(name, "w") sets from compresslevel=
+    info.create_system = 3
+    info.external_attr = 0o600 << 16
+    return info
+
+
+EMU_PER_TWIP = 635
+EMU_PER_HALF_POINT = 6350
+EMU_PER_INCH = 914400
+
+# Content types of the picture formats the image stage writes.
+IMAGE_CONTENT_TYPES = {".png": "image/png", ".jpeg": "image/jpeg", ".jpg": "image/jpeg"}
+
+
+# EMU lengths like docx.shared.Pt/Inches, for callers that must not import python-docx.
+def Pt(points: float) -> int:
+    return int(points * 12700)
+
+
+def Inches(inches: float) -> int:
+    return int(inches * EMU_PER_INCH)
+
+
+# Flush the body buffer to the zip entry once this many characters are pending.
+FLUSH_CHARS = 1 << 16
+
+
+def _escape(text: str) -> str:
+    # xml.sax.saxutils.escape without its import cost (it pulls in urllib).
+    return text.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+
+
+def _attr(text: str) -> str:
+    return _escape(text).replace('"', "&quot;")
+
+
+def _text_xml(text: str) -> str:
+    # Same conversion python-docx applies in add_run(): \n -> <w:br/>, \t -> <w:tab/>.
+    out = []
+    for i, line in enumerate(text.split("\n")):
+        if i:
+            out.append("<w:br/>")
+        for j, chunk in enumerate(line.split("\t")):
+            if j:
+                out.append("<w:tab/>")
+            if not chunk:
+                continue
+            if chunk != chunk.strip():
+                out.append(f'<w:t xml:space="preserve">{_escape(chunk)}</w:t>')
+            else:
+                out.append(f"<w:t>{_escape(chunk)}</w:t>")
+    return "".join(out)
+
+
+def _twips(emu: int) -> int:
+    return int(emu) // EMU_PER_TWIP
+
+
+def media_rid(image: Path) -> str:
+    return f"rIdImg{Path(image).stem}"
+
+
+def drawing_xml(rid: str, width: int, height: int, pic_id: int, name: str) -> str:
+    # An inline picture run as python-docx writes it; width/height in EMU.
+    name = _attr(name)
+    return (
+        f'<w:r><w:drawing><wp:inline distT="0" distB="0" distL="0" distR="0">'
+        f'<wp:extent cx="{width}" cy="{height}"/><wp:docPr id="{pic_id}" name="Picture {pic_id}"/>'
+        f'<wp:cNvGraphicFramePr><a:graphicFrameLocks xmlns:a="{A_NS}" noChangeAspect="1"/></wp:cNvGraphicFramePr>'
+        f'<a:graphic xmlns:a="{A_NS}"><a:graphicData uri="{PIC_NS}"><pic:pic xmlns:pic="{PIC_NS}">'
+        f'<pic:nvPicPr><pic:cNvPr id="0" name="{name}"/><pic:cNvPicPr/></pic:nvPicPr>'
+        f'<pic:blipFill><a:blip r:embed="{rid}"/><a:stretch><a:fillRect/></a:stretch></pic:blipFill>'
+        f'<pic:spPr><a:xfrm><a:off x="0" y="0"/><a:ext cx="{width}" cy="{height}"/></a:xfrm>'
+        '<a:prstGeom prst="rect"><a:avLst/></a:prstGeom></pic:spPr>'
+        "</pic:pic></a:graphicData></a:graphic></wp:inline></w:drawing></w:r>"
+    )
+
+
+class _Font:
+    __slots__ = ("name", "size")
+
+    def __init__(self) -> None:
+        self.name: str | None = None
+        self.size: int | None = None  # EMU, e.g. docx.shared.Pt(10)
+
+
+class _Run:
+    __slots__ = ("text", "font", "_raw")
+
+    def __init__(self, text: str = "", raw: str | None = None) -> None:
+        self.text = text
+        self.font = _Font()
+        self._raw = raw
+
+    def xml(self) -> str:
+        if self._raw is not None:
+            return self._raw
+        props = []
+        if self.font.name:
+            name = _attr(self.font.name)
+            props.append(f'<w:rFonts w:ascii="{name}" w:hAnsi="{name}"/>')
+        if self.font.size:
+            props.append(f'<w:sz w:val="{int(self.font.size) // EMU_PER_HALF_POINT}"/>')
+        rpr = f"<w:rPr>{''.join(props)}</w:rPr>" if props else ""
+        return f"<w:r>{rpr}{_text_xml(self.text)}</w:r>"
+
+
+class _Paragraph:
+    __slots__ = ("style", "alignment", "page_break", "images", "_runs")
+
+    def __init__(self, text: str = "", style: str | None = None) -> None:
+        self.style = style
+        self.alignment = None
+        self.page_break = False
+        self.images: list[tuple[Path, int, int]] = []  # (file, width, height in EMU)
+        self._runs: list[_Run] = [_Run(text)] if text else []
+
+    def add_run(self, text: str = "") -> _Run:
+        run = _Run(text)
+        self._runs.append(run)
+        return run
+
+    def add_simple_field(self, instr: str) -> None:
+        instr = _attr(instr)
+        self._runs.append(_Run(raw=f'<w:fldSimple w:instr="{instr}"/>'))
+
+    def add_raw(self, xml: str, text: str = "") -> None:
+        # A ready-made paragraph child (bookmark, field run, hyperlink); text is
+        # what it displays, for record().
+        self._runs.append(_Run(text, raw=xml))
+
+    @property
+    def has_field(self) -> bool:
+        return any(r._raw is not None and r._raw.startswith("<w:fldSimple") for r in self._runs)
+
+    def xml(self) -> str:
+        props = []
+        if self.style and self.style != "Normal":
+            props.append(f'<w:pStyle w:val="{STYLE_IDS[self.style]}"/>')
+        if self.alignment is not None:
+            # Accept python-docx WD_ALIGN_PARAGRAPH members as well as plain strings.
+            jc = getattr(self.alignment, "xml_value", self.alignment)
+            props.append(f'<w:jc w:val="{jc}"/>')
+        ppr = f"<w:pPr>{''.join(props)}</w:pPr>" if props else ""
+        brk = '<w:r><w:br w:type="page"/></w:r>' if self.page_break else ""
+        return f"<w:p>{ppr}{''.join(r.xml() for r in self._runs)}{brk}</w:p>"
+
+    def record(self) -> tuple:
+        first = next((r for r in self._runs if r._raw is None), None)
+        size = first.font.size if first is not None else None
+        return (
+            self.style or "Normal",
+            "".join(r.text for r in self._runs),
+            first.font.name if first is not None else None,
+            int(size) / 12700 if size else None,
+            self.page_break,
+            sum(h for _, _, h in self.images) / 12700,
+        )
+
+
+class _Section:
+    def __init__(self) -> None:
+        # US Letter, portrait, 1" margins — the python-docx default template.
+        self.orientation = 0
+        self.page_width = 7772400
+        self.page_height = 10058400
+        self.left_margin = 914400
+        self.right_margin = 914400
+        self.top_margin = 914400
+        self.bottom_margin = 914400
+        self.header_distance = 457200
+        self.footer_distance = 457200
+
+    def xml(self, footer_rid: str | None) -> str:
+        w, h = self.page_width // EMU_PER_TWIP, self.page_height // EMU_PER_TWIP
+        orient = ""
+        if int(self.orientation) == 1:  # WD_ORIENTATION.LANDSCAPE
+            w, h = max(w, h), min(w, h)
+            orient = ' w:orient="landscape"'
+        footer = f'<w:footerReference w:type="default" r:id="{footer_rid}"/>' if footer_rid else ""
+        return (
+            f"<w:sectPr>{footer}"
+            f'<w:pgSz w:w="{w}" w:h="{h}"{orient}/>'
+            f'<w:pgMar w:top="{_twips(self.top_margin)}" w:right="{_twips(self.right_margin)}" '
+            f'w:bottom="{_twips(self.bottom_margin)}" w:left="{_twips(self.left_margin)}" '
+            f'w:header="{_twips(self.header_distance)}" w:footer="{_twips(self.footer_distance)}" w:gutter="0"/>'
+            '<w:cols w:space="720"/><w:docGrid w:linePitch="360"/></w:sectPr>'
+        )
+
+
+class DocumentSink:
+    # The python-docx compatible surface shared by the backends below.
+
+    def __init__(self, compact: bool = False) -> None:
+        self.compact = compact
+        # Style names defined by the package, checked like python-docx's document.styles.
+        self.styles = set(STYLE_IDS) if compact else set(STYLE_IDS) - {"Code"}
+        self.sections = [_Section()]
+        self.page_number_footer = False
+        self.paragraph_count = 0
+        self._pending: _Paragraph | None = None
+
+    def add_paragraph(self, text: str = "", style: str | None = None) -> _Paragraph:
+        # The returned paragraph stays mutable (style, alignment, runs) until the
+        # next paragraph is added; only then is it emitted.
+        self._flush_pending()
+        self._pending = _Paragraph(text, style)
+        return self._pending
+
+    def add_page_break(self) -> _Paragraph:
+        p = self.add_paragraph()
+        p.page_break = True
+        return p
+
+    def add_page_number_footer(self) -> None:
+        self.page_number_footer = True
+
+    def add_picture(self, paragraph: _Paragraph, image: Path, width: int, height: int, pic_id: int) -> None:
+        # Appends an inline picture run (size in EMU) to paragraph. pic_id must be
+        # unique in the document.
+        image = Path(image)
+        paragraph.add_raw(drawing_xml(media_rid(image), width, height, pic_id, image.name))
+        paragraph.images.append((image, width, height))
+        self.add_media(image)
+
+    def add_media(self, image: Path) -> None:
+        # Declares an image referenced by media_rid(image); only a packaging
+        # backend stores it.
+        pass
+
+    def flush(self) -> None:
+        # Emit the pending paragraph now (e.g. at a profiling boundary).
+        self._flush_pending()
+
+    def _flush_pending(self) -> None:
+        if self._pending is not None:
+            self._emit(self._pending)
+            self.paragraph_count += 1
+            self._pending = None
+
+    def _emit(self, p: _Paragraph) -> None:
+        raise NotImplementedError
+
+
+class RecordingDocument(DocumentSink):
+    # With `emit`, each record is handed to it as the paragraph is written and
+    # nothing is kept (close() returns []); without, records are collected.
+    def __init__(self, emit: Callable[[tuple], None] | None = None, compact: bool = False) -> None:
+        super().__init__(compact)
+        self.records: list[tuple] = []
+        self._handle = emit or self.records.append
+
+    def _emit(self, p: _Paragraph) -> None:
+        self._handle(p.record())
+
+    def close(self) -> list[tuple]:
+        self._flush_pending()
+        return self.records
+
+
+class FragmentDocument(DocumentSink):
+    # With `emit`, each paragraph's record (see RecordingDocument) is also
+    # handed to it, so one render yields both the XML and its layout input.
+    def __init__(self, path: Path, compact: bool = False, emit: Callable[[tuple], None] | None = None) -> None:
+        super().__init__(compact)
+        self.path = Path(path)
+        self._record = emit
+        self.xml_bytes = 0
+        self._tmp = self.path.with_name(f"{self.path.name}.{os.getpid()}.tmp")
+        self._file = open(self._tmp, "wb", buffering=FLUSH_CHARS)
+
+    def _emit(self, p: _Paragraph) -> None:
+        data = p.xml().encode("utf-8")
+        self._file.write(data)
+        self.xml_bytes += len(data)
+        if self._record is not None:
+            self._record(p.record())
+
+    def close(self) -> None:
+        # Renamed into place only when complete, so readers never see a partial fragment.
+        self._flush_pending()
+        self._file.close()
+        os.replace(self._tmp, self.path)
+
+
+class StreamingDocument(DocumentSink):
+    def __init__(
+        self,
+        path: Path | BinaryIO,
+        font_name: str = "Times New Roman",
+        size_pt: int = 12,
+        compact: bool = False,
+        compression: str = "deflate",
+        date_time: tuple[int, ...] | None = None,
+    ) -> None:
+        super().__init__(compact)
+        # path may be a writable binary file (e.g. io.BytesIO); it is left open.
+        self.path = path if hasattr(path, "write") else Path(path)
+        self.font_name = font_name
+        self.size_pt = size_pt
+
+        method, level = COMPRESSION[compression]
+        self._compression = compression
+        self._date_time = date_time
+        self._zip = zipfile.ZipFile(self.path, "w", method, compresslevel=level)
+        self._body = self._zip.open(self._member("word/document.xml"), "w")
+        self._buf: list[str] = []
+        self._buf_chars = 0
+        self.xml_bytes = 0  # bytes of word/document.xml handed to the zip so far
+        self._media: dict[str, Path] = {}  # relationship id -> image file
+        self._write(
+            "<?xml version='1.0' encoding='UTF-8' standalone='yes'?>\n"
+            f'<w:document xmlns:w="{W_NS}" xmlns:r="{R_NS}" xmlns:wp="{WP_NS}"><w:body>'
+        )
+
+    def add_media(self, image: Path) -> None:
+        self._media.setdefault(media_rid(image), Path(image))
+
+    def flush(self) -> None:
+        super().flush()
+        self._flush_buffer()
+
+    def append_fragment(self, path: Path) -> None:
+        self.flush()
+        tail = b""
+        with open(path, "rb") as f:
+            while chunk := f.read(FLUSH_CHARS):
+                self._body.write(chunk)
+                self.xml_bytes += len(chunk)
+                # _Paragraph.xml() always opens with a bare <w:p>; the 4-byte tail
+                # catches tags split across chunks without double counting.
+                self.paragraph_count += (tail + chunk).count(b"<w:p>")
+                tail = chunk[-4:]
+
+    def save(self, path: Path | None = None) -> None:
+        if path is not None and path is not self.path:
+            if not isinstance(self.path, Path) or Path(path).resolve() != self.path.resolve():
+                raise ValueError(f"StreamingDocument writes to {self.path}, not {path}")
+        self.close()
+
+    # -- streaming internals ------------------------------------------------
+
+    def _write(self, s: str) -> None:
+        self._buf.append(s)
+        self._buf_chars += len(s)
+        if self._buf_chars >= FLUSH_CHARS:
+            self._flush_buffer()
+
+    def _flush_buffer(self) -> None:
+        if self._buf:
+            data = "".join(self._buf).encode("utf-8")
+            self._body.write(data)
+            self.xml_bytes += len(data)
+            self._buf.clear()
+            self._buf_chars = 0
+
+    def _emit(self, p: _Paragraph) -> None:
+        self._write(p.xml())
+
+    def close(self) -> None:
+        if self._zip.fp is None:
+            return
+        self._flush_pending()
+        footer_rid = "rId4" if self.page_number_footer else None
+        self._write(self.sections[0].xml(footer_rid) + "</w:body></w:document>")
+        self._flush_buffer()
+        self._body.close()
+
+        for name, data in self._package_parts():
+            self._zip.writestr(self._member(name), data)
+        for image in self._media.values():
+            if self._date_time is None:
+                self._zip.write(image, f"word/media/{image.name}")
+            else:  # write() would take the image file's mtime
+                self._zip.writestr(self._member(f"word/media/{image.name}"), image.read_bytes())
+        self._zip.close()
+
+    def _member(self, name: str) -> str | zipfile.ZipInfo:
+        return name if self._date_time is None else zip_member(name, self._compression, self._date_time)
+
+    def _package_parts(self) -> list[tuple[str, str]]:
+        overrides = [
+            ("/word/document.xml", "wordprocessingml.document.main+xml"),
+            ("/word/styles.xml", "wordprocessingml.styles+xml"),
+            ("/word/numbering.xml", "wordprocessingml.numbering+xml"),
+            ("/word/settings.xml", "wordprocessingml.settings+xml"),
+        ]
+        rels = [
+            ("rId1", "styles", "styles.xml"),
+            ("rId2", "numbering", "numbering.xml"),
+            ("rId3", "settings", "settings.xml"),
+        ]
+        parts = [
+            ("word/styles.xml", styles_xml(self.font_name, self.size_pt, self.compact)),
+            ("word/numbering.xml", NUMBERING_XML),
+            ("word/settings.xml", SETTINGS_XML),
+        ]
+        if self.page_number_footer:
+            overrides.append(("/word/footer1.xml", "wordprocessingml.footer+xml"))
+            rels.append(("rId4", "footer", "footer1.xml"))
+            parts.append(("word/footer1.xml", FOOTER_XML))
+        rels += [(rid, "image", f"media/{image.name}") for rid, image in self._media.items()]
+        image_types = {
+            image.suffix.lower(): IMAGE_CONTENT_TYPES[image.suffix.lower()] for image in self._media.values()
+        }
+
+        content_types = (
+            "<?xml version='1.0' encoding='UTF-8' standalone='yes'?>\n"
+            f'<Types xmlns="{CT_NS}">'
+            '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+            '<Default Extension="xml" ContentType="application/xml"/>'
+            + "".join(f'<Default Extension="{ext[1:]}" ContentType="{ct}"/>' for ext, ct in sorted(image_types.items()))
+            + "".join(
+                f'<Override PartName="{name}" '
+                f'ContentType="application/vnd.openxmlformats-officedocument.{ct}"/>'
+                for name, ct in overrides
+            )
+            + "</Types>"
+        )
+        package_rels = (
+            "<?xml version='1.0' encoding='UTF-8' standalone='yes'?>\n"
+            f'<Relationships xmlns="{REL_NS}">'
+            f'<Relationship Id="rId1" Type="{OFFICE_REL}/officeDocument" Target="word/document.xml"/>'
+            "</Relationships>"
+        )
+        document_rels = (
+            "<?xml version='1.0' encoding='UTF-8' standalone='yes'?>\n"
+            f'<Relationships xmlns="{REL_NS}">'
+            + "".join(
+                f'<Relationship Id="{rid}" Type="{OFFICE_REL}/{kind}" Target="{target}"/>'
+                for rid, kind, target in rels
+            )
+            + "</Relationships>"
+        )
+        return [
+            ("[Content_Types].xml", content_types),
+            ("_rels/.rels", package_rels),
+            ("word/_rels/document.xml.rels", document_rels),
+            *parts,
+        ]
+
+
+# -- static package parts ----------------------------------------------------
+
+
+def _fonts(name: str) -> str:
+    name = _attr(name)
+    return f'<w:rFonts w:ascii="{name}" w:hAnsi="{name}" w:eastAsia="{name}" w:cs="{name}"/>'
+
+
+def styles_xml(font_name: str, size_pt: int, compact: bool = False) -> str:
+    # Mirrors the python-docx default template for the styles the report uses,
+    # with _set_default_font() already applied.
+    fonts = _fonts(font_name)
+    # Headings are based on Normal, so compact mode lets them inherit its font.
+    heading_fonts = "" if compact else fonts
+
+    def heading(level: int, size: str, color: str, before: int) -> str:
+        return (
+            f'<w:style w:type="paragraph" w:styleId="Heading{level}">'
+            f'<w:name w:val="heading {level}"/><w:basedOn w:val="Normal"/><w:next w:val="Normal"/>'
+            '<w:uiPriority w:val="9"/><w:qFormat/>'
+            f'<w:pPr><w:keepNext/><w:keepLines/><w:spacing w:before="{before}" w:after="0"/>'
+            f'<w:outlineLvl w:val="{level - 1}"/></w:pPr>'
+            f'<w:rPr>{heading_fonts}<w:b/><w:bCs/><w:color w:val="{color}"/>{size}</w:rPr></w:style>'
+        )
+
+    def toc(level: int) -> str:
+        # Word's built-in "toc N" styles, for the build-time TOC.
+        return (
+            f'<w:style w:type="paragraph" w:styleId="TOC{level}">'
+            f'<w:name w:val="toc {level}"/><w:basedOn w:val="Normal"/><w:next w:val="Normal"/>'
+            '<w:uiPriority w:val="39"/><w:unhideWhenUsed/>'
+            f'<w:pPr><w:tabs><w:tab w:val="right" w:leader="dot" w:pos="9350"/></w:tabs>'
+            f'<w:spacing w:after="100"/><w:ind w:left="{220 * (level - 1)}"/></w:pPr></w:style>'
+        )
+
+    return (
+        "<?xml version='1.0' encoding='UTF-8' standalone='yes'?>\n"
+        f'<w:styles xmlns:w="{W_NS}">'
+        "<w:docDefaults><w:rPrDefault><w:rPr>"
+        '<w:sz w:val="22"/><w:szCs w:val="22"/><w:lang w:val="en-US" w:eastAsia="en-US" w:bidi="ar-SA"/>'
+        "</w:rPr></w:rPrDefault><w:pPrDefault><w:pPr>"
+        '<w:spacing w:after="200" w:line="276" w:lineRule="auto"/>'
+        "</w:pPr></w:pPrDefault></w:docDefaults>"
+        '<w:style w:type="paragraph" w:default="1" w:styleId="Normal"><w:name w:val="Normal"/><w:qFormat/>'
+        f'<w:rPr>{fonts}<w:sz w:val="{size_pt * 2}"/></w:rPr></w:style>'
+        '<w:style w:type="character" w:default="1" w:styleId="DefaultParagraphFont">'
+        '<w:name w:val="Default Paragraph Font"/><w:uiPriority w:val="1"/><w:semiHidden/><w:unhideWhenUsed/></w:style>'
+        '<w:style w:type="paragraph" w:styleId="Title"><w:name w:val="Title"/><w:basedOn w:val="Normal"/>'
+        '<w:next w:val="Normal"/><w:uiPriority w:val="10"/><w:qFormat/>'
+        '<w:pPr><w:pBdr><w:bottom w:val="single" w:sz="8" w:space="4" w:color="4F81BD"/></w:pBdr>'
+        '<w:spacing w:after="300" w:line="240" w:lineRule="auto"/><w:contextualSpacing/></w:pPr>'
+        '<w:rPr><w:color w:val="17365D"/><w:spacing w:val="5"/><w:kern w:val="28"/>'
+        '<w:sz w:val="52"/><w:szCs w:val="52"/></w:rPr></w:style>'
+        + heading(1, '<w:sz w:val="28"/><w:szCs w:val="28"/>', "365F91", 480)
+        + heading(2, '<w:sz w:val="26"/><w:szCs w:val="26"/>', "4F81BD", 200)
+        + heading(3, "", "4F81BD", 200)
+        + '<w:style w:type="paragraph" w:styleId="ListBullet"><w:name w:val="List Bullet"/>'
+        '<w:basedOn w:val="Normal"/><w:uiPriority w:val="99"/><w:unhideWhenUsed/>'
+        '<w:pPr><w:numPr><w:numId w:val="1"/></w:numPr><w:contextualSpacing/></w:pPr></w:style>'
+        '<w:style w:type="paragraph" w:styleId="Footer"><w:name w:val="footer"/><w:basedOn w:val="Normal"/>'
+        '<w:uiPriority w:val="99"/><w:unhideWhenUsed/>'
+        '<w:pPr><w:tabs><w:tab w:val="center" w:pos="4680"/><w:tab w:val="right" w:pos="9360"/></w:tabs>'
+        '<w:spacing w:after="0" w:line="240" w:lineRule="auto"/></w:pPr></w:style>'
+        + "".join(toc(level) for level in (1, 2, 3))
+        + (CODE_STYLE_XML if compact else "")
+        + "</w:styles>"
+    )
+
+
+CODE_STYLE_XML = (
+    '<w:style w:type="paragraph" w:customStyle="1" w:styleId="Code"><w:name w:val="Code"/>'
+    '<w:basedOn w:val="Normal"/><w:qFormat/>'
+    '<w:rPr><w:rFonts w:ascii="Consolas" w:hAnsi="Consolas"/><w:sz w:val="20"/></w:rPr></w:style>'
+)
+
+NUMBERING_XML = (
+    "<?xml version='1.0' encoding='UTF-8' standalone='yes'?>\n"
+    f'<w:numbering xmlns:w="{W_NS}">'
+    '<w:abstractNum w:abstractNumId="0"><w:multiLevelType w:val="singleLevel"/>'
+    '<w:lvl w:ilvl="0"><w:start w:val="1"/><w:numFmt w:val="bullet"/><w:pStyle w:val="ListBullet"/>'
+    '<w:lvlText w:val="\uf0b7"/><w:lvlJc w:val="left"/>'
+    '<w:pPr><w:tabs><w:tab w:val="num" w:pos="360"/></w:tabs><w:ind w:left="360" w:hanging="360"/></w:pPr>'
+    '<w:rPr><w:rFonts w:ascii="Symbol" w:hAnsi="Symbol" w:hint="default"/></w:rPr></w:lvl></w:abstractNum>'
+    '<w:num w:numId="1"><w:abstractNumId w:val="0"/></w:num>'
+    "</w:numbering>"
+)
+
+SETTINGS_XML = (
+    "<?xml version='1.0' encoding='UTF-8' standalone='yes'?>\n"
+    f'<w:settings xmlns:w="{W_NS}"><w:defaultTabStop w:val="720"/>'
+    '<w:characterSpacingControl w:val="doNotCompress"/></w:settings>'
+)
+
+FOOTER_XML = (
+    "<?xml version='1.0' encoding='UTF-8' standalone='yes'?>\n"
+    f'<w:ftr xmlns:w="{W_NS}" xmlns:r="{R_NS}">'
+    '<w:p><w:pPr><w:pStyle w:val="Footer"/><w:jc w:val="center"/></w:pPr>'
+    '<w:r><w:fldChar w:fldCharType="begin"/><w:instrText xml:space="preserve"> PAGE </w:instrText>'
+    '<w:fldChar w:fldCharType="separate"/><w:fldChar w:fldCharType="end"/></w:r></w:p>'
+    "</w:ftr>"
+)
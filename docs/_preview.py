@@ -0,0 +1,105 @@
+from __future__ import annotations
+
+from html import escape
+from typing import TextIO
+
+from _ooxml_stream import DocumentSink
+
+
+# Preview writers for generate_project_report.py --preview.
+#
+# They take the same paragraph stream as the .docx backends (DocumentSink) and
+# write each paragraph as HTML or Markdown as soon as the next one starts, so a
+# preview is one pass over the report with no python-docx, XML or zip work.
+# Word-only features are approximated: the TOC field becomes a placeholder and
+# page breaks become horizontal rules. Figures link to the processed images in
+# the image cache instead of embedding them.
+
+_HTML_HEAD = """<!DOCTYPE html>
+<html lang="en">
+<head>
+<meta charset="utf-8">
+<title>{title}</title>
+<style>
+body {{ font: 12pt/1.15 "Times New Roman", serif; max-width: 6.5in; margin: 1in auto; }}
+h1.title {{ font-size: 26pt; font-weight: normal; text-align: center; }}
+pre {{ font: 10pt Consolas, monospace; white-space: pre-wrap; }}
+hr.page-break {{ border: 0; border-top: 1px dashed #999; margin: 2em 0; }}
+.toc {{ color: #777; font-style: italic; }}
+p.figure {{ text-align: center; }}
+</style>
+</head>
+<body>
+"""
+
+_HEADING_LEVELS = {"Title": 1, "Heading 1": 2, "Heading 2": 3, "Heading 3": 4}
+
+
+class PreviewDocument(DocumentSink):
+    def __init__(self, out: TextIO, fmt: str = "html", title: str = "Report preview") -> None:
+        if fmt not in ("html", "md"):
+            raise ValueError(f"unknown preview format {fmt!r}")
+        super().__init__()
+        self.fmt = fmt
+        self._out = out
+        self._in_list = False
+        if fmt == "html":
+            out.write(_HTML_HEAD.format(title=escape(title)))
+
+    def _emit(self, p) -> None:
+        style, text, font, _, page_break, _ = p.record()
+        is_list = style == "List Bullet"
+        if self._in_list and not is_list:
+            self._end_list()
+        if page_break:
+            self._out.write('<hr class="page-break">\n' if self.fmt == "html" else "\n---\n\n")
+        for image, width, _ in p.images:
+            if self.fmt == "html":
+                px = width // 9525  # EMU per CSS pixel
+                self._out.write(f'<p class="figure"><img src="{escape(image.as_uri())}" width="{px}" alt=""></p>\n')
+            else:
+                self._out.write(f"![]({image.as_posix()})\n\n")
+        if not text:
+            if p.has_field:  # the TOC
+                self._write_block("p", "[Table of Contents — updated in Word]", 'class="toc"')
+            return
+        if is_list and not self._in_list:
+            self._out.write("<ul>\n" if self.fmt == "html" else "")
+            self._in_list = True
+        if style in _HEADING_LEVELS:
+            level = _HEADING_LEVELS[style]
+            attrs = 'class="title"' if style == "Title" else ""
+            self._write_block(f"h{level}", text, attrs, "#" * level + " ")
+        elif is_list:
+            self._write_block("li", text, md_prefix="- ", md_end="\n")
+        elif font == "Consolas" or style == "Code":
+            self._write_code(text)
+        else:
+            center = 'style="text-align:center"' if p.alignment is not None else ""
+            self._write_block("p", text, center)
+
+    def _write_block(self, tag: str, text: str, attrs: str = "", md_prefix: str = "", md_end: str = "\n\n") -> None:
+        if self.fmt == "html":
+            body = escape(text).replace("\n", "<br>\n")
+            self._out.write(f"<{tag}{' ' + attrs if attrs else ''}>{body}</{tag}>\n")
+        else:
+            self._out.write(md_prefix + text.replace("\n", "  \n") + md_end)
+
+    def _write_code(self, text: str) -> None:
+        text = text.rstrip("\n")
+        if self.fmt == "html":
+            self._out.write(f"<pre><code>{escape(text)}</code></pre>\n")
+        else:
+            self._out.write(f"```\n{text}\n```\n\n")
+
+    def _end_list(self) -> None:
+        self._out.write("</ul>\n" if self.fmt == "html" else "\n")
+        self._in_list = False
+
+    def close(self) -> None:
+        self._flush_pending()
+        if self._in_list:
+            self._end_list()
+        if self.fmt == "html":
+            self._out.write("</body>\n</html>\n")
+        self._out.flush()
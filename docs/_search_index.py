@@ -0,0 +1,308 @@
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import math
+import os
+import re
+import shutil
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from _estimate_docx_length import iter_paragraphs
+
+# NumPy is imported where it is used, so `docs search --help` starts instantly.
+if TYPE_CHECKING:
+    import numpy as np
+
+
+# Local BM25 retrieval over the report and the project documents, the offline
+# stand-in for the retrieval step of the chatbot design (report Appendix D).
+#
+#   python docs/_search_index.py build
+#   python docs/_search_index.py query "qr ticket booking" -k 5 [--json]
+#
+# Documents are split into sections at headings (Heading 1-3 in .docx, # in
+# Markdown); sections longer than MAX_SECTION_WORDS, and files without headings,
+# are cut into word windows. The index is a directory of flat NumPy arrays:
+# postings (section ids) and term frequencies grouped by term, plus section
+# lengths. Queries map them read-only (np.load mmap_mode="r") and score only
+# the postings of the query terms, so a query touches a few pages of the index
+# and runs in milliseconds. A query rebuilds the index first when any source
+# file changed (mtime/size).
+
+DOCS = Path(__file__).resolve().parent
+INDEX_DIR = DOCS / ".report_cache" / "search"
+
+# (glob relative to DOCS)
+SOURCES = [
+    "DocentDesk_Project_Report.docx",
+    "*.md",
+    "Lovable-AI-Prompts/*.md",
+    "Original-Project-Files/*.docx",
+]
+# Generated files that repeat the report's text (generate_project_report.py --preview).
+EXCLUDE = ["*.preview.*"]
+
+K1 = 1.2
+B = 0.75
+MAX_SECTION_WORDS = 300
+INDEX_VERSION = 1
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+(?:'[a-z]+)?")
+_MD_HEADING_RE = re.compile(r"(#{1,6})\s+(.+?)\s*#*\s*$")
+_DOCX_HEADING_RE = re.compile(r"Heading (\d)")
+# Kept small on purpose: BM25's idf already discounts common words.
+_STOPWORDS = frozenset(
+    "a an and are as at be by for from has in is it its of on or that the this to was were will with".split()
+)
+
+
+def tokenize(text: str) -> list[str]:
+    return [t for t in _TOKEN_RE.findall(text.lower()) if t not in _STOPWORDS]
+
+
+def discover() -> list[Path]:
+    # The SOURCES files, in order, without EXCLUDE matches.
+    seen: dict[Path, None] = {}
+    for pattern in SOURCES:
+        for path in sorted(DOCS.glob(pattern)):
+            if path.is_file() and not any(path.match(x) for x in EXCLUDE):
+                seen.setdefault(path, None)
+    return list(seen)
+
+
+def _signature(paths: list[Path]) -> str:
+    h = hashlib.sha256(f"v{INDEX_VERSION} {K1} {B} {MAX_SECTION_WORDS}".encode())
+    for p in paths:
+        st = p.stat()
+        h.update(f"{p.relative_to(DOCS)}\0{st.st_mtime_ns}\0{st.st_size}\n".encode())
+    return h.hexdigest()
+
+
+def docx_blocks(path: Path):
+    # (heading path, text) per non-empty paragraph.
+    stack: list[str] = []
+    for style, text, *_ in iter_paragraphs(path):
+        m = _DOCX_HEADING_RE.fullmatch(style)
+        if m:
+            del stack[int(m.group(1)) - 1 :]
+            stack.append(text.strip())
+        elif text.strip():
+            yield tuple(stack), text
+
+
+def md_blocks(path: Path):
+    # (heading path, line) per non-empty line; fenced code keeps its # lines.
+    stack: list[tuple[int, str]] = []
+    fenced = False
+    for line in path.read_text(encoding="utf-8", errors="replace").splitlines():
+        if line.lstrip().startswith("```"):
+            fenced = not fenced
+        m = None if fenced else _MD_HEADING_RE.match(line)
+        if m:
+            level = len(m.group(1))
+            while stack and stack[-1][0] >= level:
+                stack.pop()
+            stack.append((level, m.group(2)))
+        elif line.strip():
+            yield tuple(title for _, title in stack), line
+
+
+def read_blocks(path: Path):
+    # (heading path, text) blocks of a .md or .docx file.
+    return md_blocks(path) if path.suffix.lower() == ".md" else docx_blocks(path)
+
+
+def _sections(path: Path) -> list[dict]:
+    blocks = read_blocks(path)
+    sections: list[dict] = []
+    current: tuple | None = None
+    words: list[str] = []
+
+    def flush() -> None:
+        for start in range(0, len(words), MAX_SECTION_WORDS):
+            part = words[start : start + MAX_SECTION_WORDS]
+            sections.append(
+                {"heading": list(current or ()), "part": start // MAX_SECTION_WORDS, "text": " ".join(part)}
+            )
+        words.clear()
+
+    for heading, text in blocks:
+        if heading != current:
+            flush()
+            current = heading
+        words.extend(text.split())
+    flush()
+    return sections
+
+
+def build(index_dir: Path = INDEX_DIR) -> dict:
+    import numpy as np
+
+    paths = discover()
+    docs: list[dict] = []
+    term_postings: dict[str, list[tuple[int, int]]] = {}
+    lengths: list[int] = []
+    for path in paths:
+        rel = str(path.relative_to(DOCS))
+        for section in _sections(path):
+            tokens = tokenize(" ".join(section["heading"]) + " " + section["text"])
+            if not tokens:
+                continue
+            doc_id = len(docs)
+            for term, tf in Counter(tokens).items():
+                term_postings.setdefault(term, []).append((doc_id, tf))
+            lengths.append(len(tokens))
+            docs.append(
+                {
+                    "source": rel,
+                    "heading": section["heading"],
+                    "part": section["part"],
+                    "snippet": section["text"][:240],
+                }
+            )
+
+    vocab: dict[str, list[int]] = {}  # term -> [offset, df]
+    postings = np.empty(sum(len(p) for p in term_postings.values()), dtype=np.int32)
+    tfs = np.empty(len(postings), dtype=np.float32)
+    offset = 0
+    for term in sorted(term_postings):
+        plist = term_postings[term]
+        vocab[term] = [offset, len(plist)]
+        block = np.array(plist, dtype=np.int32).reshape(-1, 2)
+        postings[offset : offset + len(plist)] = block[:, 0]
+        tfs[offset : offset + len(plist)] = block[:, 1]
+        offset += len(plist)
+
+    meta = {
+        "signature": _signature(paths),
+        "sources": [str(p.relative_to(DOCS)) for p in paths],
+        "sections": len(docs),
+        "terms": len(vocab),
+        "postings": len(postings),
+        "avgdl": float(np.mean(lengths)) if lengths else 0.0,
+        "k1": K1,
+        "b": B,
+    }
+    # Written next to the live index and swapped in, so readers never see half an index.
+    tmp = index_dir.with_name(f"{index_dir.name}.{os.getpid()}.tmp")
+    shutil.rmtree(tmp, ignore_errors=True)
+    tmp.mkdir(parents=True)
+    np.save(tmp / "postings.npy", postings)
+    np.save(tmp / "tfs.npy", tfs)
+    np.save(tmp / "lengths.npy", np.array(lengths, dtype=np.float32))
+    (tmp / "vocab.json").write_text(json.dumps(vocab, separators=(",", ":")), encoding="utf-8")
+    (tmp / "sections.json").write_text(json.dumps(docs, ensure_ascii=False), encoding="utf-8")
+    (tmp / "meta.json").write_text(json.dumps(meta, indent=2), encoding="utf-8")
+    old = index_dir.with_name(f"{index_dir.name}.{os.getpid()}.old")
+    if index_dir.exists():
+        index_dir.rename(old)
+    tmp.rename(index_dir)
+    shutil.rmtree(old, ignore_errors=True)
+    return meta
+
+
+class SearchIndex:
+    def __init__(self, index_dir: Path = INDEX_DIR) -> None:
+        import numpy as np
+
+        self.meta = json.loads((index_dir / "meta.json").read_text(encoding="utf-8"))
+        self.vocab: dict[str, list[int]] = json.loads((index_dir / "vocab.json").read_text(encoding="utf-8"))
+        self.postings = np.load(index_dir / "postings.npy", mmap_mode="r")
+        self.tfs = np.load(index_dir / "tfs.npy", mmap_mode="r")
+        lengths = np.load(index_dir / "lengths.npy")
+        k1, b = self.meta["k1"], self.meta["b"]
+        # Per-section BM25 length normalisation, computed once per load.
+        self._norm = k1 * (1 - b + b * lengths / max(self.meta["avgdl"], 1e-9))
+        self._k1 = k1
+        self._sections_path = index_dir / "sections.json"
+        self._sections: list[dict] | None = None
+
+    @property
+    def sections(self) -> list[dict]:
+        if self._sections is None:
+            self._sections = json.loads(self._sections_path.read_text(encoding="utf-8"))
+        return self._sections
+
+    def scores(self, query: str) -> np.ndarray:
+        import numpy as np
+
+        n = len(self._norm)
+        scores = np.zeros(n, dtype=np.float32)
+        for term, qtf in Counter(tokenize(query)).items():
+            entry = self.vocab.get(term)
+            if entry is None:
+                continue
+            offset, df = entry
+            ids = self.postings[offset : offset + df]
+            tf = self.tfs[offset : offset + df]
+            idf = math.log(1 + (n - df + 0.5) / (df + 0.5))
+            scores[ids] += qtf * idf * tf * (self._k1 + 1) / (tf + self._norm[ids])
+        return scores
+
+    def search(self, query: str, k: int = 5) -> list[dict]:
+        import numpy as np
+
+        scores = self.scores(query)
+        hits = np.flatnonzero(scores)
+        if len(hits) > k:
+            hits = hits[np.argpartition(-scores[hits], k - 1)[:k]]
+        hits = hits[np.argsort(-scores[hits], kind="stable")]
+        return [{"score": round(float(scores[i]), 4), **self.sections[i]} for i in hits]
+
+
+def open_index(index_dir: Path = INDEX_DIR, rebuild: bool = False) -> SearchIndex:
+    # Loads the index, rebuilding it when it is missing or any source changed.
+    meta_path = index_dir / "meta.json"
+    stale = rebuild or not meta_path.exists()
+    if not stale:
+        meta = json.loads(meta_path.read_text(encoding="utf-8"))
+        stale = meta["signature"] != _signature(discover())
+    if stale:
+        build(index_dir)
+    return SearchIndex(index_dir)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Offline BM25 search over the report and project documents.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("build", help="(re)build the index")
+    p_query = sub.add_parser("query", help="top-k sections for a query")
+    p_query.add_argument("text", nargs="+")
+    p_query.add_argument("-k", type=int, default=5)
+    p_query.add_argument("--json", action="store_true", help="print hits as JSON")
+    args = parser.parse_args()
+
+    if args.command == "build":
+        t0 = time.perf_counter()
+        meta = build()
+        print(
+            f"Indexed {meta['sections']} sections from {len(meta['sources'])} files: "
+            f"{meta['terms']} terms, {meta['postings']} postings ({time.perf_counter() - t0:.2f}s)"
+        )
+        return
+
+    index = open_index()
+    query = " ".join(args.text)
+    t0 = time.perf_counter()
+    hits = index.search(query, args.k)
+    elapsed = time.perf_counter() - t0
+    if args.json:
+        json.dump(hits, sys.stdout, indent=2, ensure_ascii=False)
+        print()
+        return
+    for rank, hit in enumerate(hits, 1):
+        where = " › ".join(hit["heading"]) or "(no heading)"
+        part = f" [part {hit['part'] + 1}]" if hit["part"] else ""
+        print(f"{rank}. {hit['score']:.2f}  {hit['source']} — {where}{part}")
+        print(f"   {hit['snippet'][:160]}")
+    print(f"\n{len(hits)} hit(s) in {elapsed * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,380 @@
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import sys
+from functools import lru_cache
+from pathlib import Path
+
+
+# Incremental index of the app sources behind the report's inventory appendices.
+#
+# Express routes (with their mount prefix from server.js), controller exports,
+# React components and hooks are extracted with small regex/bracket scanners;
+# nothing is evaluated. The index is kept on disk keyed by file path: a file is
+# re-read only when its mtime or size changed, and re-parsed only when its
+# content hash changed too. Cold scans parse in a process pool.
+#
+#   python docs/_source_index.py            # scan, print a summary
+#   python docs/_source_index.py --rebuild  # ignore the stored index
+
+ROOT = Path(__file__).resolve().parents[1]
+INDEX_PATH = Path(__file__).resolve().parent / ".report_cache" / "source_index.json"
+
+# (kind, glob relative to ROOT)
+SOURCES = [
+    ("server", "backend/server.js"),
+    ("routes", "backend/routes/*.routes.js"),
+    ("controllers", "backend/controllers/*.js"),
+    ("components", "src/components/**/*.tsx"),
+    ("components", "src/components/**/*.jsx"),
+    ("hooks", "src/hooks/*.ts"),
+    ("hooks", "src/hooks/*.tsx"),
+]
+
+# Below this many files to parse, a process pool costs more than it saves.
+PARALLEL_MIN_FILES = 32
+
+HTTP_METHODS = ("get", "post", "put", "patch", "delete", "all")
+
+_BLOCK_COMMENT_RE = re.compile(r"/\*.*?\*/", re.S)
+_LINE_COMMENT_RE = re.compile(r"(?<![:\w\"'])//.*")
+_STRING_RE = re.compile(r"""^\s*(["'`])(.*?)\1\s*$""", re.S)
+_ROUTE_RE = re.compile(r"\brouter\s*\.\s*(route|" + "|".join(HTTP_METHODS) + r")\s*\(")
+_CHAIN_RE = re.compile(r"\s*\.\s*(" + "|".join(HTTP_METHODS) + r")\s*\(")
+_IMPORT_RE = re.compile(r"""import\s+(\w+)\s+from\s+["']\./(routes/[^"']+)["']""")
+_MOUNT_RE = re.compile(r"""\bapp\.use\(\s*["']([^"']+)["']\s*,\s*(\w+)\s*\)""")
+_DESC_RE = re.compile(r"//\s*@desc\s+(.+)")
+_EXPORT_RE = re.compile(
+    r"^export\s+(?:default\s+)?(?:async\s+)?(?:function\*?|const|let|class)\s+(\w+)", re.M
+)
+_EXPORT_LIST_RE = re.compile(r"^export\s*\{([^}]*)\}", re.M)
+
+
+@lru_cache(maxsize=None)
+def _extractor_digest() -> str:
+    # Stored entries are only valid for the extractors that produced them.
+    return hashlib.sha256(Path(__file__).read_bytes()).hexdigest()
+
+
+# -- extractors ---------------------------------------------------------------
+
+
+def _strip_comments(src: str) -> str:
+    return _LINE_COMMENT_RE.sub("", _BLOCK_COMMENT_RE.sub("", src))
+
+
+def _call_args(src: str, start: int) -> tuple[list[str], int]:
+    # Top-level arguments of the call whose "(" ends at src[start - 1], and the
+    # index just past its ")".
+    args, depth, quote, begin = [], 0, None, start
+    i = start
+    while i < len(src):
+        c = src[i]
+        if quote:
+            if c == "\\":
+                i += 1
+            elif c == quote:
+                quote = None
+        elif c in "\"'`":
+            quote = c
+        elif c in "([{":
+            depth += 1
+        elif c in ")]}":
+            if depth == 0:
+                args.append(src[begin:i].strip())
+                return [a for a in args if a], i + 1
+            depth -= 1
+        elif c == "," and depth == 0:
+            args.append(src[begin:i].strip())
+            begin = i + 1
+        i += 1
+    raise ValueError("unbalanced call")
+
+
+def _string(arg: str) -> str | None:
+    m = _STRING_RE.match(arg)
+    return m.group(2) if m else None
+
+
+def _endpoint(method: str, path: str, args: list[str]) -> dict:
+    # The last argument is the handler; earlier ones are middleware. A handler
+    # that is itself a call (passport.authenticate(...)) is named after the callee.
+    middleware = [re.sub(r"\s+", " ", a) for a in args[:-1]]
+    handler = re.match(r"[\w.]+", args[-1]) if args else None
+    roles = [
+        r
+        for a in middleware
+        if a.startswith("authorize(")
+        for r in re.findall(r"""["']([^"']+)["']""", a)
+    ]
+    return {
+        "method": method.upper(),
+        "path": path,
+        "handler": handler.group(0) if handler else None,
+        "protected": any(a == "protect" for a in middleware),
+        "roles": roles,
+        "middleware": [a.split("(", 1)[0] for a in middleware],
+    }
+
+
+def _parse_routes(src: str) -> dict:
+    src = _strip_comments(src)
+    endpoints = []
+    for m in _ROUTE_RE.finditer(src):
+        args, end = _call_args(src, m.end())
+        path = _string(args[0]) if args else None
+        if path is None:
+            continue
+        if m.group(1) != "route":
+            endpoints.append(_endpoint(m.group(1), path, args[1:]))
+            continue
+        # router.route("/x").get(...).post(...)
+        while chained := _CHAIN_RE.match(src, end):
+            handlers, end = _call_args(src, chained.end())
+            endpoints.append(_endpoint(chained.group(1), path, handlers))
+    return {"endpoints": endpoints}
+
+
+def _parse_server(src: str) -> dict:
+    src = _strip_comments(src)
+    imports = {name: "backend/" + target for name, target in _IMPORT_RE.findall(src)}
+    mounts = [
+        {"prefix": prefix, "file": imports[name]}
+        for prefix, name in _MOUNT_RE.findall(src)
+        if name in imports
+    ]
+    return {"mounts": mounts}
+
+
+def _parse_controllers(src: str) -> dict:
+    # Exports in source order, each with the "// @desc" comment above it.
+    exports, desc = [], None
+    for line in src.splitlines():
+        if m := _DESC_RE.search(line):
+            desc = m.group(1).strip()
+        elif m := _EXPORT_RE.match(line):
+            exports.append({"name": m.group(1), "desc": desc})
+            desc = None
+    return {"exports": exports}
+
+
+def _exported_names(src: str) -> list[str]:
+    src = _strip_comments(src)
+    names = _EXPORT_RE.findall(src)
+    for group in _EXPORT_LIST_RE.findall(src):
+        for item in group.split(","):
+            name = item.split(" as ")[-1].strip()
+            if name and not name.startswith("type "):
+                names.append(name)
+    return list(dict.fromkeys(names))
+
+
+def _parse_components(src: str) -> dict:
+    return {"exports": [n for n in _exported_names(src) if n[:1].isupper()]}
+
+
+def _parse_hooks(src: str) -> dict:
+    return {"exports": [n for n in _exported_names(src) if n.startswith("use")]}
+
+
+_PARSERS = {
+    "server": _parse_server,
+    "routes": _parse_routes,
+    "controllers": _parse_controllers,
+    "components": _parse_components,
+    "hooks": _parse_hooks,
+}
+
+
+# -- index ----------------------------------------------------------------------
+
+
+def discover(root: Path = ROOT) -> dict[str, str]:
+    # Repo-relative path -> kind for every app source behind the appendices.
+    found: dict[str, str] = {}
+    for kind, pattern in SOURCES:
+        for p in sorted(root.glob(pattern)):
+            if p.is_file() and "node_modules" not in p.parts:
+                found.setdefault(p.relative_to(root).as_posix(), kind)
+    return found
+
+
+def _parse_file(root: Path, rel: str, kind: str, old_hash: str | None) -> tuple[str, str, dict | None]:
+    # Runs in the worker pool. Returns data=None when the content hash matches
+    # old_hash (only the mtime moved), so the stored entry can be kept.
+    raw = (root / rel).read_bytes()
+    digest = hashlib.sha256(raw).hexdigest()
+    if digest == old_hash:
+        return rel, digest, None
+    try:
+        data = _PARSERS[kind](raw.decode("utf-8", errors="replace"))
+    except ValueError as e:
+        data = {"error": f"{type(e).__name__}: {e}"}
+    return rel, digest, data
+
+
+def _load_index(path: Path) -> dict:
+    try:
+        with open(path, encoding="utf-8") as f:
+            index = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return index.get("files", {}) if index.get("version") == _extractor_digest() else {}
+
+
+def _save_index(path: Path, files: dict) -> None:
+    # Written to a temp file and renamed, so a crashed build never leaves a torn index.
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    tmp.write_text(json.dumps({"version": _extractor_digest(), "files": files}), encoding="utf-8")
+    os.replace(tmp, path)
+
+
+def scan(
+    root: Path = ROOT, index_path: Path | None = INDEX_PATH, jobs: int | None = None
+) -> tuple[dict, dict]:
+    # Returns (files, stats): files maps a repo-relative path to its entry
+    # {"kind", "mtime_ns", "size", "sha256", "data"}; stats counts parsed,
+    # rehashed-but-unchanged, reused and removed files.
+    root = Path(root)
+    old = _load_index(index_path) if index_path is not None else {}
+    files: dict[str, dict] = {}
+    todo: list[tuple[str, str, str | None]] = []
+    for rel, kind in discover(root).items():
+        st = (root / rel).stat()
+        entry = old.get(rel)
+        if entry and entry["kind"] == kind and (entry["mtime_ns"], entry["size"]) == (st.st_mtime_ns, st.st_size):
+            files[rel] = entry
+            continue
+        files[rel] = {"kind": kind, "mtime_ns": st.st_mtime_ns, "size": st.st_size}
+        same_kind = entry is not None and entry["kind"] == kind
+        todo.append((rel, kind, entry["sha256"] if same_kind else None))
+
+    stats = {"parsed": 0, "unchanged": 0, "reused": len(files) - len(todo), "removed": len(set(old) - set(files))}
+    if len(todo) < PARALLEL_MIN_FILES or jobs == 1:
+        results = [_parse_file(root, *t) for t in todo]
+    else:
+        workers = min(jobs or os.cpu_count() or 1, len(todo))
+        from concurrent.futures import ProcessPoolExecutor
+
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(
+                pool.map(
+                    _parse_file,
+                    *zip(*((root, *t) for t in todo)),
+                    chunksize=max(1, len(todo) // (workers * 4)),
+                )
+            )
+    for rel, digest, data in results:
+        files[rel]["sha256"] = digest
+        if data is None:
+            files[rel]["data"] = old[rel]["data"]
+            stats["unchanged"] += 1
+        else:
+            files[rel]["data"] = data
+            stats["parsed"] += 1
+
+    if index_path is not None and (todo or stats["removed"]):
+        _save_index(index_path, files)
+    return files, stats
+
+
+# -- report blocks ------------------------------------------------------------------
+
+
+def _of_kind(files: dict, kind: str) -> list[tuple[str, dict]]:
+    return [(rel, e["data"]) for rel, e in files.items() if e["kind"] == kind and "error" not in e["data"]]
+
+
+def _endpoint_lines(files: dict) -> list[str]:
+    routes = dict(_of_kind(files, "routes"))
+    mounts = [m for _, d in _of_kind(files, "server") for m in d["mounts"]]
+    mounted = {m["file"] for m in mounts}
+    # Route files server.js does not mount are still listed, under their own path.
+    mounts += [{"prefix": "(unmounted)", "file": rel} for rel in routes if rel not in mounted]
+    lines = []
+    for m in mounts:
+        for ep in routes.get(m["file"], {}).get("endpoints", []):
+            path = m["prefix"].rstrip("/") + (ep["path"] if ep["path"] != "/" else "")
+            access = []
+            if ep["protected"]:
+                access.append("protected")
+            if ep["roles"]:
+                access.append("/".join(ep["roles"]))
+            note = f" ({', '.join(access)})" if access else ""
+            lines.append(f"{ep['method']:<6} {path or '/'}{note}  -> {ep['handler'] or '?'}")
+    return lines
+
+
+def _group_by_dir(entries: list[tuple[str, dict]], strip: str) -> dict[str, list[str]]:
+    # One name per file (its first export), grouped by folder: the appendix is
+    # a high-level inventory, not a list of every sub-component.
+    groups: dict[str, list[str]] = {}
+    for rel, data in sorted(entries):
+        folder = rel[len(strip) :].rpartition("/")[0] or "(top level)"
+        groups.setdefault(folder, []).extend(data["exports"][:1])
+    return groups
+
+
+def report_blocks(files: dict, name: str) -> list[dict]:
+    # Expands an {"index": name} block of report_sections.json into ordinary blocks.
+    if name == "endpoints":
+        lines = _endpoint_lines(files)
+        return [{"code": "\n".join(lines) + "\n"}] if lines else []
+    if name == "controllers":
+        bullets = []
+        for rel, data in sorted(_of_kind(files, "controllers")):
+            names = ", ".join(
+                f"{e['name']} ({e['desc']})" if e["desc"] else e["name"] for e in data["exports"]
+            )
+            if names:
+                bullets.append(f"{Path(rel).name}: {names}.")
+        return [{"bullets": bullets}] if bullets else []
+    if name == "components":
+        groups = _group_by_dir(_of_kind(files, "components"), "src/components/")
+        bullets = [f"{folder}: {', '.join(names)}." for folder, names in groups.items() if names]
+        return [{"bullets": bullets}] if bullets else []
+    if name == "hooks":
+        bullets = [
+            f"{', '.join(d['exports'])} ({Path(rel).name})"
+            for rel, d in sorted(_of_kind(files, "hooks"))
+            if d["exports"]
+        ]
+        return [{"bullets": bullets}] if bullets else []
+    raise ValueError(f"unknown index block {name!r}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Scan the app sources used by the report appendices.")
+    parser.add_argument("--rebuild", action="store_true", help="ignore the stored index and parse everything")
+    parser.add_argument("-j", "--jobs", type=int, help="worker processes for cold scans (default: CPU count)")
+    parser.add_argument("--json", action="store_true", help="print the index instead of a summary")
+    args = parser.parse_args()
+
+    if args.rebuild:
+        INDEX_PATH.unlink(missing_ok=True)
+    files, stats = scan(ROOT, INDEX_PATH, args.jobs)
+    if args.json:
+        json.dump(files, sys.stdout, indent=2)
+        print()
+        return
+    kinds: dict[str, int] = {}
+    for e in files.values():
+        kinds[e["kind"]] = kinds.get(e["kind"], 0) + 1
+    print("Files:", ", ".join(f"{n} {k}" for k, n in sorted(kinds.items())))
+    print(
+        f"Parsed {stats['parsed']}, rehashed unchanged {stats['unchanged']}, "
+        f"reused {stats['reused']}, removed {stats['removed']}"
+    )
+    for rel, e in files.items():
+        if "error" in e["data"]:
+            print(f"  {rel}: {e['data']['error']}")
+    print(f"Endpoints: {len(_endpoint_lines(files))}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+from __future__ import annotations
+
+import importlib
+import json
+import sys
+import time
+import traceback
+from pathlib import Path
+
+import _source_index
+
+
+# Watch mode for generate_project_report.py (--watch).
+#
+# One interpreter stays up: python-docx/lxml stay imported and the styled base
+# template stays cached between builds. The report script, its helper modules,
+# the section spec, the image files of its figure blocks and the app sources
+# behind the inventory appendices are polled; once they have been quiet for
+# `debounce` seconds the report is rebuilt and re-estimated. The file list is
+# discovered (globbed) once per rebuild; polls only stat it, together with the
+# directories it lives in, whose mtimes change when a file is added or removed.
+# Edited helper modules are reloaded in dependency order before the build; the
+# base template is only rebuilt when generate_project_report.py itself changed.
+
+DOCS = Path(__file__).resolve().parent
+
+# Leaves first, so each reload picks up the already reloaded helpers.
+_RELOAD_ORDER = [
+    "_ooxml_stream",
+    "_docx_package",
+    "_chunks",
+    "_layout_sim",
+    "_images",
+    "_estimate_docx_length",
+    "_build_profile",
+    "_preview",
+    "_source_index",
+    "generate_project_report",
+]
+
+
+def _figure_files(sections_path: Path) -> list[Path]:
+    # Image sources of the spec's figure blocks (paths are repo-relative). A
+    # spec that does not parse yet has none; the build reports the error.
+    try:
+        with open(sections_path, encoding="utf-8") as f:
+            sections = json.load(f)
+        paths = {block["figure"]["path"] for s in sections for block in s["blocks"] if "figure" in block}
+    except (OSError, ValueError, TypeError, KeyError):
+        return []
+    return [_source_index.ROOT / p for p in sorted(paths)]
+
+
+def watched_files(sections_path: Path) -> list[Path]:
+    # Files, then the directories to stat for additions and removals.
+    root = _source_index.ROOT
+    files = [
+        *sorted(DOCS.glob("*.py")),
+        sections_path,
+        *_figure_files(sections_path),
+        *(root / rel for rel in _source_index.discover(root)),
+    ]
+    dirs = {p.parent for p in files}
+    for _, pattern in _source_index.SOURCES:
+        base = pattern.split("*", 1)[0].rpartition("/")[0]
+        dirs.add(root / base)
+    return files + sorted(dirs)
+
+
+def _snapshot(paths: list[Path]) -> dict[Path, tuple[int, int] | None]:
+    snap: dict[Path, tuple[int, int] | None] = {}
+    for p in paths:
+        try:
+            st = p.stat()
+        except OSError:
+            snap[p] = None
+        else:
+            snap[p] = (st.st_mtime_ns, st.st_size)
+    return snap
+
+
+def _changed(old: dict, new: dict) -> list[Path]:
+    return [p for p in old.keys() | new.keys() if old.get(p) != new.get(p)]
+
+
+def _reload(changed: list[Path]):
+    # Returns the (possibly reloaded) report module.
+    names = {p.stem for p in changed if p.suffix == ".py"}
+    if not names:
+        return sys.modules["generate_project_report"]
+    old_templates = dict(sys.modules["generate_project_report"]._BASE_TEMPLATES)
+    for name in _RELOAD_ORDER:
+        if name in sys.modules:
+            importlib.reload(sys.modules[name])
+    gpr = sys.modules["generate_project_report"]
+    if "generate_project_report" not in names:
+        gpr._BASE_TEMPLATES.update(old_templates)
+    return gpr
+
+
+def _rebuild(gpr, out: Path, options: dict, target_pages: int | None) -> None:
+    from _estimate_docx_length import simulate_docx
+
+    t0 = time.perf_counter()
+    padding_scale = gpr.PADDING_SCALE
+    if target_pages:
+        padding_scale = gpr.solve_padding_scale(target_pages, toc=options.get("toc", "static"))
+    stats = gpr.build_report(out, padding_scale=padding_scale, **options)
+    t1 = time.perf_counter()
+    pages = simulate_docx(out).pages
+    t2 = time.perf_counter()
+    reused = f", {stats['reused']} sections reused" if options.get("writer") == "stream" else ""
+    print(
+        f"[{time.strftime('%H:%M:%S')}] rebuilt in {(t2 - t0) * 1000:.0f} ms "
+        f"(build {(t1 - t0) * 1000:.0f} ms, save {stats['save_seconds'] * 1000:.0f} ms, "
+        f"estimate {(t2 - t1) * 1000:.0f} ms{reused}): {pages} pages",
+        flush=True,
+    )
+
+
+def watch(
+    out: Path,
+    options: dict,
+    target_pages: int | None = None,
+    interval: float = 0.1,
+    debounce: float = 0.2,
+) -> None:
+    # options are build_report() keyword arguments (writer, cache_dir, compact, ...).
+    # Runs until interrupted; a failing build is reported and the watch goes on.
+    gpr = importlib.import_module("generate_project_report")
+    sections_path = Path(gpr.SECTIONS_PATH)
+    paths = watched_files(sections_path)
+    snap = _snapshot(paths)
+    changed: list[Path] = []
+    print(f"Watching {len(snap)} files and directories; writing {out} (Ctrl-C to stop)", flush=True)
+    try:
+        while True:
+            try:
+                gpr = _reload(changed)
+                _rebuild(gpr, out, options, target_pages)
+            except Exception:  # a typo in the spec or script must not end the watch
+                traceback.print_exc()
+                print("build failed; waiting for the next change", file=sys.stderr, flush=True)
+            changed = []
+            while not changed:
+                time.sleep(interval)
+                new = _snapshot(paths)
+                changed = _changed(snap, new)
+            # Debounce: wait until the files stop moving (editors save in several steps).
+            while True:
+                time.sleep(debounce)
+                settled = _snapshot(paths)
+                more = _changed(new, settled)
+                if not more:
+                    break
+                changed += more
+                new = settled
+            # Rediscover for the next build: files may have come or gone.
+            paths = watched_files(sections_path)
+            snap = _snapshot(paths)
+            names = sorted({p.name for p in changed})
+            print(f"changed: {', '.join(names[:5])}{' …' if len(names) > 5 else ''}", flush=True)
+    except KeyboardInterrupt:
+        print()
@@ -1,14 +1,37 @@
 from __future__ import annotations
 
-from datetime import date
+import argparse
+import hashlib
+import io
+import json
+import os
+import re
+import sys
+import time
+from datetime import date, datetime, timezone
+from contextlib import ExitStack, nullcontext
+from functools import lru_cache, partial, wraps
+from html import escape
 from pathlib import Path
-
-from docx import Document
-from docx.enum.section import WD_ORIENTATION
-from docx.enum.text import WD_ALIGN_PARAGRAPH
-from docx.oxml import OxmlElement
-from docx.oxml.ns import qn
-from docx.shared import Inches, Pt
+from typing import TYPE_CHECKING, BinaryIO, Iterable, TextIO
+from weakref import WeakKeyDictionary
+
+import _ooxml_stream
+from _ooxml_stream import (
+    EMU_PER_INCH,
+    DocumentSink,
+    drawing_xml,
+    FragmentDocument,
+    Inches,
+    Pt,
+    RecordingDocument,
+    StreamingDocument,
+)
+
+# python-docx is imported where it is used, so the streaming and preview
+# writers never pay for it (see --preview).
+if TYPE_CHECKING:
+    from docx.document import Document
 
 
 PROJECT_NAME = "DocentDesk – AI Museum Companion"
@@ -16,17 +39,58 @@ REPORT_TITLE = "Project Report"
 REPORT_SUBTITLE = "Architecture, Implementation, NLP/Chatbot, and Payments"
 ORG_LINE = "DocentDesk – AI Chatbot (Vite + React + Supabase + Express)"
 AUTHOR_LINE = "Prepared by: __________________________"
-DATE_LINE = f"Date: {date.today().strftime('%B %d, %Y')}"
+# Reproducible builds (--reproducible) format their pinned date the same way.
+DATE_FORMAT = "Date: %B %d, %Y"
+DATE_LINE = date.today().strftime(DATE_FORMAT)
 
 # Tuning knob for overall report length.
 # The report content includes deliberate elaboration blocks to reach a target of ~80 pages.
 # If you need a longer/shorter report, adjust this factor (e.g., 0.25 shorter, 0.50 longer).
 PADDING_SCALE = 0.35
 
+# Section content (Executive Summary through Appendix C) lives in this spec.
+SECTIONS_PATH = Path(__file__).resolve().parent / "report_sections.json"
+# Rendered section fragments for the streaming writer, keyed by content hash.
+CACHE_DIR = Path(__file__).resolve().parent / ".report_cache"
+# Figure paths in the spec are relative to the repository root.
+ROOT = Path(__file__).resolve().parents[1]
+
+# Page geometry set by _setup_document(): US Letter, portrait, 1" margins.
+PAGE_WIDTH = Inches(8.5)
+PAGE_HEIGHT = Inches(11)
+MARGIN = Inches(1)
+CONTENT_WIDTH = PAGE_WIDTH - 2 * MARGIN
+# Tall figures are scaled down to leave room for the caption on the same page.
+MAX_FIGURE_HEIGHT = (PAGE_HEIGHT - 2 * MARGIN) * 3 // 4
+
+# Parts of the python-docx default template the report never uses; --compact drops them.
+_OPTIONAL_RELS = ("/stylesWithEffects", "/webSettings", "/customXml", "/metadata/thumbnail")
+
+
+# Active build profiler (--profile, see _build_profile.py); None when disabled.
+_PROFILER = None
+
+
+def _span(name: str, document: Document, kind: str = "phase"):
+    return nullcontext() if _PROFILER is None else _PROFILER.span(name, document, kind)
+
+
+def _profiled(fn):
+    # Records each call of a helper as a profiling phase named after it.
+    @wraps(fn)
+    def wrapper(document, *args, **kwargs):
+        with _span(fn.__name__, document):
+            return fn(document, *args, **kwargs)
+
+    return wrapper
 
+
+@_profiled
 def _set_default_font(
-    document: Document, font_name: str = "Times New Roman", size_pt: int = 12
+    document: Document, font_name: str = "Times New Roman", size_pt: int = 12, compact: bool = False
 ) -> None:
+    from docx.oxml.ns import qn
+
     style = document.styles["Normal"]
     font = style.font
     font.name = font_name
@@ -41,7 +105,11 @@ def _set_default_font(
 
     # Apply to heading styles too
     for heading in ["Heading 1", "Heading 2", "Heading 3", "Heading 4"]:
-        if heading in document.styles:
+        if heading in document.styles and compact:
+            # Headings are based on Normal: without their theme fonts they inherit it.
+            r_pr = document.styles[heading].element.rPr
+            r_pr.remove(r_pr.rFonts)
+        elif heading in document.styles:
             h = document.styles[heading].font
             h.name = font_name
             r_fonts_h = document.styles[heading].element.rPr.rFonts
@@ -52,6 +120,14 @@ def _set_default_font(
 
 
 def _add_page_number_footer(document: Document) -> None:
+    if isinstance(document, DocumentSink):
+        document.add_page_number_footer()
+        return
+
+    from docx.enum.text import WD_ALIGN_PARAGRAPH
+    from docx.oxml import OxmlElement
+    from docx.oxml.ns import qn
+
     section = document.sections[0]
     footer = section.footer
     p = footer.paragraphs[0] if footer.paragraphs else footer.add_paragraph()
@@ -78,38 +154,121 @@ def _add_page_number_footer(document: Document) -> None:
     run._r.append(fld_end)
 
 
-def _add_toc(document: Document) -> None:
-    document.add_paragraph("Table of Contents").style = "Heading 1"
+def _add_paragraph(document: Document, text: str = "", style: str | None = None):
+    # python-docx resolves a style name by scanning every style element for the
+    # type's default on each call (most of a warm build); the ids are known, so
+    # set w:pStyle directly.
+    if style is None or isinstance(document, DocumentSink):
+        return document.add_paragraph(text, style=style)
+    p = document.add_paragraph(text)
+    p._p.style = _ooxml_stream.STYLE_IDS[style]
+    return p
+
+
+def _append_xml(document: Document, paragraph, xml: str, text: str = "") -> None:
+    # Appends one WordprocessingML element (w:/r:/wp: prefixes, no namespace
+    # declarations) to a paragraph of either backend; text is what it displays.
+    if isinstance(document, DocumentSink):
+        paragraph.add_raw(xml, text)
+        return
+    from docx.oxml import parse_xml
+    from docx.oxml.ns import nsdecls
+
+    prefixes = [p for p in ("w", "r", "wp") if p == "w" or re.search(rf"\b{p}:", xml)]
+    paragraph._p.append(parse_xml(re.sub(r"^<([\w:]+)", rf"<\1 {nsdecls(*prefixes)}", xml, count=1)))
+
+
+def _field_runs(instr: str) -> tuple[list[str], str]:
+    # Opening runs (begin, instruction, separate) and closing run of a complex field.
+    begin = [
+        '<w:r><w:fldChar w:fldCharType="begin"/></w:r>',
+        f'<w:r><w:instrText xml:space="preserve"> {escape(instr)} </w:instrText></w:r>',
+        '<w:r><w:fldChar w:fldCharType="separate"/></w:r>',
+    ]
+    return begin, '<w:r><w:fldChar w:fldCharType="end"/></w:r>'
+
+
+def _add_toc(document: Document, entries: list[tuple] | None = None) -> None:
+    _add_paragraph(document, "Table of Contents", "Heading 1")
+
+    instr = 'TOC \\o "1-3" \\h \\z \\u'
+    if entries:
+        # Populated at build time: the TOC field's cached result is one "toc N"
+        # paragraph per heading, hyperlinked to its bookmark, with the page
+        # number from the layout simulation in a PAGEREF field. Word shows it
+        # as-is and "Update Table" still works.
+        begin, end = _field_runs(instr)
+        for i, (level, title, (_, anchor), page) in enumerate(entries):
+            p = _add_paragraph(document, style=f"toc {level}")
+            if i == 0:
+                for run in begin:
+                    _append_xml(document, p, run)
+            ref_begin, ref_end = _field_runs(f"PAGEREF {anchor} \\h")
+            _append_xml(
+                document,
+                p,
+                f'<w:hyperlink w:anchor="{anchor}" w:history="1">'
+                f"<w:r><w:t>{escape(title)}</w:t></w:r><w:r><w:tab/></w:r>"
+                f"{''.join(ref_begin)}<w:r><w:t>{page}</w:t></w:r>{ref_end}</w:hyperlink>",
+                f"{title}\t{page}",
+            )
+            if i == len(entries) - 1:
+                _append_xml(document, p, end)
+        return
 
     p = document.add_paragraph()
     # TOC field (Word will render after: References → Update Table)
+    if isinstance(document, DocumentSink):
+        p.add_simple_field(instr)
+        return
+    from docx.oxml import OxmlElement
+    from docx.oxml.ns import qn
+
     fld = OxmlElement("w:fldSimple")
-    fld.set(qn("w:instr"), 'TOC \\o "1-3" \\h \\z \\u')
+    fld.set(qn("w:instr"), instr)
     p._p.append(fld)
 
 
-def _h1(document: Document, title: str) -> None:
-    document.add_paragraph(title).style = "Heading 1"
+def _heading(document: Document, title: str, level: int, anchor: tuple[int, str] | None) -> None:
+    if anchor is None:
+        _add_paragraph(document, title, f"Heading {level}")
+        return
+    # Bookmarked (id, name) so the build-time TOC can link to it.
+    bid, name = anchor
+    p = _add_paragraph(document, style=f"Heading {level}")
+    _append_xml(document, p, f'<w:bookmarkStart w:id="{bid}" w:name="{name}"/>')
+    p.add_run(title)
+    _append_xml(document, p, f'<w:bookmarkEnd w:id="{bid}"/>')
+
+
+def _h1(document: Document, title: str, anchor: tuple[int, str] | None = None) -> None:
+    _heading(document, title, 1, anchor)
 
 
-def _h2(document: Document, title: str) -> None:
-    document.add_paragraph(title).style = "Heading 2"
+def _h2(document: Document, title: str, anchor: tuple[int, str] | None = None) -> None:
+    _heading(document, title, 2, anchor)
 
 
-def _h3(document: Document, title: str) -> None:
-    document.add_paragraph(title).style = "Heading 3"
+def _h3(document: Document, title: str, anchor: tuple[int, str] | None = None) -> None:
+    _heading(document, title, 3, anchor)
 
 
 def _para(document: Document, text: str) -> None:
     document.add_paragraph(text)
 
 
+@_profiled
 def _bullets(document: Document, items: list[str]) -> None:
     for it in items:
-        document.add_paragraph(it, style="List Bullet")
+        _add_paragraph(document, it, "List Bullet")
 
 
+@_profiled
 def _codeblock(document: Document, code: str) -> None:
+    if "Code" in document.styles:
+        # --compact: Consolas 10pt is defined once, in the "Code" paragraph style.
+        _add_paragraph(document, code, "Code")
+        return
     # Use a monospaced run inside Normal paragraph; still Times New Roman elsewhere.
     p = document.add_paragraph()
     run = p.add_run(code)
@@ -117,14 +276,49 @@ def _codeblock(document: Document, code: str) -> None:
     run.font.size = Pt(10)
 
 
+# python-docx document part -> {image file: relationship id}, see _figure().
+_IMAGE_RIDS: WeakKeyDictionary = WeakKeyDictionary()
+
+
+@_profiled
+def _figure(document: Document, figure: dict) -> None:
+    # figure: a "figure" block completed by _expand_figure_blocks() with the
+    # processed image file, its display size in EMU and its number.
+    center = _center(document)
+    p = _add_paragraph(document)
+    p.alignment = center
+    width, height = figure["size"]
+    if isinstance(document, DocumentSink):
+        document.add_picture(p, Path(figure["file"]), width, height, figure["number"])
+    else:
+        # python-docx's get_or_add_image() rehashes every stored image to find a
+        # duplicate and Run.add_picture() rescans every id in the document, both
+        # per picture. Cache files are already unique by content, so each file
+        # becomes an image part once and the run is written directly.
+        rids = _IMAGE_RIDS.setdefault(document.part, {})
+        if figure["file"] not in rids:
+            from docx.image.image import Image
+            from docx.opc.constants import RELATIONSHIP_TYPE as RT
+
+            part = document.part.package.image_parts._add_image_part(Image.from_file(figure["file"]))
+            rids[figure["file"]] = document.part.relate_to(part, RT.IMAGE)
+        name = Path(figure["file"]).name
+        _append_xml(document, p, drawing_xml(rids[figure["file"]], width, height, figure["number"], name))
+    if figure.get("caption"):
+        caption = document.add_paragraph(f"Figure {figure['number']}. {figure['caption']}")
+        caption.alignment = center
+
+
 def _page_break(document: Document) -> None:
     document.add_page_break()
 
 
-def _pad_pages(document: Document, paragraphs: int) -> None:
+@_profiled
+def _pad_pages(document: Document, paragraphs: int, scale: float | None = None) -> None:
     # Adds structured elaboration text so the report approaches the requested length.
     # The content is intentionally written as “documentation style” narrative.
-    paragraphs = max(0, int(paragraphs * PADDING_SCALE))
+    scale = PADDING_SCALE if scale is None else scale
+    paragraphs = max(0, int(paragraphs * scale))
     if paragraphs == 0:
         return
 
@@ -153,455 +347,992 @@ def _pad_pages(document: Document, paragraphs: int) -> None:
         document.add_paragraph(f"{blocks[i % len(blocks)]} (Elaboration {i+1}.)")
 
 
-def build_report(out_path: Path) -> None:
-    doc = Document()
-    _set_default_font(doc, "Times New Roman", 12)
+def _setup_document(document: Document) -> None:
+    # Page setup and page-number footer shared by every build.
+    section = document.sections[0]
+    if not isinstance(document, DocumentSink):
+        from docx.enum.section import WD_ORIENTATION
+
+        section.orientation = WD_ORIENTATION.PORTRAIT  # the sinks are always portrait
+    section.left_margin = MARGIN
+    section.right_margin = MARGIN
+    section.top_margin = MARGIN
+    section.bottom_margin = MARGIN
+    _add_page_number_footer(document)
+
+
+def _add_toc_styles(document: Document) -> None:
+    # Word's built-in "toc 1".."toc 3" (styleIds TOC1..TOC3) for the build-time
+    # TOC; the python-docx default template does not define them.
+    from docx.enum.style import WD_STYLE_TYPE
+    from docx.enum.text import WD_TAB_ALIGNMENT, WD_TAB_LEADER
+
+    for level in (1, 2, 3):
+        style = document.styles.add_style(f"toc {level}", WD_STYLE_TYPE.PARAGRAPH)
+        style.style_id = f"TOC{level}"
+        style.base_style = document.styles["Normal"]
+        fmt = style.paragraph_format
+        fmt.space_after = Pt(5)
+        fmt.left_indent = Pt(11 * (level - 1))
+        fmt.tab_stops.add_tab_stop(Pt(467.5), WD_TAB_ALIGNMENT.RIGHT, WD_TAB_LEADER.DOTS)
+
+
+def _compact_template(document: Document) -> None:
+    # --compact: a "Code" paragraph style instead of direct run formatting, only
+    # the styles the report can reference, and none of the optional parts.
+    from docx.enum.style import WD_STYLE_TYPE
+    from docx.oxml.ns import qn
+
+    code = document.styles.add_style("Code", WD_STYLE_TYPE.PARAGRAPH)
+    code.base_style = document.styles["Normal"]
+    code.quick_style = True
+    code.font.name = "Consolas"
+    code.font.size = Pt(10)
+
+    styles = document.styles.element
+    by_id = {el.get(qn("w:styleId")): el for el in styles.iterchildren(qn("w:style"))}
+    todo = [sid for sid, el in by_id.items() if el.get(qn("w:default")) == "1"]
+    todo += _ooxml_stream.STYLE_IDS.values()
+    keep = set()
+    while todo:
+        sid = todo.pop()
+        if sid in keep or sid not in by_id:
+            continue
+        keep.add(sid)
+        for tag in ("w:basedOn", "w:next", "w:link"):
+            ref = by_id[sid].find(qn(tag))
+            if ref is not None:
+                todo.append(ref.get(qn("w:val")))
+    for sid, el in by_id.items():
+        if sid not in keep:
+            styles.remove(el)
+    latent = styles.find(qn("w:latentStyles"))
+    if latent is not None:
+        styles.remove(latent)
+
+    # Parts that are no longer related to anything are not written by save().
+    for rels in (document.part.rels, document.part.package.rels):
+        for rid, rel in list(rels.items()):
+            if rel.reltype.endswith(_OPTIONAL_RELS):
+                rels.pop(rid)
+
+
+# Styled python-docx base templates (default font, page setup, footer) as .docx
+# bytes, keyed by compact mode. Prepared once per process, or handed to batch
+# workers by the parent.
+_BASE_TEMPLATES: dict[bool, bytes] = {}
+
+
+def base_template(compact: bool = False) -> bytes:
+    if compact not in _BASE_TEMPLATES:
+        import docx
+
+        doc = docx.Document()
+        _set_default_font(doc, "Times New Roman", 12, compact)
+        _setup_document(doc)
+        _add_toc_styles(doc)
+        if compact:
+            _compact_template(doc)
+        buf = io.BytesIO()
+        doc.save(buf)
+        _BASE_TEMPLATES[compact] = buf.getvalue()
+    return _BASE_TEMPLATES[compact]
+
+
+def _save_repacked(
+    document: Document, out_path: Path, compression: str, date_time: tuple[int, ...] | None = None
+) -> None:
+    # python-docx always writes ZIP_DEFLATED at the default level and stamps
+    # entries with the current time; other --compression settings and pinned
+    # timestamps (date_time) re-pack its output.
+    import zipfile
+
+    method, level = _ooxml_stream.COMPRESSION[compression]
+    buf = io.BytesIO()
+    document.save(buf)
+    with zipfile.ZipFile(buf) as src, zipfile.ZipFile(out_path, "w", method, compresslevel=level) as dst:
+        for info in src.infolist():
+            name = info.filename
+            if date_time is not None:
+                name = _ooxml_stream.zip_member(name, compression, date_time)
+            dst.writestr(name, src.read(info))
+
+
+def source_date_epoch() -> int:
+    # Pinned build time of a reproducible build: $SOURCE_DATE_EPOCH
+    # (reproducible-builds.org), else the time of the last commit.
+    epoch = os.environ.get("SOURCE_DATE_EPOCH")
+    if epoch is None:
+        import subprocess
+
+        git = ["git", "-C", str(ROOT), "log", "-1", "--format=%ct"]
+        try:
+            epoch = subprocess.run(git, capture_output=True, text=True, check=True).stdout
+        except (OSError, subprocess.CalledProcessError) as e:
+            raise ValueError("no SOURCE_DATE_EPOCH and no git commit to take the build time from") from e
+    try:
+        return int(epoch)
+    except ValueError:
+        raise ValueError(f"SOURCE_DATE_EPOCH must be whole seconds since the epoch, not {epoch!r}") from None
+
+
+def _publish(package: memoryview, out_path: Path) -> tuple[str, bool]:
+    # Writes a package built in memory to out_path unless out_path already has
+    # the same bytes; returns (sha256, unchanged). An unchanged output is not
+    # written at all, so its mtime stays and syncs, uploads and indexers skip it.
+    digest = hashlib.sha256(package).hexdigest()
+    if out_path.is_file() and out_path.stat().st_size == len(package):
+        with open(out_path, "rb") as f:
+            if hashlib.file_digest(f, "sha256").hexdigest() == digest:
+                return digest, True
+    # Written next to it and renamed, so readers never see a partial report.
+    tmp = out_path.with_name(f".{out_path.name}.{os.getpid()}.tmp")
+    try:
+        tmp.write_bytes(package)
+        os.replace(tmp, out_path)
+    finally:
+        tmp.unlink(missing_ok=True)
+    return digest, False
+
+
+def build_report(
+    out_path: Path,
+    writer: str = "docx",
+    padding_scale: float | None = None,
+    cache_dir: Path | None = None,
+    variant: dict | None = None,
+    compact: bool = False,
+    compression: str = "deflate",
+    toc: str = "static",
+    save_threads: int | None = None,
+    prune_cache: bool = True,
+    jobs: int | None = None,
+    epoch: int | None = None,
+) -> dict:
+    # writer="docx" builds the whole document in memory with python-docx;
+    # writer="stream" writes word/document.xml paragraph by paragraph (see _ooxml_stream.py).
+    # save_threads packages a python-docx build with the pipelined writer of
+    # _docx_package.py (0: one thread per CPU) instead of Document.save(); on a
+    # python-docx version it does not support, Document.save() is used.
+    # toc="static" writes the TOC populated with estimated page numbers;
+    # toc="field" leaves an empty TOC field for Word to fill in.
+    # prune_cache: drop the cached fragments this build did not use (batch
+    # builds share the cache and prune once, in build_variants()).
+    # jobs: stream writer only; render sections in that many worker processes
+    # (0: one per CPU) and merge their fragments in order (see _write_sections()).
+    # With a static TOC the workers lay their sections out too, so the TOC page
+    # numbers need no serial layout pass (see _start_sections()).
+    # epoch (see source_date_epoch()) makes the build reproducible: the cover
+    # date and every zip timestamp come from it, and the package is built in
+    # memory and hashed; out_path is only written when its bytes differ
+    # (stats["unchanged"]).
+    if toc not in ("static", "field"):
+        raise ValueError(f"unknown toc mode {toc!r}")
+    if compression not in _ooxml_stream.COMPRESSION:
+        raise ValueError(f"unknown compression {compression!r}")
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    date_time = None
+    target = out_path
+    if epoch is not None:
+        date_time = _ooxml_stream.zip_date_time(epoch)
+        if "date_line" not in (variant or {}):
+            day = datetime.fromtimestamp(epoch, timezone.utc).date()
+            variant = {**(variant or {}), "date_line": day.strftime(DATE_FORMAT)}
+        target = io.BytesIO()
+    stats = _build_to(
+        target, writer, padding_scale, cache_dir, variant, compact, compression, toc, save_threads, jobs, date_time
+    )
+    if epoch is not None:
+        stats["sha256"], stats["unchanged"] = _publish(target.getbuffer(), out_path)
+    if prune_cache and "fragments" in stats:
+        stats["pruned"] = prune_fragments(cache_dir, stats["fragments"])
+    return stats
+
+
+def _build_to(
+    out_path: Path | BinaryIO,
+    writer: str,
+    padding_scale: float | None,
+    cache_dir: Path | None,
+    variant: dict | None,
+    compact: bool,
+    compression: str,
+    toc: str,
+    save_threads: int | None,
+    jobs: int | None,
+    date_time: tuple[int, ...] | None,
+) -> dict:
+    if writer == "stream":
+        doc = StreamingDocument(out_path, "Times New Roman", 12, compact, compression, date_time)
+        _setup_document(doc)
+    else:
+        import docx
+
+        doc = docx.Document(io.BytesIO(base_template(compact)))
+
+    padding_scale = PADDING_SCALE if padding_scale is None else padding_scale
+    # Resolved once: the layout pass and the write share the expanded spec.
+    sections = _report_sections(variant)
+    with ExitStack() as stack:
+        plan = None
+        if writer == "stream" and (cache_dir is not None or jobs is not None):
+            # With jobs and a static TOC the workers also lay their sections out,
+            # so the TOC page numbers come from the parallel pass.
+            layout = toc == "static" and jobs is not None
+            plan = _start_sections(stack, compact, padding_scale, cache_dir, sections, jobs, layout)
+        toc_pages = None
+        if toc == "static":
+            with _span("TOC pagination", doc):
+                global _PROFILER
+                # The in-memory layout pass is one phase, not a second set of sections.
+                profiler, _PROFILER = _PROFILER, None
+                try:
+                    section_layouts = None
+                    if plan is not None and plan["layouts"] is not None:
+                        section_layouts = [future.result() for future in plan["layouts"]]
+                    toc_pages = toc_page_numbers(padding_scale, variant, sections, compact, section_layouts)
+                finally:
+                    _PROFILER = profiler
+        stats = _write_report(doc, padding_scale, variant, toc_pages, sections, plan)
+    pipelined = None
+    if writer == "docx" and (save_threads is not None or date_time is not None):
+        import _docx_package
+
+        pipelined = _docx_package.save_pipelined if _docx_package.supported() else None
+    t0 = time.perf_counter()
+    with _span("doc.save", doc):
+        if pipelined is not None:
+            # A reproducible build uses the pipelined writer for its pinned
+            # timestamps even without --save-threads (then on one thread).
+            save = pipelined(doc, out_path, compression, save_threads if save_threads is not None else 1, date_time)
+            if save_threads is not None:
+                stats["save"] = save
+        elif writer == "stream" or (compression == "deflate" and date_time is None):
+            doc.save(out_path)
+        else:
+            _save_repacked(doc, out_path, compression, date_time)
+    stats["save_seconds"] = time.perf_counter() - t0
+    return stats
+
+
+def write_preview(out: TextIO, fmt: str, padding_scale: float | None = None, variant: dict | None = None) -> None:
+    # HTML/Markdown preview of the same paragraph stream (see _preview.py).
+    from _preview import PreviewDocument
+
+    doc = PreviewDocument(out, fmt, _cover(variant)["project_name"])
+    _setup_document(doc)
+    _write_report(doc, PADDING_SCALE if padding_scale is None else padding_scale, variant=variant)
+    doc.close()
+
+
+def write_chunks(
+    out: TextIO, max_tokens: int = 300, overlap: int = 50, padding_scale: float = 0.0, variant: dict | None = None
+) -> list[str]:
+    # JSONL context chunks of the report sections (see _chunks.py); the cover and
+    # TOC are left out. Returns the chunk ids in order.
+    from _chunks import ChunkDocument
+
+    doc = ChunkDocument(out, max_tokens, overlap)
+    _write_sections(doc, padding_scale, _report_sections(variant))
+    return doc.close()
+
+
+def measure_layout(
+    padding_scale: float,
+    variant: dict | None = None,
+    toc: bool = True,
+    sections: list[dict] | None = None,
+    compact: bool = False,
+    section_layouts: list | None = None,
+):
+    # Lays the report out in memory (no XML, no zip) with the layout simulator.
+    # With toc, the populated TOC is included with placeholder page numbers:
+    # they sit at a right tab, so their digits do not change its length.
+    # sections: the variant's _report_sections(), when the caller already has them.
+    # section_layouts: one Simulation per section, already laid out elsewhere
+    # (the section workers, see _start_sections()); only the cover and TOC are
+    # rendered here then. Records go straight into the simulator, so memory
+    # stays flat with the scale.
+    from _layout_sim import ParaSpec, Simulation
+
+    sim = Simulation()
+    doc = RecordingDocument(lambda record: sim.add(ParaSpec(*record)), compact)
+    _setup_document(doc)
+    if sections is None:
+        sections = _report_sections(variant)
+    toc_pages = [0] * len(_toc_entries(sections)) if toc else None
+    if section_layouts is None:
+        _write_report(doc, padding_scale, variant=variant, toc_pages=toc_pages, sections=sections)
+        doc.close()
+    else:
+        _write_front_matter(doc, variant, sections, toc_pages)
+        doc.close()
+        for section_sim in section_layouts:
+            sim.extend(section_sim)
+    return sim.layout()
+
+
+def toc_page_numbers(
+    padding_scale: float,
+    variant: dict | None = None,
+    sections: list[dict] | None = None,
+    compact: bool = False,
+    section_layouts: list | None = None,
+) -> list[int]:
+    # Estimated page of every section heading, in _toc_entries() order. They are
+    # the last headings of the layout; only the TOC's own title comes before.
+    if sections is None:
+        sections = _report_sections(variant)
+    n = len(_toc_entries(sections))
+    headings = measure_layout(padding_scale, variant, True, sections, compact, section_layouts).headings
+    return [h.page for h in headings[len(headings) - n :]]
+
+
+def solve_padding_scale(
+    target_pages: int, tol: float = 1e-3, variant: dict | None = None, toc: str = "static"
+) -> float:
+    # Smallest padding scale whose simulated length reaches target_pages with
+    # the given toc mode (a populated TOC is longer than an empty field).
+    # Length grows ~linearly with the scale, so start from the straight line
+    # through scale 0 and PADDING_SCALE, then bisect on the simulated layout.
+    sections = _report_sections(variant)
+
+    def pages(scale: float) -> int:
+        return measure_layout(scale, variant, toc=toc == "static", sections=sections).pages
+
+    base = pages(0.0)
+    if target_pages <= base:
+        return 0.0
+    ref = max(PADDING_SCALE, 0.1)
+    slope = max(pages(ref) - base, 1) / ref
+
+    lo, hi = 0.0, max((target_pages - base) / slope, tol)
+    while pages(hi) < target_pages:
+        lo, hi = hi, hi * 1.5
+    # The linear guess is usually within a few percent; narrow the bracket first.
+    probe = hi * 0.97
+    if probe > lo:
+        if pages(probe) >= target_pages:
+            hi = probe
+        else:
+            lo = probe
+    while hi - lo > tol * hi:
+        mid = (lo + hi) / 2
+        if pages(mid) >= target_pages:
+            hi = mid
+        else:
+            lo = mid
+    return hi
+
+
+def load_sections(path: Path = SECTIONS_PATH) -> list[dict]:
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _expand_index_blocks(sections: list[dict]) -> list[dict]:
+    # {"index": name} blocks (the inventory appendices) are generated from the
+    # incremental source index before rendering, so section cache keys cover them.
+    if not any("index" in block for s in sections for block in s["blocks"]):
+        return sections
+    from _source_index import report_blocks, scan
+
+    files, _ = scan()
+    return [
+        {
+            **s,
+            "blocks": [
+                b
+                for block in s["blocks"]
+                for b in (report_blocks(files, block["index"]) if "index" in block else [block])
+            ],
+        }
+        for s in sections
+    ]
+
+
+def _figure_size(figure: dict, image: dict) -> list[int]:
+    # Display size in EMU: the requested share of the text column ("width",
+    # default 1.0), but never larger than the processed pixels at IMAGE_DPI.
+    from _images import IMAGE_DPI
+
+    width = min(int(CONTENT_WIDTH * figure.get("width", 1.0)), image["width_px"] * EMU_PER_INCH // IMAGE_DPI)
+    height = width * image["height_px"] // image["width_px"]
+    if height > MAX_FIGURE_HEIGHT:
+        width, height = width * MAX_FIGURE_HEIGHT // height, MAX_FIGURE_HEIGHT
+    return [width, height]
 
-    # Page setup
-    section = doc.sections[0]
-    section.orientation = WD_ORIENTATION.PORTRAIT
-    section.left_margin = Inches(1)
-    section.right_margin = Inches(1)
-    section.top_margin = Inches(1)
-    section.bottom_margin = Inches(1)
 
+def _expand_figure_blocks(sections: list[dict]) -> list[dict]:
+    # {"figure": {"path": ..., "caption": ..., "width": ...}} blocks get their
+    # processed image (see _images.py), display size and number before
+    # rendering, so section cache keys change when an image does.
+    if not any("figure" in block for s in sections for block in s["blocks"]):
+        return sections
+    from _images import IMAGE_DPI, prepare
+
+    figures = [block["figure"] for s in sections for block in s["blocks"] if "figure" in block]
+    images, _ = prepare([ROOT / f["path"] for f in figures], CONTENT_WIDTH * IMAGE_DPI // EMU_PER_INCH)
+    number = 0
+
+    def complete(figure: dict) -> dict:
+        nonlocal number
+        number += 1
+        image = images[ROOT / figure["path"]]
+        return {**figure, "file": image["file"], "size": _figure_size(figure, image), "number": number}
+
+    return [
+        {**s, "blocks": [{"figure": complete(b["figure"])} if "figure" in b else b for b in s["blocks"]]}
+        for s in sections
+    ]
+
+
+def _report_sections(variant: dict | None = None) -> list[dict]:
+    sections = load_sections(Path((variant or {}).get("sections", SECTIONS_PATH)))
+    return _expand_figure_blocks(_expand_index_blocks(sections))
+
+
+def _anchor(section_index: int, heading_index: int) -> tuple[int, str]:
+    # Bookmark (id, name) of a heading. Derived from its position in the spec,
+    # so a cached section fragment always carries the same bookmarks.
+    return section_index * 1000 + heading_index, f"_Toc{section_index:03d}{heading_index:03d}"
+
+
+def _toc_entries(sections: list[dict]) -> list[tuple[int, str, tuple[int, str]]]:
+    # (level, title, anchor) of every heading _render_section() will emit.
+    entries = []
+    for i, section in enumerate(sections):
+        entries.append((1, section["title"], _anchor(i, 0)))
+        headings = 0
+        for block in section["blocks"]:
+            for kind, value in block.items():
+                if kind in ("h2", "h3"):
+                    headings += 1
+                    entries.append((int(kind[1]), value, _anchor(i, headings)))
+    return entries
+
+
+_BLOCK_WRITERS = {"h2": _h2, "h3": _h3, "para": _para, "bullets": _bullets, "code": _codeblock, "figure": _figure}
+
+
+def _render_section(document: Document, section: dict, padding_scale: float, index: int) -> None:
+    # A section node is {"title": ..., "blocks": [{kind: value}, ...]}; see report_sections.json.
+    _h1(document, section["title"], _anchor(index, 0))
+    headings = 0
+    for block in section["blocks"]:
+        if len(block) != 1:
+            raise ValueError(f"{section['title']}: block must have exactly one key: {block}")
+        ((kind, value),) = block.items()
+        if kind in ("h2", "h3"):
+            headings += 1
+            _BLOCK_WRITERS[kind](document, value, _anchor(index, headings))
+        elif kind == "pad":
+            _pad_pages(document, value, padding_scale)
+        elif kind == "page_break":
+            _page_break(document)
+        elif kind in _BLOCK_WRITERS:
+            _BLOCK_WRITERS[kind](document, value)
+        else:
+            raise ValueError(f"{section['title']}: unknown block type {kind!r}")
+
+
+@lru_cache(maxsize=None)
+def _renderer_digest() -> str:
+    # Cached fragments depend on the rendering code as well as on the spec.
+    h = hashlib.sha256()
+    for p in (Path(__file__), Path(_ooxml_stream.__file__)):
+        h.update(p.read_bytes())
+    return h.hexdigest()
+
+
+def _section_key(section: dict, padding_scale: float, compact: bool, index: int) -> str:
+    # index: heading bookmarks are numbered by section position.
+    payload = json.dumps([section, padding_scale, compact, index, _renderer_digest()], sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+# Cached section fragments are named <sha256 of _section_key()>.xml.
+_FRAGMENT_RE = re.compile(r"[0-9a-f]{64}\.xml")
+
+
+def prune_fragments(cache_dir: Path, keep: Iterable[str]) -> int:
+    # Deletes cached fragments not named in keep; returns how many went. Every
+    # edit of a section, the renderer or the padding scale orphans fragments.
+    keep = set(keep)
+    removed = 0
+    for path in cache_dir.glob("*.xml"):
+        if _FRAGMENT_RE.fullmatch(path.name) and path.name not in keep:
+            path.unlink(missing_ok=True)
+            removed += 1
+    return removed
+
+
+def _render_fragment(
+    section: dict, padding_scale: float, compact: bool, index: int, path: Path | None, layout: bool = False
+):
+    # One section into a standalone body XML fragment (see FragmentDocument);
+    # path None when the fragment is cached and only the layout is wanted.
+    # With layout, returns the section's Simulation for toc_page_numbers().
+    sim = None
+    emit = None
+    if layout:
+        from _layout_sim import ParaSpec, Simulation
+
+        sim = Simulation()
+        emit = lambda record: sim.add(ParaSpec(*record))  # noqa: E731
+    frag_doc = RecordingDocument(emit, compact) if path is None else FragmentDocument(path, compact, emit)
+    _render_section(frag_doc, section, padding_scale, index)
+    frag_doc.close()
+    if sim is not None:
+        sim.flush()  # only per-paragraph scalars go back to the parent
+    return sim
+
+
+def _init_section_worker() -> None:
+    # Section workers are forked mid-build; a --profile profiler stays in the parent.
+    global _PROFILER
+    _PROFILER = None
+
+
+def _start_sections(
+    stack: ExitStack,
+    compact: bool,
+    padding_scale: float,
+    cache_dir: Path | None,
+    sections: list[dict],
+    jobs: int | None,
+    layout: bool = False,
+) -> dict:
+    # Fragment plan of a streaming build with a section cache and/or worker
+    # processes, made before the TOC is written: each section's fragment file,
+    # the ones not cached, and the pool futures rendering them (jobs: that many
+    # workers, 0: one per CPU). With layout (needs jobs), every section,
+    # cached or not, is also laid out in the pool; plan["layouts"] then holds
+    # one future Simulation per section. The pool and a cache-less fragment
+    # directory live as long as stack.
+    if cache_dir is None:
+        # Parallel rendering without the cache: the fragments only live for this build.
+        import tempfile
+
+        frag_dir = Path(stack.enter_context(tempfile.TemporaryDirectory(prefix="report-sections-")))
+    else:
+        frag_dir = cache_dir
+        frag_dir.mkdir(parents=True, exist_ok=True)
+    fragments = [
+        frag_dir / f"{_section_key(section, padding_scale, compact, index)}.xml"
+        for index, section in enumerate(sections)
+    ]
+    missing = {index for index, fragment in enumerate(fragments) if not fragment.exists()}
+    plan = {"fragments": fragments, "missing": missing, "pending": {}, "layouts": None, "cached": cache_dir is not None}
+    todo = range(len(sections)) if layout else sorted(missing)
+    if jobs is not None and todo:
+        from concurrent.futures import ProcessPoolExecutor
+
+        workers = min(jobs or os.cpu_count() or 1, len(todo))
+        pool = stack.enter_context(ProcessPoolExecutor(workers, initializer=_init_section_worker))
+        futures = [
+            pool.submit(
+                _render_fragment,
+                sections[index],
+                padding_scale,
+                compact,
+                index,
+                fragments[index] if index in missing else None,
+                layout,
+            )
+            for index in todo
+        ]
+        plan["pending"] = {index: future for index, future in zip(todo, futures) if index in missing}
+        if layout:
+            plan["layouts"] = futures
+    return plan
+
+
+def _write_sections(doc: Document, padding_scale: float, sections: list[dict], plan: dict | None = None) -> dict:
+    # Without a plan (see _start_sections()) every section is rendered straight
+    # into doc. With one (streaming writer), each section's body XML is kept
+    # under its content hash and spliced back in; with a cache dir it is reused
+    # unchanged on the next build, and stats["fragments"] lists the fragment
+    # files the build used. Sections rendered by worker processes are appended
+    # in order as they finish. Bookmarks come from the section position,
+    # picture ids from the figure numbers and media rIds from the image content,
+    # so the merged document is the same as a sequential build's.
+    stats = {"rendered": 0, "reused": 0}
+    if plan is None:
+        for index, section in enumerate(sections):
+            with _span(section["title"], doc, "section"):
+                _render_section(doc, section, padding_scale, index)
+                stats["rendered"] += 1
+        return stats
+    if plan["cached"]:
+        stats["fragments"] = []
+    pending = plan["pending"]
+    for index, (section, fragment) in enumerate(zip(sections, plan["fragments"])):
+        with _span(section["title"], doc, "section"):
+            if index in pending:
+                pending.pop(index).result()
+                stats["rendered"] += 1
+            elif index in plan["missing"]:
+                _render_fragment(section, padding_scale, doc.compact, index, fragment)
+                stats["rendered"] += 1
+            else:
+                stats["reused"] += 1
+            doc.append_fragment(fragment)
+            if "fragments" in stats:
+                stats["fragments"].append(fragment.name)
+            for block in section["blocks"]:
+                if "figure" in block:
+                    doc.add_media(Path(block["figure"]["file"]))
+    return stats
+
+
+def _cover(variant: dict | None) -> dict:
+    # Cover-page fields; a batch variant may override any of them.
+    cover = {
+        "project_name": PROJECT_NAME,
+        "report_title": REPORT_TITLE,
+        "report_subtitle": REPORT_SUBTITLE,
+        "org_line": ORG_LINE,
+        "author_line": AUTHOR_LINE,
+        "date_line": DATE_LINE,
+    }
+    cover.update((k, v) for k, v in (variant or {}).items() if k in cover)
+    return cover
+
+
+def _center(document: Document):
+    # python-docx takes its enum; the sinks take the OOXML value.
+    if isinstance(document, DocumentSink):
+        return "center"
+    from docx.enum.text import WD_ALIGN_PARAGRAPH
+
+    return WD_ALIGN_PARAGRAPH.CENTER
+
+
+def _write_report(
+    doc: Document,
+    padding_scale: float,
+    variant: dict | None = None,
+    toc_pages: list[int] | None = None,
+    sections: list[dict] | None = None,
+    plan: dict | None = None,
+) -> dict:
+    # toc_pages: page of each _toc_entries() heading for a populated TOC, or
+    # None for an empty TOC field. sections defaults to _report_sections(variant).
+    # plan: fragment plan of a streaming build (see _write_sections()).
+    if sections is None:
+        sections = _report_sections(variant)
+    with _span("Cover and TOC", doc, "section"):
+        _write_front_matter(doc, variant, sections, toc_pages)
+    return _write_sections(doc, padding_scale, sections, plan)
+
+
+def _write_front_matter(doc: Document, variant: dict | None, sections: list[dict], toc_pages: list[int] | None) -> None:
+    # Cover page and TOC, up to the page break before the first section.
+    cover = _cover(variant)
+    center = _center(doc)
     # Cover page
-    title = doc.add_paragraph(PROJECT_NAME)
-    title.style = "Title"
-    title.alignment = WD_ALIGN_PARAGRAPH.CENTER
+    title = _add_paragraph(doc, cover["project_name"], "Title")
+    title.alignment = center
 
-    sub = doc.add_paragraph(f"{REPORT_TITLE}\n{REPORT_SUBTITLE}")
-    sub.alignment = WD_ALIGN_PARAGRAPH.CENTER
+    sub = doc.add_paragraph(f"{cover['report_title']}\n{cover['report_subtitle']}")
+    sub.alignment = center
 
     doc.add_paragraph("")
-    meta = doc.add_paragraph(ORG_LINE)
-    meta.alignment = WD_ALIGN_PARAGRAPH.CENTER
-    meta2 = doc.add_paragraph(AUTHOR_LINE)
-    meta2.alignment = WD_ALIGN_PARAGRAPH.CENTER
-    meta3 = doc.add_paragraph(DATE_LINE)
-    meta3.alignment = WD_ALIGN_PARAGRAPH.CENTER
+    meta = doc.add_paragraph(cover["org_line"])
+    meta.alignment = center
+    meta2 = doc.add_paragraph(cover["author_line"])
+    meta2.alignment = center
+    meta3 = doc.add_paragraph(cover["date_line"])
+    meta3.alignment = center
 
     doc.add_paragraph("")
+    # A populated TOC (toc_pages) already carries its page numbers.
+    update = "use ‘Update Table’ for the Table of Contents and " if toc_pages is None else ""
     _para(
         doc,
         "Formatting note: This document is generated to use Times New Roman as the default font. "
-        "After opening in Microsoft Word, use ‘Update Table’ for the Table of Contents and verify page layout.",
+        f"After opening in Microsoft Word, {update}verify page layout.",
     )
 
-    _add_page_number_footer(doc)
     _page_break(doc)
 
     # TOC
-    _add_toc(doc)
+    entries = None
+    if toc_pages is not None:
+        entries = [(*e, page) for e, page in zip(_toc_entries(sections), toc_pages, strict=True)]
+    _add_toc(doc, entries)
     _page_break(doc)
 
-    # Executive Summary
-    _h1(doc, "1. Executive Summary")
-    _para(
-        doc,
-        "DocentDesk is an AI-powered museum companion designed to improve the visitor experience through an intelligent chatbot, "
-        "immersive 3D exploration, multilingual accessibility, and a ticketing/booking flow. The platform is organized as a modern "
-        "React + Vite frontend with Supabase integration, complemented by a Node.js/Express backend API that provides traditional REST endpoints.",
-    )
-    _bullets(
-        doc,
-        [
-            "Core value: Reduce friction for visitors (information discovery, navigation, event booking).",
-            "Operational value: Provide museums with scalable digital engagement (PWA, serverless deploy).",
-            "AI value: Conversational interface + voice interaction, tuned with museum context prompts.",
-        ],
-    )
-    _pad_pages(doc, 55)
-
-    # Need and Problem Statement
-    _h1(doc, "2. Need, Motivation, and Problem Statement")
-    _h2(doc, "2.1 Visitor Pain Points")
-    _bullets(
-        doc,
-        [
-            "Visitors often have limited time and need curated routes.",
-            "Static signage is insufficient for accessibility and multilingual needs.",
-            "Event discovery and booking can be cumbersome on-site.",
-            "Museums need scalable ways to answer repetitive questions.",
-        ],
-    )
-    _h2(doc, "2.2 Proposed Solution")
-    _para(
-        doc,
-        "DocentDesk provides a single interface that combines a conversational agent with interactive exhibits, event booking, and PWA delivery. "
-        "The chatbot becomes the primary user-facing orchestration layer that can route users to tours, ticketing, and information content.",
-    )
-    _pad_pages(doc, 55)
-
-    # System Overview
-    _h1(doc, "3. System Overview")
-    _h2(doc, "3.1 High-Level Architecture")
-    _codeblock(
-        doc,
-        "Frontend (React/Vite)\n"
-        "  - UI: shadcn/ui + Radix UI + Tailwind\n"
-        "  - 3D: Three.js + React Three Fiber\n"
-        "  - Chat widget: streaming SSE from Supabase Edge Function\n"
-        "  - Auth: Supabase Auth (with optional backend token support)\n"
-        "\nSupabase\n"
-        "  - Auth (frontend)\n"
-        "  - Edge Function: /functions/v1/chat (streams LLM output)\n"
-        "\nBackend API (Express)\n"
-        "  - REST endpoints: auth, artifacts, events, bookings, tours, feedback, chat\n"
-        "  - Chat (alternate): OpenAI chat.completions (model via OPENAI_MODEL)\n",
-    )
-    _h2(doc, "3.2 Frontend Routes and Key Screens")
-    _bullets(
-        doc,
-        [
-            "Landing/Home: primary marketing + entry points to tours and events.",
-            "Events: list + filters + booking wizard (client-side demo flow).",
-            "Virtual Tour: 3D experience with interaction hints (WASD + mouse controls).",
-            "Chatbot: floating assistant with voice input/output, quick actions, context injection.",
-        ],
-    )
-    _pad_pages(doc, 70)
-
-    # Tech Stack
-    _h1(doc, "4. Technology Stack")
-    _h2(doc, "4.1 Frontend")
-    _bullets(
-        doc,
-        [
-            "React 18 + TypeScript + Vite build tooling.",
-            "Tailwind CSS + shadcn/ui + Radix UI primitives.",
-            "TanStack React Query for data fetching patterns.",
-            "Three.js + React Three Fiber for 3D scenes.",
-            "i18next + react-i18next for internationalization.",
-            "PWA assets: manifest + service worker in public/.",
-        ],
-    )
-    _h2(doc, "4.2 Backend")
-    _bullets(
-        doc,
-        [
-            "Node.js (ESM) + Express.",
-            "Security: helmet, cors, rate limiting.",
-            "Auth: passport-google-oauth20 + JWT.",
-            "AI: OpenAI SDK (backend path) and Lovable AI Gateway (edge path).",
-            "Email: nodemailer.",
-            "QR: qrcode generation.",
-        ],
-    )
-    _h2(doc, "4.3 Data and Platform")
-    _bullets(
-        doc,
-        [
-            "Supabase for Auth and (planned/partial) PostgreSQL storage.",
-            "Backend also contains Mongoose models (legacy MongoDB approach) while migration docs describe a shift to Supabase.",
-            "Deployment: Vercel configuration present for frontend and backend.",
-        ],
-    )
-    _pad_pages(doc, 70)
-
-    # NLP and Chatbot
-    _h1(doc, "5. NLP, Conversational AI, and the Chatbot")
-    _h2(doc, "5.1 What NLP Means in This Project")
-    _para(
-        doc,
-        "In DocentDesk, NLP is primarily delivered through large language models (LLMs) that interpret free-form user questions and generate "
-        "natural language responses. The system also includes speech-to-text (STT) and text-to-speech (TTS) in the browser, enabling "
-        "voice conversations as an accessibility and convenience feature.",
-    )
-    _h2(doc, "5.2 Chatbot Model(s) Used")
-    _bullets(
-        doc,
-        [
-            "Primary (frontend as implemented): Supabase Edge Function calls Lovable AI Gateway with model: google/gemini-2.5-flash.",
-            "Alternate (backend API path): Express controller uses OpenAI chat.completions with model = OPENAI_MODEL (defaults to gpt-4).",
-            "Important: the current frontend code does not call /api/chat; it calls Supabase /functions/v1/chat.",
-        ],
-    )
-    _h2(doc, "5.3 Prompting and Context")
-    _para(
-        doc,
-        "Both chatbot implementations use a strong system prompt describing the museum role and a curated museum context. "
-        "The frontend additionally injects a language instruction system message so the assistant replies in the active i18n language.",
-    )
-    _h2(doc, "5.4 Streaming Responses")
-    _para(
-        doc,
-        "The chatbot UI reads a streamed Server-Sent Events (SSE) response and incrementally renders tokens. This improves perceived latency "
-        "and matches modern chat UX expectations.",
-    )
-    _h2(doc, "5.5 Voice Input/Output")
-    _bullets(
-        doc,
-        [
-            "Voice input: Browser SpeechRecognition/webkitSpeechRecognition (language code mapped from UI language).",
-            "Voice output: window.speechSynthesis with voice selection by language; speaking is disabled if no matching voice exists.",
-        ],
-    )
-    _pad_pages(doc, 95)
-
-    # Security
-    _h1(doc, "6. Security, Privacy, and Responsible AI")
-    _h2(doc, "6.1 API Security")
-    _bullets(
-        doc,
-        [
-            "Helmet for baseline HTTP hardening.",
-            "Rate limiting on /api routes.",
-            "JWT for session handling in backend flows.",
-            "Supabase Auth sessions for frontend-first flows.",
-        ],
-    )
-    _h2(doc, "6.2 Secrets Management")
-    _bullets(
-        doc,
-        [
-            "Never expose Supabase service role keys to the frontend.",
-            "LLM API keys are stored in environment variables (e.g., LOVABLE_API_KEY, OPENAI_API_KEY).",
-        ],
-    )
-    _h2(doc, "6.3 Responsible AI Considerations")
-    _para(
-        doc,
-        "The system prompt is the first layer of control. Additional production-grade protections typically include content filtering, "
-        "hallucination mitigation via retrieval (RAG) or verified sources, and user feedback loops.",
-    )
-    _pad_pages(doc, 55)
 
-    # Booking & Payments
-    _h1(doc, "7. Booking System and Payment Gateway")
-    _h2(doc, "7.1 Booking Wizard (Current Frontend Behavior)")
-    _para(
-        doc,
-        "The Events page contains sample events and a 5-step booking wizard. The payment step validates card-like inputs but explicitly "
-        "states that it is a demo and does not perform real charges. Confirmation generates a QR code and booking ID locally.",
-    )
-    _h2(doc, "7.2 Backend Booking APIs (Server-Side Capabilities)")
-    _para(
-        doc,
-        "The backend includes a booking controller that can create bookings, calculate totals, generate a QR code payload, update event seat "
-        "counts, and send confirmation emails. Payment fields exist in the booking model (method, status, paymentId), but a real payment provider "
-        "integration is not wired in the current code.",
-    )
-    _h2(doc, "7.3 How Payments Would Be Done (Recommended Stripe Design)")
-    _bullets(
-        doc,
-        [
-            "Client chooses tickets/add-ons → requests checkout session or payment intent from backend.",
-            "Backend creates Stripe PaymentIntent for the computed total and returns client_secret.",
-            "Frontend confirms card payment using Stripe Elements (PCI scope minimized).",
-            "Stripe webhook notifies backend of success/failure; backend marks booking paymentStatus and stores paymentId.",
-            "Chatbot can initiate checkout by collecting intent (event, quantity) and then deep-linking to checkout UI.",
-        ],
-    )
-    _h2(doc, "7.4 Payment Inside the Chatbot (Conversation-to-Checkout Flow)")
-    _para(
-        doc,
-        "To enable payment inside the chatbot without handling raw card details in chat, the recommended approach is to have the bot collect the "
-        "order details conversationally, then generate a secure payment link (Stripe Checkout Session URL) or open an embedded Stripe Elements panel. "
-        "The chatbot remains an orchestrator, while the payment UI remains compliant and isolated.",
-    )
-    _codeblock(
-        doc,
-        "Chat UX → Payment (safe pattern)\n"
-        "1) User: 'Book 2 adult tickets for Renaissance Exhibition'\n"
-        "2) Bot: Confirms date/time + price breakdown\n"
-        "3) Bot: Creates checkout session via backend\n"
-        "4) UI: Opens secure checkout link / embedded checkout\n"
-        "5) Webhook: Confirms payment → booking confirmed → QR generated\n",
-    )
-    _pad_pages(doc, 95)
+def load_manifest(path: Path) -> list[dict]:
+    # {"defaults": {...}, "variants": [{"name": ..., "out": ..., ...}, ...]}
+    # Variant keys: name, out, writer, padding_scale, target_pages, sections,
+    # compact, compression, toc, save_threads, reproducible and the cover fields of _cover(). Relative paths
+    # resolve against the manifest.
+    path = Path(path)
+    with open(path, encoding="utf-8") as f:
+        manifest = json.load(f)
+    variants = []
+    for v in manifest["variants"]:
+        v = {**manifest.get("defaults", {}), **v}
+        v["out"] = str(path.parent / v["out"])
+        if "sections" in v:
+            v["sections"] = str(path.parent / v["sections"])
+        variants.append(v)
+    return variants
+
+
+def _init_worker(templates: dict[bool, bytes]) -> None:
+    _BASE_TEMPLATES.update(templates)
+
+
+def _build_variant(variant: dict, cache_dir: Path | None = None) -> dict:
+    name = variant.get("name", variant["out"])
+    t0 = time.perf_counter()
+    try:
+        padding_scale = variant.get("padding_scale", PADDING_SCALE)
+        if variant.get("target_pages"):
+            padding_scale = solve_padding_scale(
+                variant["target_pages"], variant=variant, toc=variant.get("toc", "static")
+            )
+        stats = build_report(
+            Path(variant["out"]),
+            writer=variant.get("writer", "docx"),
+            padding_scale=padding_scale,
+            cache_dir=cache_dir,
+            variant=variant,
+            compact=variant.get("compact", False),
+            compression=variant.get("compression", "deflate"),
+            toc=variant.get("toc", "static"),
+            save_threads=variant.get("save_threads"),
+            prune_cache=False,
+            epoch=source_date_epoch() if variant.get("reproducible") else None,
+        )
+    except (OSError, ValueError, KeyError) as e:
+        return {"name": name, "error": f"{type(e).__name__}: {e}"}
+    return {"name": name, "out": variant["out"], "seconds": time.perf_counter() - t0, **stats}
+
+
+def build_variants(variants: list[dict], jobs: int | None = None, cache_dir: Path | None = None) -> list[dict]:
+    # The styled base templates are prepared once here and handed to every worker,
+    # so workers only import python-docx once and never re-style Document().
+    templates = {
+        c: base_template(c)
+        for c in {bool(v.get("compact")) for v in variants if v.get("writer", "docx") == "docx"}
+    }
+    build = partial(_build_variant, cache_dir=cache_dir)
+    if len(variants) <= 1 or jobs == 1:
+        results = [build(v) for v in variants]
+    else:
+        workers = min(jobs or os.cpu_count() or 1, len(variants))
+        from concurrent.futures import ProcessPoolExecutor
+
+        with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(templates,)) as pool:
+            results = list(pool.map(build, variants))
+    # Prune once all variants are done, keeping what any of them used; after a
+    # failure the cache is left alone.
+    if cache_dir is not None and cache_dir.is_dir() and not any("error" in r for r in results):
+        prune_fragments(cache_dir, (name for r in results for name in r.get("fragments", ())))
+    return results
+
+
+def _print_variant_table(results: list[dict], seconds: float) -> None:
+    width = max([len("Variant")] + [len(r["name"]) for r in results])
+    print(f"{'Variant':<{width}}  {'Seconds':>8}  Output")
+    for r in results:
+        if "error" in r:
+            print(f"{r['name']:<{width}}  {'error':>8}  {r['error']}")
+        else:
+            print(f"{r['name']:<{width}}  {r['seconds']:>8.2f}  {r['out']}")
+    print(f"{len(results)} variants in {seconds:.2f}s")
 
-    # Deployment
-    _h1(doc, "8. Deployment and Operations")
-    _h2(doc, "8.1 Local Development")
-    _bullets(
-        doc,
-        [
-            "Frontend: npm install → npm run dev.",
-            "Backend: cd backend → npm install → npm run dev (or npm start).",
-            "Supabase: configure project keys and edge function secrets.",
-        ],
-    )
-    _h2(doc, "8.2 Serverless Hosting")
-    _para(
-        doc,
-        "The repository includes Vercel configuration. In production, secrets are configured in Vercel and Supabase, and both frontend and backend "
-        "can be deployed as serverless services.",
-    )
-    _pad_pages(doc, 55)
 
-    # Testing and Quality
-    _h1(doc, "9. Testing, Monitoring, and Maintenance")
-    _bullets(
-        doc,
-        [
-            "Frontend: component-level testing can be added.",
-            "Backend: route/controller tests can validate auth, booking, and chat.",
-            "Monitoring: log aggregation, API error budgets, and AI usage monitoring.",
-        ],
-    )
-    _pad_pages(doc, 45)
-
-    # Detailed Frontend Walkthrough
-    _h1(doc, "10. Frontend Implementation Walkthrough")
-    _h2(doc, "10.1 Application Entry Points")
-    _para(
-        doc,
-        "The frontend is a Vite-powered React application. The entry point bootstraps React, mounts the main App component, and configures "
-        "cross-cutting providers (routing, theme, query caching, i18n, and auth context). This architecture keeps feature components focused on "
-        "presentational logic while shared services live in dedicated modules.",
-    )
-    _h2(doc, "10.2 AIChatbot Component")
-    _bullets(
-        doc,
-        [
-            "UI states: closed/open, minimized/expanded, dragging position, loading/streaming.",
-            "Message model: role=user|assistant with content string.",
-            "Streaming parser: reads SSE-like 'data: {json}' lines and appends delta tokens.",
-            "Language control: adds a system message instructing the assistant to respond in the current i18n language.",
-            "Voice: SpeechRecognition and speechSynthesis are optional and gated by browser support.",
-        ],
-    )
-    _h2(doc, "10.3 Events and Booking Wizard")
-    _para(
-        doc,
-        "The events page currently uses a client-side dataset and provides filtering by search, category, and date. When a user clicks 'Book Now', "
-        "the UI switches into the BookingWizard flow. The wizard manages form state locally and validates inputs step-by-step. The payment step is a demo "
-        "form that validates formatting but does not send details to any payment processor.",
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Generate the DocentDesk project report (.docx).")
+    parser.add_argument(
+        "--writer",
+        choices=["docx", "stream"],
+        default="docx",
+        help="docx: python-docx in-memory build (default); stream: streaming OOXML writer",
     )
-    _h2(doc, "10.4 AuthContext")
-    _para(
-        doc,
-        "Authentication is primarily managed through Supabase Auth sessions. The code also supports an optional backend JWT token stored in localStorage, "
-        "which is checked first. This dual-path approach enables incremental migration between auth strategies but should be consolidated for production to "
-        "avoid user confusion and edge-case session bugs.",
+    parser.add_argument(
+        "--target-pages",
+        type=int,
+        metavar="N",
+        help="solve PADDING_SCALE so the simulated layout reaches N pages, then write once",
     )
-    _pad_pages(doc, 110)
-
-    # Detailed Backend Walkthrough
-    _h1(doc, "11. Backend Implementation Walkthrough")
-    _h2(doc, "11.1 Express Server Layout")
-    _para(
-        doc,
-        "The backend exposes REST endpoints grouped by domain (auth, artifacts, events, bookings, feedback, tours, chat). Middleware layers enforce "
-        "baseline security controls (helmet), request limits (rate limiter), request parsing, and structured error handling.",
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="stream writer: re-render every section instead of reusing cached fragments",
     )
-    _h2(doc, "11.2 Chat Controller (OpenAI Path)")
-    _para(
-        doc,
-        "The backend chat controller constructs a SYSTEM_PROMPT for a museum docent persona, optionally enriches it with artifact context, includes up to "
-        "the most recent conversation turns, and calls OpenAI chat.completions. Model selection is controlled by OPENAI_MODEL (default gpt-4).",
+    parser.add_argument(
+        "--manifest",
+        type=Path,
+        help="build every variant listed in this JSON manifest (see load_manifest())",
     )
-    _h2(doc, "11.3 Booking Controller")
-    _para(
-        doc,
-        "The booking controller performs event validation (published, not cancelled, not in the past), checks seat availability, computes totals, generates a QR code payload, "
-        "and sends confirmation email. Payment fields exist in the booking model, but real provider capture is not implemented.",
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        help="worker processes for --manifest (default: CPU count); with --writer stream, "
+        "render and lay out the sections in N processes (0: one per CPU) and merge them in order",
     )
-    _h2(doc, "11.4 Migration Note: MongoDB vs Supabase")
-    _para(
-        doc,
-        "Repository documentation contains both a MongoDB-based backend description and a migration guide indicating a move to Supabase for serverless compatibility. "
-        "When producing deployment documentation for stakeholders, it is important to pick one canonical data layer (MongoDB Atlas or Supabase/Postgres) and ensure "
-        "all controllers and data models consistently use it.",
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="record time, paragraphs, XML bytes and memory per section and phase; "
+        "prints a table and writes <output>.profile.json",
     )
-    _pad_pages(doc, 110)
-
-    # Data, Schema, and i18n
-    _h1(doc, "12. Data Model, Storage, and Internationalization")
-    _h2(doc, "12.1 Domain Entities")
-    _bullets(
-        doc,
-        [
-            "User: identity, role/permissions, profile metadata.",
-            "Artifact: title, description, category, era, origin, image metadata.",
-            "Event: date/time, location, pricing, capacity, publishing state.",
-            "Booking: ticket breakdown, add-ons, totals, QR code payload, payment status.",
-            "Tour: session metadata, interaction counts, optional chat history linkage.",
-            "Feedback: reviews/ratings and moderation capabilities.",
-        ],
+    parser.add_argument(
+        "--compact",
+        action="store_true",
+        help="named Code style instead of direct formatting, pruned styles.xml, no optional parts",
     )
-    _h2(doc, "12.2 Internationalization")
-    _para(
-        doc,
-        "Internationalization is implemented using i18next/react-i18next and translated JSON locale files. The chatbot is instructed to reply in the currently selected language, "
-        "and voice recognition/synthesis use mapped locale codes (e.g., hi-IN, ar-SA, zh-CN).",
+    parser.add_argument(
+        "--compression",
+        choices=sorted(_ooxml_stream.COMPRESSION),
+        default="deflate",
+        help="zip compression: stored (fast drafts), deflate (default) or max (distribution)",
     )
-    _pad_pages(doc, 90)
-
-    # Appendix: Design for RAG (future)
-    _h1(doc, "Appendix D. Future Enhancement: Verified Answers (RAG)")
-    _para(
-        doc,
-        "To reduce hallucinations and improve factual accuracy, the recommended next iteration is Retrieval-Augmented Generation (RAG). In RAG, museum content is indexed (e.g., artifacts, exhibits, curatorial notes), "
-        "the user query is embedded, relevant passages are retrieved, and the LLM is asked to answer using only retrieved sources. This yields more reliable responses and enables citations.",
+    parser.add_argument(
+        "--save-threads",
+        type=int,
+        metavar="N",
+        help="docx writer: package with N compression threads (0: one per CPU), serializing, "
+        "compressing and writing parts concurrently; prints the time of each stage",
     )
-    _bullets(
-        doc,
-        [
-            "Content sources: curated artifact catalog, event descriptions, museum policy pages, accessibility guide.",
-            "Indexing: chunking + embeddings stored in vector DB (Supabase vector, pgvector, or hosted service).",
-            "Serving: Edge Function retrieves top-k passages and injects them into the prompt.",
-            "UX: show 'Sources' section in chat and provide 'Report incorrect info' feedback.",
-        ],
+    parser.add_argument(
+        "--toc",
+        choices=["static", "field"],
+        default="static",
+        help="static: TOC populated with estimated page numbers at build time (default); "
+        "field: empty TOC field, filled by Word's Update Table",
     )
-    _pad_pages(doc, 60)
-
-    # Appendix: Environment Variables
-    _h1(doc, "Appendix A. Environment Variables")
-    _para(
-        doc,
-        "Key variables used across the system (names taken from project docs and source):",
+    parser.add_argument(
+        "--preview",
+        choices=["html", "md"],
+        help="write a quick HTML/Markdown preview instead of the .docx (python-docx is not imported)",
     )
-    _bullets(
-        doc,
-        [
-            "Frontend: VITE_SUPABASE_URL, VITE_SUPABASE_PUBLISHABLE_KEY, VITE_BACKEND_URL.",
-            "Supabase Edge: LOVABLE_API_KEY (used to call ai.gateway.lovable.dev).",
-            "Backend: OPENAI_API_KEY, OPENAI_MODEL; STRIPE_SECRET_KEY, STRIPE_PUBLISHABLE_KEY (planned).",
-            "Backend (migration docs): SUPABASE_URL, SUPABASE_SERVICE_KEY.",
-        ],
+    parser.add_argument(
+        "--preview-out",
+        metavar="PATH",
+        help="preview destination, '-' for stdout (default: docs/DocentDesk_Project_Report.preview.<format>)",
     )
-    _pad_pages(doc, 35)
-
-    # Appendix: API Endpoints (summary)
-    _h1(doc, "Appendix B. Backend Endpoint Summary")
-    _para(
-        doc,
-        "The backend exposes REST routes for auth, artifacts, events, bookings, tours, feedback, and chat.",
+    parser.add_argument(
+        "--reproducible",
+        action="store_true",
+        help="byte-identical output for identical inputs: cover date and zip timestamps from "
+        "$SOURCE_DATE_EPOCH (else the last commit). The report is packaged in memory and "
+        "only written when its bytes differ from the existing file. "
+        "Implied when SOURCE_DATE_EPOCH is set",
     )
-    _codeblock(
-        doc,
-        "Examples:\n"
-        "POST /api/chat/message (protected)\n"
-        "GET  /api/chat/history/:tourId (protected)\n"
-        "POST /api/bookings (protected)\n"
-        "GET  /api/bookings/my-bookings (protected)\n",
+    parser.add_argument(
+        "--watch",
+        action="store_true",
+        help="stay running and rebuild (and re-estimate) whenever the script, spec or app sources change",
     )
-    _pad_pages(doc, 40)
+    args = parser.parse_args()
+    if args.watch and (args.manifest or args.preview or args.profile):
+        parser.error("--watch cannot be combined with --manifest, --preview or --profile")
+    if args.save_threads is not None and (args.writer == "stream" or args.preview):
+        parser.error("--save-threads only applies to --writer docx builds, not --writer stream or --preview")
+    if args.jobs is not None and not args.manifest and (args.writer != "stream" or args.preview):
+        parser.error("-j/--jobs applies to --manifest and to --writer stream builds")
+    cache_dir = None if args.no_cache else CACHE_DIR
+    epoch = None
+    if args.reproducible or "SOURCE_DATE_EPOCH" in os.environ:
+        try:
+            epoch = source_date_epoch()
+        except ValueError as e:
+            parser.error(f"--reproducible: {e}")
+
+    if args.manifest:
+        t0 = time.perf_counter()
+        variants = load_manifest(args.manifest)
+        if epoch is not None:
+            variants = [{"reproducible": True, **v} for v in variants]
+        results = build_variants(variants, args.jobs, cache_dir)
+        _print_variant_table(results, time.perf_counter() - t0)
+        if any("error" in r for r in results):
+            sys.exit(1)
+        return
 
-    # Appendix: Component Inventory (high level)
-    _h1(doc, "Appendix C. Frontend Component Inventory (High Level)")
-    _bullets(
-        doc,
-        [
-            "AIChatbot: streaming chat + voice features.",
-            "BookingWizard: multi-step booking UI.",
-            "Virtual Tour components: 3D scene, controls, hotspots.",
-            "Auth context and modals: Supabase auth + optional backend token.",
-        ],
+    out = ROOT / "docs" / "DocentDesk_Project_Report.docx"
+    if args.watch:
+        from _watch import watch
+
+        options = {
+            "writer": args.writer,
+            "cache_dir": cache_dir,
+            "compact": args.compact,
+            "compression": args.compression,
+            "toc": args.toc,
+            "save_threads": args.save_threads,
+            "jobs": args.jobs,
+            "epoch": epoch,
+        }
+        watch(out, options, args.target_pages)
+        return
+    padding_scale = PADDING_SCALE
+    if args.target_pages:
+        padding_scale = solve_padding_scale(args.target_pages, toc=args.toc)
+        print(f"Padding scale for {args.target_pages} pages: {padding_scale:.4f}", file=sys.stderr)
+    if args.preview:
+        t0 = time.perf_counter()
+        if args.preview_out == "-":
+            write_preview(sys.stdout, args.preview, padding_scale)
+            return
+        preview = Path(args.preview_out or out.with_suffix(f".preview.{args.preview}"))
+        with open(preview, "w", encoding="utf-8", buffering=1 << 16) as f:
+            write_preview(f, args.preview, padding_scale)
+        print(f"Wrote preview: {preview} ({(time.perf_counter() - t0) * 1000:.0f} ms)")
+        return
+    if args.profile:
+        from _build_profile import Profiler
+
+        global _PROFILER
+        _PROFILER = Profiler()
+        _PROFILER.start()
+    stats = build_report(
+        out,
+        writer=args.writer,
+        padding_scale=padding_scale,
+        cache_dir=cache_dir,
+        compact=args.compact,
+        compression=args.compression,
+        toc=args.toc,
+        save_threads=args.save_threads,
+        jobs=args.jobs,
+        epoch=epoch,
     )
-    _pad_pages(doc, 40)
-
-    out_path.parent.mkdir(parents=True, exist_ok=True)
-    doc.save(out_path)
-
-
-def main() -> None:
-    root = Path(__file__).resolve().parents[1]
-    out = root / "docs" / "DocentDesk_Project_Report.docx"
-    build_report(out)
-    print(f"Wrote: {out}")
+    if stats.get("unchanged"):
+        print(f"Unchanged: {out} (sha256 {stats['sha256'][:12]}), not rewritten")
+    else:
+        print(f"Wrote: {out}")
+    if "save" in stats:
+        save = stats["save"]
+        print(
+            f"Save: serialize {save['serialize_seconds'] * 1000:.0f} ms, "
+            f"compress {save['compress_seconds'] * 1000:.0f} ms on {save['threads']} thread(s), "
+            f"write {save['write_seconds'] * 1000:.0f} ms ({save['wall_seconds'] * 1000:.0f} ms wall)"
+        )
+    elif args.save_threads is not None:
+        print("--save-threads: unsupported python-docx version, saved with Document.save()", file=sys.stderr)
+    if _PROFILER is not None:
+        _PROFILER.stop()
+        _PROFILER.print_table()
+        _PROFILER.write_json(out.with_suffix(".profile.json"))
+        _PROFILER = None
+    if args.writer == "stream" and cache_dir is not None:
+        print(
+            f"Sections: {stats['rendered']} rendered, {stats['reused']} reused from {cache_dir}"
+            f" ({stats['pruned']} stale fragments removed)"
+        )
+    from _estimate_docx_length import simulate_docx
+
+    print(f"Estimated pages (layout simulation): {simulate_docx(out).pages}")
 
 
 if __name__ == "__main__":
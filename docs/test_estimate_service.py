@@ -0,0 +1,69 @@
+from __future__ import annotations
+
+import asyncio
+import base64
+import io
+import json
+import zipfile
+import zlib
+
+import pytest
+
+from _estimate_service import EstimateService, serve_lines
+
+
+# python -m pytest docs/test_estimate_service.py
+#
+# Every request gets exactly one response, failures included: a bad upload must
+# not kill its task and leave the client waiting.
+
+DOCUMENT_XML = (
+    '<w:document xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main"><w:body>'
+    + "<w:p><w:r><w:t>Tickets are booked in three steps and paid by card.</w:t></w:r></w:p>" * 400
+    + "</w:body></w:document>"
+)
+
+
+def _corrupt_docx() -> bytes:
+    # A well-formed zip whose word/document.xml deflate stream is broken, so
+    # reading it raises zlib.error rather than BadZipFile.
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w", zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr("word/document.xml", DOCUMENT_XML)
+    data = bytearray(buf.getvalue())
+    info = zipfile.ZipFile(io.BytesIO(bytes(data))).getinfo("word/document.xml")
+    start = info.header_offset + 30 + len(info.filename) + len(info.extra)
+    data[start : start + info.compress_size] = b"\xff" * info.compress_size
+    with pytest.raises(zlib.error):
+        zipfile.ZipFile(io.BytesIO(bytes(data))).read("word/document.xml")
+    return bytes(data)
+
+
+async def _serve(service: EstimateService, requests: list[dict]) -> list[dict]:
+    reader = asyncio.StreamReader()
+    reader.feed_data(b"".join(json.dumps(r).encode() + b"\n" for r in requests))
+    reader.feed_eof()
+    lines: list[str] = []
+    await serve_lines(service, reader, lines.append)
+    return [json.loads(line) for line in lines]
+
+
+@pytest.fixture
+def service():
+    service = EstimateService(jobs=1, cache_size=8)
+    yield service
+    service.close()
+
+
+def test_corrupt_docx_gets_an_error_response(service):
+    upload = base64.b64encode(_corrupt_docx()).decode()
+    (response,) = asyncio.run(_serve(service, [{"id": 1, "data": upload, "name": "broken.docx"}]))
+    assert response["id"] == 1 and response["ok"] is False
+    assert response["error"].startswith("error:")  # zlib.error
+    assert service.counters["errors"] == 1
+
+
+def test_non_string_payload_gets_an_error_response(service):
+    response = asyncio.run(service.estimate({"id": 3, "data": 123, "name": "x.docx"}))
+    assert response == {"id": 3, "ok": False, "error": '"data" must be a base64 string'}
+    assert service.counters["errors"] == 1